@@ -3,10 +3,17 @@
 # Accounts + Users ONLY
 # =========================================
 
+import argparse
 import numpy as np
 import pandas as pd
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.dimension_index import build_dimension_index
+from common.contracts import enforce_tables
+from common.instrumentation import step
+
 np.random.seed(42)
 
 RAW_DIR = Path("data/raw")
@@ -40,6 +47,12 @@ GEO_REGIONS = ["NA", "EU", "APAC", "LATAM"]
 START_DATE = pd.Timestamp("2023-01-01")
 END_DATE = pd.Timestamp("2024-06-01")
 
+# Scale override for benchmarks only (~11.4 users per account); the
+# published dataset always uses N_ACCOUNTS.
+parser = argparse.ArgumentParser(description="Generate raw accounts and users.")
+parser.add_argument("--n-accounts", type=int, default=N_ACCOUNTS)
+n_accounts = parser.parse_args().n_accounts
+
 # -----------------------------
 # Helper Functions
 # -----------------------------
@@ -52,74 +65,78 @@ def random_dates(start, end, n):
 # -----------------------------
 # Step 1: Generate Accounts
 # -----------------------------
-account_ids = [f"acct_{i:05d}" for i in range(N_ACCOUNTS)]
-
-account_plan = np.random.choice(
-    list(PLAN_DISTRIBUTION.keys()),
-    size=N_ACCOUNTS,
-    p=list(PLAN_DISTRIBUTION.values())
-)
+with step("accounts_users.accounts") as s:
+    account_ids = [f"acct_{i:05d}" for i in range(n_accounts)]
 
-seat_count = []
-cs_assigned = []
-
-for plan in account_plan:
-    if plan == "enterprise":
-        seat_count.append(np.random.randint(50, 300))
-        cs_assigned.append(1)
-    elif plan == "growth":
-        seat_count.append(np.random.randint(15, 80))
-        cs_assigned.append(np.random.binomial(1, 0.5))
-    else:
-        seat_count.append(np.random.randint(3, 20))
-        cs_assigned.append(0)
-
-accounts = pd.DataFrame({
-    "account_id": account_ids,
-    "account_created_date": random_dates(START_DATE, END_DATE, N_ACCOUNTS),
-    "plan_tier": account_plan,
-    "industry": np.random.choice(INDUSTRIES, size=N_ACCOUNTS),
-    "seat_count": seat_count,
-    "cs_assigned_flag": cs_assigned,
-    # Noisy, lagging, unreliable by design
-    "account_health_score": np.clip(
-        np.random.normal(loc=0.6, scale=0.15, size=N_ACCOUNTS),
-        0.1, 0.95
+    account_plan = np.random.choice(
+        list(PLAN_DISTRIBUTION.keys()),
+        size=n_accounts,
+        p=list(PLAN_DISTRIBUTION.values())
     )
-})
+
+    seat_count = []
+    cs_assigned = []
+
+    for plan in account_plan:
+        if plan == "enterprise":
+            seat_count.append(np.random.randint(50, 300))
+            cs_assigned.append(1)
+        elif plan == "growth":
+            seat_count.append(np.random.randint(15, 80))
+            cs_assigned.append(np.random.binomial(1, 0.5))
+        else:
+            seat_count.append(np.random.randint(3, 20))
+            cs_assigned.append(0)
+
+    accounts = pd.DataFrame({
+        "account_id": account_ids,
+        "account_created_date": random_dates(START_DATE, END_DATE, n_accounts),
+        "plan_tier": account_plan,
+        "industry": np.random.choice(INDUSTRIES, size=n_accounts),
+        "seat_count": seat_count,
+        "cs_assigned_flag": cs_assigned,
+        # Noisy, lagging, unreliable by design
+        "account_health_score": np.clip(
+            np.random.normal(loc=0.6, scale=0.15, size=n_accounts),
+            0.1, 0.95
+        )
+    })
+    s.rows_out = len(accounts)
 
 # -----------------------------
 # Step 2: Generate Users
 # -----------------------------
-users_list = []
-
-user_counter = 0
-
-for _, acct in accounts.iterrows():
-    # Right-skewed user distribution
-    n_users = max(
-        1,
-        int(np.random.lognormal(mean=2.3, sigma=0.6))
-    )
-
-    for _ in range(n_users):
-        user_counter += 1
-        users_list.append({
-            "user_id": f"user_{user_counter:07d}",
-            "account_id": acct["account_id"],
-            "user_created_date": acct["account_created_date"]
-            + pd.to_timedelta(np.random.randint(0, 30), unit="D"),
-            "role_type": np.random.choice(
-                list(ROLES.keys()),
-                p=list(ROLES.values())
-            ),
-            "geo_region": np.random.choice(GEO_REGIONS),
-            # Incomplete invite chains by design
-            "invited_by_user_id": None
-            if np.random.rand() < 0.7 else "unknown_user"
-        })
-
-users = pd.DataFrame(users_list)
+with step("accounts_users.users", rows_in=len(accounts)) as s:
+    users_list = []
+
+    user_counter = 0
+
+    for _, acct in accounts.iterrows():
+        # Right-skewed user distribution
+        n_users = max(
+            1,
+            int(np.random.lognormal(mean=2.3, sigma=0.6))
+        )
+
+        for _ in range(n_users):
+            user_counter += 1
+            users_list.append({
+                "user_id": f"user_{user_counter:07d}",
+                "account_id": acct["account_id"],
+                "user_created_date": acct["account_created_date"]
+                + pd.to_timedelta(np.random.randint(0, 30), unit="D"),
+                "role_type": np.random.choice(
+                    list(ROLES.keys()),
+                    p=list(ROLES.values())
+                ),
+                "geo_region": np.random.choice(GEO_REGIONS),
+                # Incomplete invite chains by design
+                "invited_by_user_id": None
+                if np.random.rand() < 0.7 else "unknown_user"
+            })
+
+    users = pd.DataFrame(users_list)
+    s.rows_out = len(users)
 
 # -----------------------------
 # Intentional Inconsistencies
@@ -128,7 +145,7 @@ users = pd.DataFrame(users_list)
 # Some accounts have more active users than seat count
 overfilled_accounts = np.random.choice(
     accounts["account_id"],
-    size=int(0.05 * N_ACCOUNTS),
+    size=int(0.05 * n_accounts),
     replace=False
 )
 
@@ -142,8 +159,15 @@ for acct_id in overfilled_accounts:
 # -----------------------------
 # Save Raw Files
 # -----------------------------
-accounts.to_csv(RAW_DIR/"accounts_raw.csv", index=False)
-users.to_csv(RAW_DIR/"users_raw.csv", index=False)
+enforce_tables({"raw.accounts": accounts, "raw.users": users})
+
+with step("accounts_users.write", rows_in=len(accounts) + len(users)):
+    accounts.to_csv(RAW_DIR/"accounts_raw.csv", index=False)
+    users.to_csv(RAW_DIR/"users_raw.csv", index=False)
+
+# Columnar user -> account / role index for downstream stages
+with step("accounts_users.dimension_index", rows_in=len(users)):
+    build_dimension_index(users=users)
 
 print("Phase 4A complete.")
 print(f"Accounts generated: {len(accounts)}")
@@ -5,8 +5,14 @@
 
 import numpy as np
 import pandas as pd
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.dimension_index import open_dimension_index
+from common.contracts import enforce
+from common.instrumentation import step
+
 np.random.seed(42)
 
 RAW_DIR = Path("data/raw")
@@ -15,29 +21,33 @@ RAW_DIR.mkdir(parents=True, exist_ok=True)
 # -----------------------------
 # Load Required Raw Data
 # -----------------------------
-users = pd.read_csv("data/raw/users_raw.csv")
-activity = pd.read_csv(
-    "data/raw/user_activity_daily_raw.csv",
-    parse_dates=["activity_date"]
-)
+with step("latent_groups.load") as s:
+    users = open_dimension_index().frame(("user_id",))
+    activity = pd.read_csv(
+        "data/raw/user_activity_daily_raw.csv",
+        parse_dates=["activity_date"]
+    )
+    s.rows_out = len(activity)
 
 # -----------------------------
 # Aggregate Pre-Treatment Signals
 # -----------------------------
-activity_agg = (
-    activity
-    .groupby("user_id")
-    .agg(
-        active_days=("login_flag", "sum"),
-        avg_core_actions=("core_action_count", "mean"),
-        avg_feature_diversity=("feature_diversity_count", "mean"),
-        total_time_spent=("time_spent_minutes", "sum"),
-        collab_days=("collab_action_count", lambda x: (x > 0).sum())
+with step("latent_groups.aggregate", rows_in=len(activity)) as s:
+    activity_agg = (
+        activity
+        .groupby("user_id")
+        .agg(
+            active_days=("login_flag", "sum"),
+            avg_core_actions=("core_action_count", "mean"),
+            avg_feature_diversity=("feature_diversity_count", "mean"),
+            total_time_spent=("time_spent_minutes", "sum"),
+            collab_days=("collab_action_count", lambda x: (x > 0).sum())
+        )
+        .reset_index()
     )
-    .reset_index()
-)
 
-user_signals = users.merge(activity_agg, on="user_id", how="left").fillna(0)
+    user_signals = users.merge(activity_agg, on="user_id", how="left").fillna(0)
+    s.rows_out = len(user_signals)
 
 # -----------------------------
 # Normalize Signals (0-1) for Logic
@@ -55,43 +65,45 @@ user_signals["collab_tendency"] = min_max(user_signals["avg_feature_diversity"])
 # -----------------------------
 # Latent Group Assignment Logic
 # -----------------------------
-latent_groups = []
-
-for _, row in user_signals.iterrows():
-
-    a = row["activity_score"]
-    c = row["collab_tendency"]
-
-    # --- BASE PROBABILITIES ---
-    probs = {
-        "sure_thing": 0.35 * a + 0.25 * c,
-        "persuadable": 0.40 * (1 - c) + 0.25 * a,
-        "sleeping_dog": 0.30 * a * (1 - c),
-        "lost_cause": 0.50 * (1 - a)
-    }
-
-    # --- LOGIC OVERRIDE FOR TOXIC USERS ---
-    # If High Activity AND Low Diversity -> Force Sleeping Dog
-    # This aligns the label with the features generated in Phase 4B
-    if a > 0.6 and c < 0.25:
-        probs["sleeping_dog"] += 0.5  # Massive boost to ensure assignment
-        probs["persuadable"] *= 0.1   # Penalize persuadable (they are stuck, not open)
-
-    # Add noise to prevent perfect separability
-    for k in probs:
-        probs[k] += np.random.normal(0, 0.02)
-
-    # Ensure valid probability distribution
-    probs = {k: max(v, 0.01) for k, v in probs.items()}
-    total = sum(probs.values())
-    probs = {k: v / total for k, v in probs.items()}
-
-    latent_groups.append(
-        np.random.choice(
-            list(probs.keys()),
-            p=list(probs.values())
+with step("latent_groups.assign", rows_in=len(user_signals)) as s:
+    latent_groups = []
+
+    for _, row in user_signals.iterrows():
+
+        a = row["activity_score"]
+        c = row["collab_tendency"]
+
+        # --- BASE PROBABILITIES ---
+        probs = {
+            "sure_thing": 0.35 * a + 0.25 * c,
+            "persuadable": 0.40 * (1 - c) + 0.25 * a,
+            "sleeping_dog": 0.30 * a * (1 - c),
+            "lost_cause": 0.50 * (1 - a)
+        }
+
+        # --- LOGIC OVERRIDE FOR TOXIC USERS ---
+        # If High Activity AND Low Diversity -> Force Sleeping Dog
+        # This aligns the label with the features generated in Phase 4B
+        if a > 0.6 and c < 0.25:
+            probs["sleeping_dog"] += 0.5  # Massive boost to ensure assignment
+            probs["persuadable"] *= 0.1   # Penalize persuadable (they are stuck, not open)
+
+        # Add noise to prevent perfect separability
+        for k in probs:
+            probs[k] += np.random.normal(0, 0.02)
+
+        # Ensure valid probability distribution
+        probs = {k: max(v, 0.01) for k, v in probs.items()}
+        total = sum(probs.values())
+        probs = {k: v / total for k, v in probs.items()}
+
+        latent_groups.append(
+            np.random.choice(
+                list(probs.keys()),
+                p=list(probs.values())
+            )
         )
-    )
+    s.rows_out = len(latent_groups)
 
 # -----------------------------
 # Save Hidden Labels
@@ -101,5 +113,7 @@ output = pd.DataFrame({
     "latent_uplift_group": latent_groups
 })
 
-output.to_csv(RAW_DIR / "latent_uplift_groups_hidden.csv", index=False)
+enforce("raw.latent", output)
+with step("latent_groups.write", rows_in=len(output)):
+    output.to_csv(RAW_DIR / "latent_uplift_groups_hidden.csv", index=False)
 print("Phase 4C complete: latent_uplift_groups_hidden.csv generated.")
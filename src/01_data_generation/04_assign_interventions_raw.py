@@ -5,8 +5,14 @@
 
 import numpy as np
 import pandas as pd
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.dimension_index import open_dimension_index
+from common.contracts import enforce
+from common.instrumentation import step
+
 np.random.seed(42)
 
 RAW_DIR = Path("data/raw")
@@ -33,43 +39,47 @@ PLAN_TREATMENT_MULTIPLIER = {
 # -----------------------------
 # Load Raw Data
 # -----------------------------
-users = pd.read_csv("data/raw/users_raw.csv")
-accounts = pd.read_csv("data/raw/accounts_raw.csv")
+with step("interventions.load") as s:
+    users = open_dimension_index().frame(("user_id", "account_id", "role_type"))
+    accounts = pd.read_csv("data/raw/accounts_raw.csv")
 
-activity = pd.read_csv(
-    "data/raw/user_activity_daily_raw.csv",
-    parse_dates=["activity_date"]
-)
+    activity = pd.read_csv(
+        "data/raw/user_activity_daily_raw.csv",
+        parse_dates=["activity_date"]
+    )
+    s.rows_out = len(users)
 
 # -----------------------------
 # Aggregate Pre-Treatment Activity
 # -----------------------------
-activity_agg = (
-    activity
-    .groupby("user_id")
-    .agg(
-        active_days=("login_flag", "sum"),
-        avg_feature_diversity=("feature_diversity_count", "mean"),
-        total_core_actions=("core_action_count", "sum"),
-        last_activity_date=("activity_date", "max")
+with step("interventions.aggregate", rows_in=len(activity)) as s:
+    activity_agg = (
+        activity
+        .groupby("user_id")
+        .agg(
+            active_days=("login_flag", "sum"),
+            avg_feature_diversity=("feature_diversity_count", "mean"),
+            total_core_actions=("core_action_count", "sum"),
+            last_activity_date=("activity_date", "max")
+        )
+        .reset_index()
     )
-    .reset_index()
-)
 
-df = (
-    users
-    .merge(activity_agg, on="user_id", how="left")
-    .merge(
-        accounts[["account_id", "plan_tier"]],
-        on="account_id",
-        how="left"
+    df = (
+        users
+        .merge(activity_agg, on="user_id", how="left")
+        .merge(
+            accounts[["account_id", "plan_tier"]],
+            on="account_id",
+            how="left"
+        )
+        .fillna({
+            "active_days": 0,
+            "avg_feature_diversity": 0,
+            "total_core_actions": 0
+        })
     )
-    .fillna({
-        "active_days": 0,
-        "avg_feature_diversity": 0,
-        "total_core_actions": 0
-    })
-)
+    s.rows_out = len(df)
 
 # -----------------------------
 # Step 1: Eligibility Logic (FIRST)
@@ -94,41 +104,41 @@ df["intervention_date"] = (
 # -----------------------------
 # Step 3: Treatment Assignment (CONFONDED)
 # -----------------------------
-treatment_flags = []
+with step("interventions.assign", rows_in=len(df)) as s:
+    treatment_flags = []
 
-for _, row in df.iterrows():
+    for _, row in df.iterrows():
 
-    # Hard gate: ineligible users are never treated
-    if row["eligibility_flag"] == 0:
-        treatment_flags.append(0)
-        continue
+        # Hard gate: ineligible users are never treated
+        if row["eligibility_flag"] == 0:
+            treatment_flags.append(0)
+            continue
 
-    # Base probability
-    p = TREATMENT_BASE_RATE
+        # Base probability
+        p = TREATMENT_BASE_RATE
 
-    # Confounding: higher activity → higher treatment probability
-    activity_boost = min(row["active_days"] / 20, 1.0)
-    p *= (1 + activity_boost)
+        # Confounding: higher activity → higher treatment probability
+        activity_boost = min(row["active_days"] / 20, 1.0)
+        p *= (1 + activity_boost)
 
-    # Role bias
-    p *= ROLE_TREATMENT_MULTIPLIER[row["role_type"]]
+        # Role bias
+        p *= ROLE_TREATMENT_MULTIPLIER[row["role_type"]]
 
-    # Plan bias
-    p *= PLAN_TREATMENT_MULTIPLIER[row["plan_tier"]]
+        # Plan bias
+        p *= PLAN_TREATMENT_MULTIPLIER[row["plan_tier"]]
 
-    # Clamp probability
-    p = min(max(p, 0.05), 0.95)
+        # Clamp probability
+        p = min(max(p, 0.05), 0.95)
 
-    treatment_flags.append(int(np.random.rand() < p))
+        treatment_flags.append(int(np.random.rand() < p))
 
-df["treatment_flag"] = treatment_flags
+    df["treatment_flag"] = treatment_flags
+    s.rows_out = len(df)
 
 # -----------------------------
 # Final Safety Check
 # -----------------------------
-assert (
-    df.loc[df["eligibility_flag"] == 0, "treatment_flag"] == 0
-).all(), "ERROR: Ineligible users were treated."
+enforce("treatment_assignment", df)
 
 # -----------------------------
 # Eligibility Diagnostics (Population-Level)
@@ -169,9 +179,12 @@ interventions = interventions[[
 # -----------------------------
 # Save Raw File
 # -----------------------------
-interventions.to_csv(
-    RAW_DIR/"interventions_raw.csv",
-    index=False
-)
+enforce("raw.interventions", interventions, refs={"raw.activity": activity})
+
+with step("interventions.write", rows_in=len(interventions)):
+    interventions.to_csv(
+        RAW_DIR/"interventions_raw.csv",
+        index=False
+    )
 
 print("Phase 4D complete.")
@@ -5,8 +5,13 @@
 
 import numpy as np
 import pandas as pd
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.contracts import enforce
+from common.instrumentation import step
+
 np.random.seed(42)
 
 RAW_DIR = Path("data/raw")
@@ -44,14 +49,16 @@ OUTCOME_MISSING_RATE = 0.06
 # -----------------------------
 # Load Data
 # -----------------------------
-interventions = pd.read_csv(
-    RAW_DIR / "interventions_raw.csv",
-    parse_dates=["intervention_date"]
-)
+with step("outcomes.load") as s:
+    interventions = pd.read_csv(
+        RAW_DIR / "interventions_raw.csv",
+        parse_dates=["intervention_date"]
+    )
 
-latent_truth = pd.read_csv(
-    RAW_DIR / "latent_uplift_groups_hidden.csv"
-)
+    latent_truth = pd.read_csv(
+        RAW_DIR / "latent_uplift_groups_hidden.csv"
+    )
+    s.rows_out = len(interventions)
 
 # -----------------------------
 # Merge Hidden Truth (IN MEMORY)
@@ -65,60 +72,62 @@ df = interventions.merge(
 # -----------------------------
 # Simulate Counterfactual Worlds
 # -----------------------------
-prob_treated = []
-prob_untreated = []
+with step("outcomes.simulate", rows_in=len(df)) as s:
+    prob_treated = []
+    prob_untreated = []
 
-for _, row in df.iterrows():
-    group = row["latent_uplift_group"]
+    for _, row in df.iterrows():
+        group = row["latent_uplift_group"]
 
-    p_t = GROUP_PROBS[group]["treated"]
-    p_u = GROUP_PROBS[group]["untreated"]
+        p_t = GROUP_PROBS[group]["treated"]
+        p_u = GROUP_PROBS[group]["untreated"]
 
-    # Inject individual-level noise
-    # Sleeping Dogs get LOWER noise to preserve backfire signal
-    if group == "sleeping_dog":
-        p_t += np.random.normal(0, PROB_NOISE_STD * 0.5)
-        p_u += np.random.normal(0, PROB_NOISE_STD * 0.5)
-    else:
-        p_t += np.random.normal(0, PROB_NOISE_STD)
-        p_u += np.random.normal(0, PROB_NOISE_STD)
+        # Inject individual-level noise
+        # Sleeping Dogs get LOWER noise to preserve backfire signal
+        if group == "sleeping_dog":
+            p_t += np.random.normal(0, PROB_NOISE_STD * 0.5)
+            p_u += np.random.normal(0, PROB_NOISE_STD * 0.5)
+        else:
+            p_t += np.random.normal(0, PROB_NOISE_STD)
+            p_u += np.random.normal(0, PROB_NOISE_STD)
 
-    # Clamp probabilities
-    p_t = min(max(p_t, 0.01), 0.99)
-    p_u = min(max(p_u, 0.01), 0.99)
+        # Clamp probabilities
+        p_t = min(max(p_t, 0.01), 0.99)
+        p_u = min(max(p_u, 0.01), 0.99)
 
-    prob_treated.append(p_t)
-    prob_untreated.append(p_u)
+        prob_treated.append(p_t)
+        prob_untreated.append(p_u)
 
-df["prob_outcome_if_treated"] = prob_treated
-df["prob_outcome_if_untreated"] = prob_untreated
+    df["prob_outcome_if_treated"] = prob_treated
+    df["prob_outcome_if_untreated"] = prob_untreated
 
-# -----------------------------
-# Observe Only One World
-# -----------------------------
-observed_outcomes = []
-activation_dates = []
+    # -----------------------------
+    # Observe Only One World
+    # -----------------------------
+    observed_outcomes = []
+    activation_dates = []
 
-for _, row in df.iterrows():
+    for _, row in df.iterrows():
 
-    if row["treatment_flag"] == 1:
-        p = row["prob_outcome_if_treated"]
-    else:
-        p = row["prob_outcome_if_untreated"]
+        if row["treatment_flag"] == 1:
+            p = row["prob_outcome_if_treated"]
+        else:
+            p = row["prob_outcome_if_untreated"]
 
-    outcome = np.random.rand() < p
-    observed_outcomes.append(int(outcome))
+        outcome = np.random.rand() < p
+        observed_outcomes.append(int(outcome))
 
-    if outcome:
-        delay = np.random.randint(1, OUTCOME_WINDOW_DAYS + 3)
-        activation_dates.append(
-            row["intervention_date"] + pd.Timedelta(days=delay)
-        )
-    else:
-        activation_dates.append(pd.NaT)
+        if outcome:
+            delay = np.random.randint(1, OUTCOME_WINDOW_DAYS + 3)
+            activation_dates.append(
+                row["intervention_date"] + pd.Timedelta(days=delay)
+            )
+        else:
+            activation_dates.append(pd.NaT)
 
-df["collab_activated_flag"] = observed_outcomes
-df["activation_date"] = activation_dates
+    df["collab_activated_flag"] = observed_outcomes
+    df["activation_date"] = activation_dates
+    s.rows_out = len(df)
 
 # -----------------------------
 # Apply Outcome Window Censoring
@@ -154,10 +163,13 @@ outcomes["outcome_window_days"] = OUTCOME_WINDOW_DAYS
 # -----------------------------
 # Save Raw File
 # -----------------------------
-outcomes.to_csv(
-    RAW_DIR / "outcomes_raw.csv",
-    index=False
-)
+enforce("raw.outcomes", outcomes, refs={"raw.interventions": interventions})
+
+with step("outcomes.write", rows_in=len(outcomes)):
+    outcomes.to_csv(
+        RAW_DIR / "outcomes_raw.csv",
+        index=False
+    )
 
 print("Phase 4E complete.")
 print("Observed activation rate:", outcomes["collab_activated_flag"].mean())
@@ -2,11 +2,32 @@
 # Script: 01_validate_data.py
 # Purpose: Causal Audit & Statistical Health Check
 # =========================================
-
+#
+# The activity log is streamed (see streaming_checks.py): worker processes
+# aggregate newline-aligned byte ranges in chunks while the small tables
+# load and their checks run here; only per-user aggregates are kept.
+# Every check is a declared data contract (common/contracts.py); the
+# activity log is referenced through its per-user last activity date.
+
+import argparse
+import sys
 import pandas as pd
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # src/ (shared helpers)
+from common.keys import encode_key
+from common.contracts import enforce, enforce_tables
+from common.pipeline import stage_workers
+from common.instrumentation import step
+from streaming_checks import CHUNK_ROWS, submit_activity_aggregation, merge_futures
+
+parser = argparse.ArgumentParser(description="Validate the raw synthetic data (activity log streamed).")
+parser.add_argument("--workers", type=int, default=stage_workers(),
+                    help="Processes aggregating the activity log (default: this stage's share of the cores).")
+parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Activity rows per chunk.")
+args = parser.parse_args()
+
 RAW_DIR = Path("data/raw")
 VAL_DIR = RAW_DIR / "validation"
 VAL_DIR.mkdir(parents=True, exist_ok=True)
@@ -18,6 +39,13 @@ def log(msg, mode="a"):
     with open(OUTPUT_FILE, mode, encoding="utf-8") as f:
         f.write(msg + "\n")
 
+def log_results(results):
+    for r in results:
+        if r.status == "pass":
+            log(f"✅ PASS: {r.message}")
+        else:
+            log(f"⏭️ SKIP: {r.message} ({r.detail})")
+
 with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
     f.write("# Synthetic Data Generation Report\n\n")
 
@@ -26,12 +54,22 @@ with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
 # -----------------------------
 log("## 1. Loading Data...")
 
-users = pd.read_csv(RAW_DIR / "users_raw.csv", parse_dates=["user_created_date"])
-accounts = pd.read_csv(RAW_DIR / "accounts_raw.csv")
-activity = pd.read_csv(RAW_DIR / "user_activity_daily_raw.csv", parse_dates=["activity_date"])
-interventions = pd.read_csv(RAW_DIR / "interventions_raw.csv", parse_dates=["intervention_date"])
-outcomes = pd.read_csv(RAW_DIR / "outcomes_raw.csv", parse_dates=["activation_date"])
-latent = pd.read_csv(RAW_DIR / "latent_uplift_groups_hidden.csv")
+with step("validate.load") as s:
+    # Activity aggregation starts first and runs while the small tables load
+    pool = ProcessPoolExecutor(max_workers=max(1, args.workers))
+    activity_futures = submit_activity_aggregation(
+        pool, RAW_DIR / "user_activity_daily_raw.csv", max(1, args.workers), args.chunk_rows
+    )
+
+    users = pd.read_csv(RAW_DIR / "users_raw.csv", parse_dates=["user_created_date"])
+    accounts = pd.read_csv(RAW_DIR / "accounts_raw.csv")
+    interventions = pd.read_csv(RAW_DIR / "interventions_raw.csv", parse_dates=["intervention_date"])
+    outcomes = pd.read_csv(RAW_DIR / "outcomes_raw.csv", parse_dates=["activation_date"])
+    latent = pd.read_csv(RAW_DIR / "latent_uplift_groups_hidden.csv")
+
+    activity = merge_futures(activity_futures)
+    pool.shutdown()
+    s.rows_out = activity.rows
 
 log("✅ All files loaded successfully.")
 
@@ -42,42 +80,37 @@ log("\n## 2. Shape & Integrity Checks")
 
 log(f"* **Accounts:** {len(accounts)}")
 log(f"* **Users:** {len(users)}")
-log(f"* **Activity Rows:** {len(activity)}")
+log(f"* **Activity Rows:** {activity.rows}")
 log(f"* **Interventions:** {len(interventions)}")
 log(f"* **Outcomes:** {len(outcomes)}")
 
-assert users["user_id"].nunique() == len(users), "❌ Duplicate user_ids detected"
-log("* **Uniqueness:** User IDs are unique.")
-
 # -----------------------------
-# 3. Causal Logic Validation
+# 3. Raw Table Contracts (keys, ranges, causal ordering)
 # -----------------------------
-log("\n## 3. Causal Logic Validation")
-
-# A. Eligibility hard gate
-bad_treatment = interventions[
-    (interventions["eligibility_flag"] == 0) &
-    (interventions["treatment_flag"] == 1)
-]
-assert len(bad_treatment) == 0, "❌ Ineligible users were treated"
-log("✅ PASS: No ineligible users were treated.")
-
-# B. Activity strictly before intervention
-max_activity = activity.groupby("user_id")["activity_date"].max().reset_index()
-tmp = interventions.merge(max_activity, on="user_id", how="left")
-
-leakage = tmp[tmp["intervention_date"] <= tmp["activity_date"]]
-assert len(leakage) == 0, "❌ Activity after intervention detected"
-log("✅ PASS: All activity strictly precedes intervention.")
-
-# C. Intervention strictly before outcome
-tmp2 = interventions.merge(outcomes, on=["user_id", "intervention_id"])
-bad_outcomes = tmp2[
-    (tmp2["collab_activated_flag"] == 1) &
-    (tmp2["activation_date"] <= tmp2["intervention_date"])
-]
-assert len(bad_outcomes) == 0, "❌ Activation before intervention detected"
-log("✅ PASS: All activations strictly follow interventions.")
+log("\n## 3. Raw Table Contracts")
+
+# Per-user max activity date from the streamed aggregate (NaT = no activity)
+with step("validate.last_activity", rows_in=len(users)) as s:
+    user_keys = encode_key(users["user_id"], "user_id")
+    last_activity = pd.DataFrame({
+        "user_id": users["user_id"],
+        "activity_date": activity.max_activity_date(user_keys)
+    })
+    s.rows_out = len(last_activity)
+
+raw_results = enforce_tables(
+    {
+        "raw.accounts": accounts,
+        "raw.users": users,
+        "raw.latent": latent,
+        "raw.interventions": interventions,
+        "raw.outcomes": outcomes,
+    },
+    refs={"raw.activity": last_activity}
+)
+for name, results in raw_results.items():
+    log(f"\n**{name}**")
+    log_results(results)
 
 # -----------------------------
 # 4. Eligibility Sanity Checks (REALISTIC)
@@ -93,88 +126,50 @@ log(f"* **Total Users:** {total_users}")
 log(f"* **Eligible Users:** {elig_count}")
 log(f"* **Population Eligibility Rate:** {elig_rate:.2%}")
 
-assert elig_rate < 0.90, (
-    f"❌ Eligibility rate ({elig_rate:.2%}) too high. Gate is too open."
-)
-
 # Aggregate activity per user
-activity_agg = (
-    activity
-    .groupby("user_id")
-    .agg(
-        login_days=("login_flag", "sum"),
-        avg_diversity=("feature_diversity_count", "mean")
-    )
-    .reset_index()
-)
-
-elig_activity = users.merge(activity_agg, on="user_id", how="left").fillna(0)
-elig_activity["is_eligible"] = elig_activity["user_id"].isin(interventions["user_id"])
-
-# ---- Check 4A: Low-activity users mostly excluded (Lost Causes)
-low_activity_users = elig_activity[elig_activity["login_days"] < 3]
-low_activity_eligible_rate = low_activity_users["is_eligible"].mean()
-
-assert low_activity_eligible_rate < 0.20, (
-    "❌ Too many low-activity users are eligible. "
-    "Lost Causes are leaking into eligibility."
-)
-
-log("✅ PASS: Low-activity users are mostly excluded.")
-
-# ---- Check 4B: Eligibility concentrates in mid-activity band (Stuck Users)
-q25, q75 = elig_activity["login_days"].quantile([0.25, 0.75])
-mid_band = elig_activity[
-    (elig_activity["login_days"] >= q25) &
-    (elig_activity["login_days"] <= q75)
-]
-
-mid_band_eligible_rate = mid_band["is_eligible"].mean()
-
-assert mid_band_eligible_rate > 0.40, (
-    "❌ Eligibility is not focused on mid-activity users. "
-    "Gate is not targeting 'stuck but trying' users."
-)
-
-log("✅ PASS: Eligibility concentrates in mid-activity band.")
-
-# ---- Check 4C: High-diversity users mostly excluded (Sure Things)
-high_div_users = elig_activity[elig_activity["avg_diversity"] > 2]
-high_div_eligible_rate = high_div_users["is_eligible"].mean()
-
-assert high_div_eligible_rate < 0.30, (
-    "❌ Too many high-diversity users are eligible. "
-    "Explorers / collaborators should not be nudged."
-)
-
-log("✅ PASS: High-diversity users are mostly excluded.")
+with step("validate.eligibility_activity", rows_in=len(users)) as s:
+    elig_activity = users.assign(
+        login_days=activity.login_days(user_keys),
+        avg_diversity=activity.avg_diversity(user_keys)
+    ).fillna(0)
+    elig_activity["is_eligible"] = elig_activity["user_id"].isin(interventions["user_id"])
+    s.rows_out = len(elig_activity)
+
+# 4A low-activity users mostly excluded (Lost Causes), 4B eligibility
+# concentrates in the mid-activity band (Stuck Users), 4C high-diversity
+# users mostly excluded (Sure Things)
+log_results(enforce("audit.eligibility_activity", elig_activity))
 
 # -----------------------------
 # 5. Hidden Uplift Physics Check
 # -----------------------------
 log("\n## 5. Hidden Uplift Physics Check")
 
-master = (
-    interventions
-    .merge(outcomes, on=["user_id", "intervention_id"])
-    .merge(latent, on="user_id")
-)
+with step("validate.uplift_by_segment", rows_in=len(interventions)) as s:
+    master = (
+        interventions
+        .merge(outcomes, on=["user_id", "intervention_id"])
+        .merge(latent, on="user_id")
+    )
 
-uplift = (
-    master
-    .groupby(["latent_uplift_group", "treatment_flag"])
-    ["collab_activated_flag"]
-    .mean()
-    .unstack()
-)
+    uplift = (
+        master
+        .groupby(["latent_uplift_group", "treatment_flag"])
+        ["collab_activated_flag"]
+        .mean()
+        .unstack()
+    )
+    s.rows_out = len(uplift)
 
 uplift.columns = ["Control Rate", "Treatment Rate"]
 uplift["Observed Lift"] = uplift["Treatment Rate"] - uplift["Control Rate"]
 
 log("\n" + uplift.to_markdown(floatfmt=".3f"))
 
-assert uplift.loc["persuadable", "Observed Lift"] > 0.10, "❌ Persuadables not lifting"
-assert uplift.loc["sleeping_dog", "Observed Lift"] < -0.05, "❌ Sleeping Dogs not backfiring"
+enforce(
+    "audit.uplift_by_segment",
+    uplift["Observed Lift"].rename("observed_lift").rename_axis("latent_uplift_group").reset_index()
+)
 
 log("✅ PASS: Hidden uplift physics validated.")
 
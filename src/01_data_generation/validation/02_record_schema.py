@@ -2,16 +2,36 @@
 # Script: record_schema.py
 # Purpose: Generate technical documentation of the dataset
 # =========================================
+#
+# Types, null counts and min/max cover every row (see schema_scan.py):
+# Parquet files are read from metadata, CSVs are scanned in parallel byte
+# ranges while their rows are counted here.
 
-import pandas as pd
+import argparse
+import json
 import os
-import io
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # src/ (shared helpers)
+from common.pipeline import stage_workers
+from common.instrumentation import step
+from streaming_checks import CHUNK_ROWS
+from schema_scan import pq, count_rows, submit_csv_profile, merge_profiles, parquet_profile
+
+parser = argparse.ArgumentParser(description="Write the raw-data schema manifest.")
+parser.add_argument("--workers", type=int, default=stage_workers(),
+                    help="Processes scanning CSV columns (default: this stage's share of the cores).")
+parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="CSV rows per chunk.")
+args = parser.parse_args()
+
 RAW_DIR = Path("data/raw")
 RAW_DIR.mkdir(parents=True, exist_ok=True)
 
 OUTPUT_FILE = RAW_DIR/"validation/schema_manifest.txt"
+JSON_FILE = RAW_DIR/"validation/schema_manifest.json"
+OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
 files = [
     RAW_DIR/"accounts_raw.csv",
@@ -22,52 +42,82 @@ files = [
     RAW_DIR/"latent_uplift_groups_hidden.csv"
 ]
 
-with open(OUTPUT_FILE, "w") as f:
-    f.write("PROJECT SCHEMA MANIFEST\n")
-    f.write("=======================\n\n")
-
-    for file_path in files:
-        file_name = os.path.basename(file_path)
-        f.write(f"FILE: {file_name}\n")
-        f.write("-" * (len(file_name) + 6) + "\n")
-
-        try:
-            # Read only header and first few rows to infer types
-            df = pd.read_csv(file_path, nrows=100)
-
-            # Buffer to catch df.info() output
-            buf = io.StringIO()
-            df.info(buf=buf)
-
-            # Extract relevant lines from info()
-            lines = buf.getvalue().split("\n")
-
-            # Write row count estimation
-            # (We strictly count lines for speed/accuracy in doc)
-            with open(file_path, "rb") as raw_f:
-                row_count = sum(1 for _ in raw_f) - 1
+# -----------------------------
+# 1. Scan (Parquet metadata where available, else parallel CSV scan)
+# -----------------------------
+with step("record_schema.scan") as s:
+    results = {}
+    pending = {}
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for file_path in files:
+            parquet_path = file_path.with_suffix(".parquet")
+            try:
+                if pq is not None and parquet_path.exists():
+                    profile = parquet_profile(parquet_path)
+                    results[file_path] = (parquet_path.name, "parquet metadata", profile.rows, profile)
+                else:
+                    pending[file_path] = submit_csv_profile(pool, file_path, max(1, args.workers), args.chunk_rows)
+            except Exception as e:
+                results[file_path] = e
+
+        # Row counts run here while the workers scan columns
+        row_counts = {}
+        for file_path in pending:
+            try:
+                row_counts[file_path] = count_rows(file_path)
+            except Exception as e:
+                results[file_path] = e
+
+        for file_path, (names, futures) in pending.items():
+            try:
+                profile = merge_profiles(names, futures)
+                if file_path not in results:
+                    results[file_path] = (file_path.name, "full CSV scan", row_counts[file_path], profile)
+            except Exception as e:
+                results[file_path] = e
+    s.rows_out = sum(r[2] for r in results.values() if not isinstance(r, Exception))
+
+# -----------------------------
+# 2. Write Manifest
+# -----------------------------
+with step("record_schema.write", rows_in=s.rows_out):
+    manifest = {}
+    with open(OUTPUT_FILE, "w") as f:
+        f.write("PROJECT SCHEMA MANIFEST\n")
+        f.write("=======================\n\n")
+
+        for file_path in files:
+            file_name, result = os.path.basename(file_path), results.get(file_path)
+            if not isinstance(result, Exception):
+                file_name = result[0]
+            f.write(f"FILE: {file_name}\n")
+            f.write("-" * (len(file_name) + 6) + "\n")
+
+            if isinstance(result, FileNotFoundError):
+                f.write("ERROR: File not found.\n\n")
+                continue
+            if isinstance(result, Exception):
+                f.write(f"ERROR: {str(result)}\n\n")
+                continue
+
+            _, source, row_count, profile = result
             f.write(f"Rows: {row_count:,}\n")
+            f.write(f"Source: {source}\n")
             f.write("Columns:\n")
-
-            # Parse info output for cleaner look
-            # Usually strict tabular format is better for docs
-            col_info = df.dtypes.reset_index()
-            col_info.columns = ["Column Name", "Data Type"]
-
-            # Check for nulls in sample
-            nulls = df.isnull().sum()
-            col_info["Sample Nulls"] = nulls.values
-
-            # Format as string table
+            col_info = profile.to_frame()
             f.write(col_info.to_string(index=False))
             f.write("\n\n")
 
-        except FileNotFoundError:
-            f.write("ERROR: File not found.\n\n")
-        except Exception as e:
-            f.write(f"ERROR: {str(e)}\n\n")
+            manifest[file_name] = {
+                "source": source,
+                "rows": row_count,
+                "columns": col_info.to_dict(orient="records"),
+            }
+
+        f.write("=======================\n")
+        f.write("End of Manifest\n")
 
-    f.write("=======================\n")
-    f.write("End of Manifest\n")
+    with open(JSON_FILE, "w") as f:
+        json.dump(manifest, f, indent=2, default=str)
 
 print(f"Schema manifest generated at: {OUTPUT_FILE}")
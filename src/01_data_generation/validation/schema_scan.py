@@ -0,0 +1,163 @@
+# =========================================
+# Validation Library: Schema Scanning
+# Purpose: Row Counts, Exact Types, Null Counts & Min/Max per Raw File
+# =========================================
+#
+# Parquet files are described from their footer metadata alone (row count,
+# Arrow types, row-group statistics) when pyarrow is installed. CSVs get a
+# block-wise newline count for rows and a full-column scan for types, nulls
+# and min/max: the body is split into newline-aligned byte ranges (see
+# streaming_checks.py) that worker processes profile in chunks, and the
+# partial TableProfiles merge like ActivityAggregate does.
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from streaming_checks import CHUNK_ROWS, byte_ranges, read_range_chunks
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional; CSVs are always scanned
+    pq = None
+
+READ_BLOCK_BYTES = 16 * 1024 * 1024
+MIN_RANGE_BYTES = 32 * 1024 * 1024  # smaller files are scanned by one worker
+
+
+# -----------------------------
+# 1. Row Counts
+# -----------------------------
+def count_rows(path, block_bytes=READ_BLOCK_BYTES):
+    """Data rows in a CSV: newlines counted in large blocks, minus the header."""
+    lines = 0
+    last = b"\n"
+    with open(path, "rb", buffering=0) as f:
+        while block := f.read(block_bytes):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":  # final line without a trailing newline
+        lines += 1
+    return max(lines - 1, 0)
+
+
+# -----------------------------
+# 2. Mergeable Column Profiles
+# -----------------------------
+def _is_numeric(dtype):
+    try:
+        return np.dtype(dtype).kind in "biuf"
+    except TypeError:
+        return False
+
+
+def _merge_dtype(a, b):
+    """Type of the whole column given two chunks' types (as read_csv would infer)."""
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    if _is_numeric(a) and _is_numeric(b):
+        return str(np.result_type(a, b))
+    return "str"
+
+
+def _merge_extreme(a, b, pick):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if isinstance(a, str) != isinstance(b, str):  # numeric chunk inside a text column
+        a, b = str(a), str(b)
+    return pick(a, b)
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class TableProfile:
+    """Row count plus per-column type, null count and min / max."""
+
+    def __init__(self, columns=()):
+        self.rows = 0
+        self.columns = {name: {"dtype": None, "nulls": 0, "min": None, "max": None} for name in columns}
+
+    def update(self, chunk):
+        """Fold one chunk of rows in."""
+        self.rows += len(chunk)
+        nulls = chunk.isna().sum()
+        for name in chunk.columns:
+            col = self.columns.setdefault(name, {"dtype": None, "nulls": 0, "min": None, "max": None})
+            values = chunk[name]
+            col["dtype"] = _merge_dtype(col["dtype"], str(values.dtype))
+            col["nulls"] += int(nulls[name])
+            if nulls[name] < len(values):  # min / max skip nulls
+                col["min"] = _merge_extreme(col["min"], _scalar(values.min()), min)
+                col["max"] = _merge_extreme(col["max"], _scalar(values.max()), max)
+
+    def merge(self, other):
+        """Combine with another partial profile (any order)."""
+        self.rows += other.rows
+        for name, theirs in other.columns.items():
+            ours = self.columns.setdefault(name, {"dtype": None, "nulls": 0, "min": None, "max": None})
+            ours["dtype"] = _merge_dtype(ours["dtype"], theirs["dtype"])
+            ours["nulls"] += theirs["nulls"]
+            ours["min"] = _merge_extreme(ours["min"], theirs["min"], min)
+            ours["max"] = _merge_extreme(ours["max"], theirs["max"], max)
+        return self
+
+    def to_frame(self):
+        return pd.DataFrame(
+            [(name, c["dtype"], c["nulls"], c["min"], c["max"]) for name, c in self.columns.items()],
+            columns=["Column Name", "Data Type", "Nulls", "Min", "Max"]
+        )
+
+
+# -----------------------------
+# 3. CSV: Parallel Full-Column Scan
+# -----------------------------
+def profile_range(path, start, end, names, chunk_rows=CHUNK_ROWS):
+    """Profile one byte range of a CSV body."""
+    profile = TableProfile(names)
+    for chunk in read_range_chunks(path, start, end, names, chunk_rows):
+        profile.update(chunk)
+    return profile
+
+
+def submit_csv_profile(pool, path, max_parts, chunk_rows=CHUNK_ROWS):
+    """Queue one task per byte range (at most one per MIN_RANGE_BYTES); merge with merge_profiles()."""
+    n_parts = max(1, min(max_parts, Path(path).stat().st_size // MIN_RANGE_BYTES))
+    names, ranges = byte_ranges(path, n_parts)
+    return names, [pool.submit(profile_range, str(path), start, end, names, chunk_rows) for start, end in ranges]
+
+
+def merge_profiles(names, futures):
+    total = TableProfile(names)
+    for future in futures:
+        total.merge(future.result())
+    return total
+
+
+# -----------------------------
+# 4. Parquet: Footer Metadata Only
+# -----------------------------
+def parquet_profile(path):
+    """TableProfile from Parquet metadata; min / max stay None without statistics."""
+    meta = pq.ParquetFile(path).metadata
+    schema = meta.schema.to_arrow_schema()
+    profile = TableProfile()
+    profile.rows = meta.num_rows
+    for i, field in enumerate(schema):
+        col = {"dtype": str(field.type), "nulls": 0, "min": None, "max": None}
+        for rg in range(meta.num_row_groups):
+            stats = meta.row_group(rg).column(i).statistics
+            if stats is None or not stats.has_null_count:
+                col["nulls"] = None  # unknown without a full read
+            elif col["nulls"] is not None:
+                col["nulls"] += stats.null_count
+            if stats is not None and stats.has_min_max:
+                col["min"] = _merge_extreme(col["min"], _scalar(stats.min), min)
+                col["max"] = _merge_extreme(col["max"], _scalar(stats.max), max)
+        profile.columns[field.name] = col
+    return profile
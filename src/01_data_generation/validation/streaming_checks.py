@@ -0,0 +1,181 @@
+# =========================================
+# Validation Library: Streaming Activity Aggregates
+# Purpose: Chunked, Parallel, Mergeable Per-User Activity Stats
+# =========================================
+#
+# The activity log is the only raw table that grows with users x days, so
+# it is never loaded whole. The file is split into newline-aligned byte
+# ranges; each worker streams its range in chunks into an ActivityAggregate
+# (dense arrays indexed by integer user key), and partial aggregates merge
+# by elementwise max / sum. Memory is O(users + chunk), not O(rows).
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # src/ (shared helpers)
+from common.keys import encode_key
+
+ACTIVITY_COLS = ["user_id", "activity_date", "login_flag", "feature_diversity_count"]
+CHUNK_ROWS = 1_000_000
+NO_DATE = np.iinfo(np.int64).min  # == NaT as int64, so max() ignores it
+
+
+class ActivityAggregate:
+    """Per-user max activity date, login sum and diversity sum / count."""
+
+    def __init__(self, size=0):
+        self.rows = 0
+        self.unknown_rows = 0
+        self.max_date = np.full(size, NO_DATE, dtype=np.int64)  # ns since epoch
+        self.login_sum = np.zeros(size)
+        self.diversity_sum = np.zeros(size)
+        self.diversity_count = np.zeros(size, dtype=np.int64)
+
+    def _grow(self, size):
+        extra = size - len(self.max_date)
+        if extra <= 0:
+            return
+        self.max_date = np.concatenate([self.max_date, np.full(extra, NO_DATE, dtype=np.int64)])
+        self.login_sum = np.concatenate([self.login_sum, np.zeros(extra)])
+        self.diversity_sum = np.concatenate([self.diversity_sum, np.zeros(extra)])
+        self.diversity_count = np.concatenate([self.diversity_count, np.zeros(extra, dtype=np.int64)])
+
+    def update(self, chunk):
+        """Fold one chunk of activity rows in."""
+        self.rows += len(chunk)
+        # Rows arrive grouped by user: encode each distinct ID once
+        codes, uniques = pd.factorize(chunk["user_id"])
+        keys = encode_key(pd.Series(uniques), "user_id")[codes]
+        known = keys >= 0
+        self.unknown_rows += int((~known).sum())
+        if not known.any():
+            return
+        keys = keys[known]
+        size = int(keys.max()) + 1
+        self._grow(size)
+
+        dates = pd.to_datetime(chunk["activity_date"], format="%Y-%m-%d").to_numpy()[known]
+        np.maximum.at(self.max_date, keys, dates.view(np.int64))
+
+        login = chunk["login_flag"].to_numpy(dtype=np.float64)[known]
+        self.login_sum[:size] += np.bincount(keys, weights=np.nan_to_num(login), minlength=size)
+
+        diversity = chunk["feature_diversity_count"].to_numpy(dtype=np.float64)[known]
+        present = ~np.isnan(diversity)
+        self.diversity_sum[:size] += np.bincount(keys[present], weights=diversity[present], minlength=size)
+        self.diversity_count[:size] += np.bincount(keys[present], minlength=size)
+
+    def merge(self, other):
+        """Combine with another partial aggregate (any order)."""
+        self._grow(len(other.max_date))
+        n = len(other.max_date)
+        self.rows += other.rows
+        self.unknown_rows += other.unknown_rows
+        np.maximum(self.max_date[:n], other.max_date, out=self.max_date[:n])
+        self.login_sum[:n] += other.login_sum
+        self.diversity_sum[:n] += other.diversity_sum
+        self.diversity_count[:n] += other.diversity_count
+        return self
+
+    # -----------------------------
+    # Per-User Views (NaN / NaT where a user had no activity)
+    # -----------------------------
+    def _take(self, arr, keys, missing):
+        keys = np.asarray(keys)
+        inside = (keys >= 0) & (keys < len(arr))
+        out = np.full(len(keys), missing, dtype=arr.dtype)
+        out[inside] = arr[keys[inside]]
+        return out
+
+    def max_activity_date(self, keys):
+        return self._take(self.max_date, keys, NO_DATE).view("datetime64[ns]")
+
+    def login_days(self, keys):
+        has_rows = self._take(self.max_date, keys, NO_DATE) != NO_DATE
+        return np.where(has_rows, self._take(self.login_sum, keys, 0.0), np.nan)
+
+    def avg_diversity(self, keys):
+        count = self._take(self.diversity_count, keys, 0)
+        total = self._take(self.diversity_sum, keys, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+# -----------------------------
+# Chunked Reads over Byte Ranges
+# -----------------------------
+class _RangeReader:
+    """File-like view of bytes [start, end) of a file (for read_csv)."""
+
+    def __init__(self, path, start, end):
+        self._f = open(path, "rb")
+        self._f.seek(start)
+        self._left = end - start
+
+    def read(self, n=-1):
+        if self._left <= 0:
+            return b""
+        n = self._left if n is None or n < 0 else min(n, self._left)
+        data = self._f.read(n)
+        self._left -= len(data)
+        return data
+
+    def close(self):
+        self._f.close()
+
+
+def byte_ranges(path, n_parts):
+    """Split a CSV body into up to n_parts newline-aligned [start, end) ranges."""
+    size = Path(path).stat().st_size
+    with open(path, "rb") as f:
+        header = f.readline()
+        bounds = [len(header)]
+        for i in range(1, n_parts):
+            pos = max(len(header), size * i // n_parts)
+            f.seek(pos - 1)
+            f.readline()  # to the start of the next line
+            bounds.append(f.tell())
+    bounds.append(size)
+    bounds = sorted(set(bounds))
+    return header.decode("utf-8").strip().split(","), list(zip(bounds[:-1], bounds[1:]))
+
+
+def read_range_chunks(path, start, end, names, chunk_rows=CHUNK_ROWS, usecols=None):
+    """Yield DataFrame chunks parsed from bytes [start, end) of a CSV body."""
+    reader = _RangeReader(path, start, end)
+    try:
+        yield from pd.read_csv(reader, header=None, names=names, usecols=usecols, chunksize=chunk_rows)
+    finally:
+        reader.close()
+
+
+def aggregate_range(path, start, end, names, chunk_rows=CHUNK_ROWS):
+    """Stream one byte range of the activity log into an ActivityAggregate."""
+    agg = ActivityAggregate()
+    for chunk in read_range_chunks(path, start, end, names, chunk_rows, usecols=ACTIVITY_COLS):
+        agg.update(chunk)
+    return agg
+
+
+def submit_activity_aggregation(pool, path, n_parts, chunk_rows=CHUNK_ROWS):
+    """Queue one task per byte range; merge the futures with merge_futures()."""
+    names, ranges = byte_ranges(path, n_parts)
+    return [pool.submit(aggregate_range, str(path), start, end, names, chunk_rows) for start, end in ranges]
+
+
+def merge_futures(futures):
+    total = ActivityAggregate()
+    for future in futures:
+        total.merge(future.result())
+    return total
+
+
+def aggregate_activity(path, workers=None, chunk_rows=CHUNK_ROWS):
+    """Whole-file aggregate with `workers` processes (default: CPU count)."""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return merge_futures(submit_activity_aggregation(pool, path, workers, chunk_rows))
@@ -0,0 +1,124 @@
+# =========================================
+# Phase 5B Library: Feature Engineering (User Level)
+# Purpose: Modeling Base + Accounts -> Model-Ready Feature Table
+# =========================================
+
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.instrumentation import step
+from common.contracts import enforce
+
+LOG_COLS = [
+    "login_days_30d",
+    "login_days_l7",
+    "core_actions_30d",
+    "time_spent_30d",
+    "collab_actions_30d"
+]
+
+CAT_COLS = ["role_type", "plan_tier", "account_size_bucket"]
+
+# Control & target flags (kept intentionally; not model inputs)
+FLAG_COLS = ["treatment_flag", "collab_activated_flag", "outcome_observed_flag"]
+
+BASE_FEATURE_COLS = [
+    # Identifiers (REQUIRED)
+    "user_id",
+    "account_id",
+    "intervention_id",
+
+    # Raw numeric
+    "login_days_30d",
+    "login_days_l7",
+    "core_actions_30d",
+    "collab_actions_30d",
+    "time_spent_30d",
+    "feature_diversity_avg_30d",
+    "days_observed_30d",
+    "days_since_last_active",
+
+    # Derived
+    "momentum_ratio",
+    "collab_intensity_ratio",
+
+    # Log transforms
+    "log_login_days_30d",
+    "log_login_days_l7",
+    "log_core_actions_30d",
+    "log_time_spent_30d",
+    "log_collab_actions_30d",
+
+    # Control & target flags (kept intentionally)
+    *FLAG_COLS
+]
+
+
+def bucket_seats(x):
+    if x <= 10:
+        return "small"
+    elif x <= 50:
+        return "mid"
+    else:
+        return "large"
+
+
+def build_features(base, accounts):
+    """Modeling base (one row per intervention) + accounts -> feature table."""
+    # -----------------------------
+    # Controlled account join
+    # -----------------------------
+    accounts_small = accounts[["account_id", "seat_count"]]
+
+    with step("features.account_join", rows_in=len(base)) as s:
+        df = base.merge(accounts_small, on="account_id", how="left")
+        s.rows_out = len(df)
+
+    # -----------------------------
+    # Derive account_size_bucket
+    # -----------------------------
+    with step("features.size_buckets", rows_in=len(df)):
+        df["account_size_bucket"] = df["seat_count"].apply(bucket_seats)
+
+    # Drop raw seat count immediately
+    df = df.drop(columns=["seat_count"])
+
+    # -----------------------------
+    # Derived behavioral features
+    # -----------------------------
+    df["momentum_ratio"] = df["login_days_l7"] / (df["login_days_30d"] + 1)
+
+    # Explicit interaction capturing "over-collaboration risk"
+    df["collab_intensity_ratio"] = (
+        df["collab_actions_30d"] / (df["login_days_30d"] + 1)
+    )
+
+    # -----------------------------
+    # Log transforms for skewed counts
+    # -----------------------------
+    for c in LOG_COLS:
+        df[f"log_{c}"] = np.log1p(df[c])
+
+    # -----------------------------
+    # One-hot encode categoricals
+    # -----------------------------
+    with step("features.one_hot", rows_in=len(df)):
+        df = pd.get_dummies(
+            df,
+            columns=CAT_COLS,
+            drop_first=True
+        )
+
+    # -----------------------------
+    # Final feature table
+    # -----------------------------
+    feature_cols = BASE_FEATURE_COLS + [c for c in df.columns if c.startswith(
+        ("role_type_", "plan_tier_", "account_size_bucket_")
+    )]
+
+    features = df[feature_cols]
+    enforce("features", features)
+    return features
@@ -0,0 +1,111 @@
+# =========================================
+# Phase 6 Library: Binned Feature Cache
+# Purpose: Parse features_user_level.csv ONCE, share binned arrays via mmap
+# =========================================
+
+import json
+import sys
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.feature_matrix import FeatureMatrix, load_features
+from uplift_learners import bin_features, make_folds
+
+FEAT_DIR = Path("data/features")
+FEATURE_FILE = FEAT_DIR / "features_user_level.csv"
+CACHE_DIR = FEAT_DIR / "cache"
+
+# Feature matrix definition (shared with train_uplift_model.py)
+ID_COLS = ["user_id", "account_id", "intervention_id"]
+TARGET = "collab_activated_flag"
+TREATMENT = "treatment_flag"
+META_COLS = ["outcome_observed_flag"]
+
+CACHE_ARRAYS = ["X_binned", "y", "t", "fold_id", "row_order"]
+CACHE_SEED = 42
+
+
+def _source_signature(path):
+    stat = Path(path).stat()
+    return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def observed_inputs(features):
+    """
+    Users with an observed outcome as (frame, X, feature_cols). From a
+    FeatureMatrix, X is a zero-copy view of the mapping and the frame holds
+    only IDs, target and treatment; a DataFrame is filtered in memory.
+    """
+    if isinstance(features, FeatureMatrix):
+        rows = features.rows_where("outcome_observed_flag")
+        feature_cols = [c for c in features.columns if c not in [TARGET, TREATMENT] + META_COLS]
+        df = features.frame(ID_COLS + [TARGET, TREATMENT], rows=rows)
+        return df, features.block(feature_cols)[rows], feature_cols
+
+    df = features[features["outcome_observed_flag"] == 1].copy()
+    X = df.drop(columns=ID_COLS + [TARGET, TREATMENT] + META_COLS)
+    return df, X.to_numpy(dtype=np.float64), list(X.columns)
+
+
+def build_cache(feature_file=FEATURE_FILE, cache_dir=CACHE_DIR, n_folds=5):
+    """Read + bin the feature matrix and persist it as .npy arrays."""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # Published mmap matrix when fresh: X is a view of it, not a parsed copy
+    df, X, feature_cols = observed_inputs(load_features(feature_file))
+    y = df[TARGET].to_numpy(dtype=np.int8)
+    t = df[TREATMENT].to_numpy(dtype=np.int8)
+
+    X_binned, edges = bin_features(X)
+    arrays = {
+        "X_binned": X_binned,
+        "y": y,
+        "t": t,
+        "fold_id": make_folds(y, t, n_folds=n_folds),
+        # Fixed permutation: every subsample size is a prefix, so rungs nest
+        "row_order": np.random.default_rng(CACHE_SEED).permutation(len(y)),
+    }
+    for name, arr in arrays.items():
+        np.save(cache_dir / f"{name}.npy", arr)
+
+    manifest = {
+        "source": _source_signature(feature_file),
+        "n_folds": n_folds,
+        "n_rows": int(len(y)),
+        "feature_cols": feature_cols,
+        "bin_edges": [e.tolist() for e in edges],
+    }
+    with open(cache_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def cache_is_fresh(feature_file=FEATURE_FILE, cache_dir=CACHE_DIR, n_folds=5):
+    manifest_path = Path(cache_dir) / "manifest.json"
+    if not manifest_path.exists():
+        return False
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    return (
+        manifest["source"] == _source_signature(feature_file)
+        and manifest["n_folds"] == n_folds
+        and all((Path(cache_dir) / f"{name}.npy").exists() for name in CACHE_ARRAYS)
+    )
+
+
+def ensure_cache(feature_file=FEATURE_FILE, cache_dir=CACHE_DIR, n_folds=5):
+    """Rebuild the cache only when the feature file (or fold count) changed."""
+    if cache_is_fresh(feature_file, cache_dir, n_folds):
+        return False
+    build_cache(feature_file, cache_dir, n_folds)
+    return True
+
+
+def load_cache(cache_dir=CACHE_DIR):
+    """Attach to the cached arrays read-only (memory-mapped, zero copy)."""
+    return {
+        name: np.load(Path(cache_dir) / f"{name}.npy", mmap_mode="r")
+        for name in CACHE_ARRAYS
+    }
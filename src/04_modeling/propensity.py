@@ -0,0 +1,103 @@
+# =========================================
+# Phase 6 Library: Propensity Scoring & Pseudo-Outcomes
+# Purpose: Correct the designed confounding (activity / role / plan -> treatment)
+# =========================================
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import roc_auc_score
+
+# Propensities are clipped so no single user can dominate the IPW / AIPW sums.
+PROPENSITY_CLIP = (0.02, 0.98)
+
+
+# -----------------------------
+# Propensity Model (Out-of-Fold)
+# -----------------------------
+def make_propensity_model():
+    """Standardized logistic regression: smooth, fast, hard to overfit."""
+    return make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000))
+
+
+def _fit_score_propensity_fold(X, t, fold_id, k):
+    train_mask = fold_id != k
+    model = make_propensity_model()
+    model.fit(X[train_mask], t[train_mask])
+    test_idx = np.flatnonzero(~train_mask)
+    return test_idx, model.predict_proba(X[test_idx])[:, 1]
+
+
+def fit_propensity_oof(X, t, fold_id, n_jobs=-1, clip=PROPENSITY_CLIP):
+    """
+    Out-of-fold e(x) = P(treated | x), one model per fold trained in parallel.
+    Reuses the uplift fold assignment so nuisance and uplift models never
+    see the rows they score.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    t = np.asarray(t).astype(int)
+    n_folds = int(fold_id.max()) + 1
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_score_propensity_fold)(X, t, fold_id, k)
+        for k in range(n_folds)
+    )
+
+    e = np.empty(len(t), dtype=np.float64)
+    for test_idx, fold_e in results:
+        e[test_idx] = fold_e
+    return np.clip(e, *clip)
+
+
+# -----------------------------
+# Vectorized Estimators
+# -----------------------------
+def ipw_weights(t, e, stabilized=True):
+    """
+    Inverse-propensity weights 1/e (treated) and 1/(1-e) (control).
+    Stabilized weights are rescaled by the marginal arm share so they
+    average ~1 and keep the effective sample size readable.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    w = t / e + (1 - t) / (1 - e)
+    if stabilized:
+        p_treat = t.mean()
+        w *= t * p_treat + (1 - t) * (1 - p_treat)
+    return w
+
+
+def aipw_pseudo_outcome(y, t, e, mu1, mu0):
+    """
+    Doubly-robust (AIPW) pseudo-outcome. Unbiased for tau(x) if EITHER the
+    propensity e or the outcome models mu1 / mu0 are correct.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)
+    return (
+        mu1 - mu0
+        + t * (y - mu1) / e
+        - (1 - t) * (y - mu0) / (1 - e)
+    )
+
+
+# -----------------------------
+# Diagnostics
+# -----------------------------
+def propensity_diagnostics(t, e, clip=PROPENSITY_CLIP):
+    """Overlap / weight-health summary for the sanity report."""
+    t = np.asarray(t).astype(int)
+    w = ipw_weights(t, e, stabilized=False)
+
+    def ess(weights):
+        return weights.sum() ** 2 / (weights ** 2).sum()
+
+    return {
+        "auc": float(roc_auc_score(t, e)),
+        "e_min": float(e.min()),
+        "e_max": float(e.max()),
+        "share_clipped": float(np.mean((e <= clip[0]) | (e >= clip[1]))),
+        "ess_treated": float(ess(w[t == 1])),
+        "ess_control": float(ess(w[t == 0])),
+    }
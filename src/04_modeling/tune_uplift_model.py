@@ -0,0 +1,143 @@
+# =========================================
+# Phase 6B: T-Learner Hyperparameter Search
+# Purpose: Successive Halving on Out-of-Fold Qini (Cached Binned Data)
+# =========================================
+
+import argparse
+import json
+import time
+import itertools
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from joblib import Parallel, delayed
+
+from uplift_learners import DEFAULT_PARAMS, cross_fit_uplift
+from uplift_evaluation import evaluate_uplift
+from feature_cache import CACHE_DIR, ensure_cache, load_cache
+
+# -----------------------------
+# Search Space
+# -----------------------------
+SEARCH_SPACE = {
+    "max_depth": [3, 4, 5, 6, 8],
+    "min_samples_leaf": [50, 100, 150, 300, 600],
+    "calibration": ["isotonic", "sigmoid"],
+    "calibration_cv": [2, 3, 5],
+}
+
+RESULTS_DIR = Path("results")
+RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+
+parser = argparse.ArgumentParser(description="Tune the Calibrated T-Learner with successive halving.")
+parser.add_argument("--n-candidates", type=int, default=27, help="Configurations in the first rung.")
+parser.add_argument("--eta", type=int, default=3, help="Keep the top 1/eta each rung; data grows eta x.")
+parser.add_argument("--time-budget", type=float, default=600, help="Seconds before no new rung is started.")
+parser.add_argument("--n-folds", type=int, default=5, help="Cross-fitting folds used to score a trial.")
+parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel trials (-1 = all cores).")
+args = parser.parse_args()
+
+
+# -----------------------------
+# Trial
+# -----------------------------
+def run_trial(cache_dir, params, fraction):
+    """
+    Out-of-fold Qini of one configuration on the first `fraction` of the
+    fixed row permutation. Attaches to the memory-mapped cache, so no trial
+    ever touches features_user_level.csv.
+    """
+    cache = load_cache(cache_dir)
+    n_rows = max(1, int(len(cache["row_order"]) * fraction))
+    rows = np.sort(cache["row_order"][:n_rows])
+
+    # Leaf size is a data-size dependent setting: shrink it with the subsample
+    # so a configuration behaves the same on every rung.
+    trial_params = dict(params)
+    trial_params["min_samples_leaf"] = max(1, int(round(params["min_samples_leaf"] * fraction)))
+
+    y = np.asarray(cache["y"][rows])
+    t = np.asarray(cache["t"][rows])
+    oof_uplift, _ = cross_fit_uplift(
+        cache["X_binned"][rows], y, t, trial_params,
+        fold_id=np.asarray(cache["fold_id"][rows]), n_jobs=1
+    )
+    metrics = evaluate_uplift(oof_uplift, y, t)["metrics"]
+
+    return {
+        **params,
+        "fraction": fraction,
+        "n_rows": n_rows,
+        # Per-user Qini so scores compare across rungs of different size
+        "qini_per_user": metrics["qini_coefficient"] / n_rows,
+        "auuc": metrics["auuc"],
+        "uplift_at_k": metrics["uplift_at_k"],
+    }
+
+
+def sample_candidates(n_candidates, seed=42):
+    grid = [dict(zip(SEARCH_SPACE, combo)) for combo in itertools.product(*SEARCH_SPACE.values())]
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(grid), size=min(n_candidates, len(grid)), replace=False)
+    candidates = [grid[i] for i in picks]
+
+    # The production configuration always competes
+    if DEFAULT_PARAMS not in candidates:
+        candidates[-1] = dict(DEFAULT_PARAMS)
+    return candidates
+
+
+# -----------------------------
+# Successive Halving
+# -----------------------------
+print("Preparing binned feature cache...")
+rebuilt = ensure_cache(n_folds=args.n_folds)
+print(f"  - Cache {'rebuilt' if rebuilt else 'reused'}: {CACHE_DIR}")
+
+candidates = sample_candidates(args.n_candidates)
+n_rungs = int(np.ceil(np.log(len(candidates)) / np.log(args.eta))) + 1
+fraction = float(args.eta) ** -(n_rungs - 1)
+
+start = time.time()
+trials = []
+rung = 0
+
+while True:
+    print(f"\nRung {rung}: {len(candidates)} candidates on {fraction:.1%} of users...")
+    rung_results = Parallel(n_jobs=args.n_jobs)(
+        delayed(run_trial)(CACHE_DIR, params, fraction) for params in candidates
+    )
+    for res in rung_results:
+        res["rung"] = rung
+    trials.extend(rung_results)
+
+    ranked = sorted(rung_results, key=lambda r: r["qini_per_user"], reverse=True)
+    best = ranked[0]
+    print(f"  - Best Qini/user: {best['qini_per_user']:.5f} "
+          f"(depth={best['max_depth']}, leaf={best['min_samples_leaf']}, "
+          f"{best['calibration']}/cv{best['calibration_cv']})")
+
+    if len(candidates) == 1 or fraction >= 1.0:
+        break
+    if time.time() - start > args.time_budget:
+        print(f"⚠️ Time budget ({args.time_budget:.0f}s) reached. Stopping at rung {rung}.")
+        break
+
+    keep = max(1, len(candidates) // args.eta)
+    candidates = [{k: r[k] for k in SEARCH_SPACE} for r in ranked[:keep]]
+    fraction = min(1.0, fraction * args.eta)
+    rung += 1
+
+# -----------------------------
+# Save Results
+# -----------------------------
+best_params = {k: best[k] for k in SEARCH_SPACE}
+best_params = {k: (v.item() if hasattr(v, "item") else v) for k, v in best_params.items()}
+
+pd.DataFrame(trials).to_csv(RESULTS_DIR / "uplift_tuning_trials.csv", index=False)
+with open(RESULTS_DIR / "best_uplift_params.json", "w") as f:
+    json.dump(best_params, f, indent=2)
+
+print(f"\nSearch finished in {time.time() - start:.1f}s ({len(trials)} trials).")
+print(f"Best params: {best_params}")
+print(f"Saved: {RESULTS_DIR / 'best_uplift_params.json'}")
@@ -0,0 +1,172 @@
+# =========================================
+# Phase 6 Library: Uplift Evaluation Suite
+# Purpose: Qini / AUUC / Uplift@k / Decile Lift (One Sort, Cumulative Sums)
+# =========================================
+
+import numpy as np
+import pandas as pd
+
+EVAL_SEED = 42
+
+
+# -----------------------------
+# Core: One Sort, Cumulative Sums
+# -----------------------------
+def _sort_by_score(uplift, y, t):
+    """
+    The ONLY sort in the suite. Returns the score-descending arrays plus the
+    index of the last row of every tied-score block (curves are only
+    evaluated where the ranking can actually cut).
+    """
+    uplift = np.asarray(uplift, dtype=np.float64)
+    order = np.argsort(-uplift, kind="stable")
+
+    s_sorted = uplift[order]
+    y_sorted = np.asarray(y, dtype=np.float64)[order]
+    t_sorted = np.asarray(t, dtype=np.float64)[order]
+
+    ends = np.append(np.flatnonzero(np.diff(s_sorted) != 0), len(s_sorted) - 1)
+    return order, s_sorted, y_sorted, t_sorted, ends
+
+
+def _cumulatives(y_sorted, t_sorted, w_sorted):
+    """Running (weighted) treated/control counts and outcome sums."""
+    w_t = w_sorted * t_sorted
+    w_c = w_sorted - w_t
+    return {
+        "n": np.cumsum(w_sorted),
+        "n_t": np.cumsum(w_t),
+        "n_c": np.cumsum(w_c),
+        "y_t": np.cumsum(w_t * y_sorted),
+        "y_c": np.cumsum(w_c * y_sorted),
+    }
+
+
+def _safe_div(a, b):
+    return np.divide(a, b, out=np.zeros_like(a, dtype=np.float64), where=b > 0)
+
+
+def _area(y, x):
+    """Trapezoidal area under y(x)."""
+    return float(np.sum(np.diff(x) * (y[1:] + y[:-1]) / 2))
+
+
+def _curves(cum, ends):
+    """Qini and uplift curves at the tie-block ends, anchored at (0, 0)."""
+    n = cum["n"][ends]
+    n_t, n_c = cum["n_t"][ends], cum["n_c"][ends]
+    y_t, y_c = cum["y_t"][ends], cum["y_c"][ends]
+
+    # Qini: incremental conversions, control scaled to the treated count
+    qini = y_t - y_c * _safe_div(n_t, n_c)
+    # Uplift curve: rate difference x population targeted
+    gain = (_safe_div(y_t, n_t) - _safe_div(y_c, n_c)) * n
+
+    frac = n / n[-1]
+    return (
+        np.concatenate([[0.0], frac]),
+        np.concatenate([[0.0], qini]),
+        np.concatenate([[0.0], gain]),
+        n_t, n_c, y_t, y_c,
+    )
+
+
+def _metrics_from_cumulatives(cum, ends, k):
+    frac, qini, gain, n_t, n_c, y_t, y_c = _curves(cum, ends)
+    n_total = cum["n"][-1]
+
+    qini_area = _area(qini, frac)
+    qini_random = qini[-1] / 2
+    auuc = _area(gain, frac) / n_total
+    auuc_random = gain[-1] / n_total / 2
+
+    # Uplift@k: observed rate difference among the top-k fraction
+    k_idx = min(np.searchsorted(frac[1:], k), len(n_t) - 1)
+    uplift_k = _safe_div(y_t, n_t)[k_idx] - _safe_div(y_c, n_c)[k_idx]
+
+    return {
+        "qini_coefficient": float(qini_area - qini_random),
+        "auuc": float(auuc),
+        "auuc_random": float(auuc_random),
+        "uplift_at_k": float(uplift_k),
+        "ate": float(gain[-1] / n_total),
+    }
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+def qini_curve(uplift, y, t, weights=None):
+    """
+    Qini and uplift curves as a DataFrame (one row per distinct score cut).
+
+    weights (e.g. inverse-propensity weights) rescale every user's count
+    and outcome contribution.
+    """
+    order, _, y_s, t_s, ends = _sort_by_score(uplift, y, t)
+    w_s = np.ones_like(y_s) if weights is None else np.asarray(weights, dtype=np.float64)[order]
+    frac, qini, gain, *_ = _curves(_cumulatives(y_s, t_s, w_s), ends)
+    return pd.DataFrame({"fraction_targeted": frac, "qini": qini, "uplift_gain": gain})
+
+
+def decile_lift_table(uplift, y, t, n_bins=10, weights=None):
+    """Observed vs predicted uplift by score bin (bin 1 = highest scores)."""
+    return evaluate_uplift(uplift, y, t, weights=weights, n_bins=n_bins)["deciles"]
+
+
+def evaluate_uplift(uplift, y, t, weights=None, k=0.10, n_bins=10,
+                    n_boot=0, ci_level=0.90, random_state=EVAL_SEED):
+    """
+    Full ranking evaluation of uplift scores.
+
+    Sorts ONCE, then derives the Qini coefficient, AUUC, uplift@k and the
+    decile lift table from cumulative sums. With n_boot > 0, Poisson(1)
+    bootstrap weights are redrawn over the already-sorted arrays, so each
+    replicate costs only a few cumulative sums (no re-sort).
+
+    Returns {"metrics": dict, "ci": dict | None, "deciles": DataFrame}.
+    """
+    order, s_sorted, y_s, t_s, ends = _sort_by_score(uplift, y, t)
+    w_s = np.ones_like(y_s) if weights is None else np.asarray(weights, dtype=np.float64)[order]
+
+    cum = _cumulatives(y_s, t_s, w_s)
+    metrics = _metrics_from_cumulatives(cum, ends, k)
+
+    # Decile table from cumulative sums at the bin boundaries
+    n_rows = len(y_s)
+    bounds = np.round(np.linspace(0, n_rows, n_bins + 1)).astype(int)
+    cum_pred = np.concatenate([[0.0], np.cumsum(w_s * s_sorted)])
+
+    def per_bin(key):
+        c = np.concatenate([[0.0], cum[key]])
+        return np.diff(c[bounds])
+
+    n_bin, n_t_bin, n_c_bin = per_bin("n"), per_bin("n_t"), per_bin("n_c")
+    treated_rate = _safe_div(per_bin("y_t"), n_t_bin)
+    control_rate = _safe_div(per_bin("y_c"), n_c_bin)
+
+    deciles = pd.DataFrame({
+        "bin": np.arange(1, n_bins + 1),
+        "n_users": n_bin,
+        "n_treated": n_t_bin,
+        "n_control": n_c_bin,
+        "treated_rate": treated_rate,
+        "control_rate": control_rate,
+        "observed_uplift": treated_rate - control_rate,
+        "mean_pred_uplift": _safe_div(np.diff(cum_pred[bounds]), n_bin),
+    })
+
+    ci = None
+    if n_boot:
+        rng = np.random.default_rng(random_state)
+        draws = {key: np.empty(n_boot) for key in metrics}
+        for b in range(n_boot):
+            w_b = w_s * rng.poisson(1.0, size=n_rows)
+            m_b = _metrics_from_cumulatives(_cumulatives(y_s, t_s, w_b), ends, k)
+            for key, val in m_b.items():
+                draws[key][b] = val
+
+        tail = (1 - ci_level) / 2 * 100
+        ci = {key: tuple(np.percentile(vals, [tail, 100 - tail])) for key, vals in draws.items()}
+
+    return {"metrics": metrics, "ci": ci, "deciles": deciles}
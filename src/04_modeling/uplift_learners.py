@@ -0,0 +1,279 @@
+# =========================================
+# Phase 6 Library: T-Learner Building Blocks
+# Purpose: Shared fitting / scoring helpers for training & cross-fitting
+# =========================================
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.model_selection import StratifiedKFold
+
+# -----------------------------
+# Default Learner Settings
+# -----------------------------
+# Mirrors the hand-tuned configuration of the production T-Learner.
+DEFAULT_PARAMS = {
+    "max_depth": 4,
+    "min_samples_leaf": 150,
+    "calibration": "isotonic",
+    "calibration_cv": 3,
+}
+
+MAX_BINS = 255
+BIN_SAMPLE_SIZE = 200_000  # Rows used to place bin edges (keeps 10M-row binning cheap)
+BOOTSTRAP_SEED = 42
+
+
+# -----------------------------
+# Feature Binning
+# -----------------------------
+def bin_features(X, max_bins=MAX_BINS, sample_size=BIN_SAMPLE_SIZE, random_state=42):
+    """
+    Quantile-bin every column ONCE into uint8 codes.
+
+    Trees only ever split between distinct values, so columns with
+    <= max_bins distinct values are binned losslessly (midpoint edges).
+    The uint8 matrix is 8x smaller than float64 and is what gets shipped
+    to (and memory-mapped by) the parallel fold workers.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n_rows, n_cols = X.shape
+    rng = np.random.default_rng(random_state)
+
+    if n_rows > sample_size:
+        sample_idx = rng.choice(n_rows, size=sample_size, replace=False)
+    else:
+        sample_idx = slice(None)
+
+    codes = np.empty((n_rows, n_cols), dtype=np.uint8)
+    edges = []
+
+    for j in range(n_cols):
+        sample = X[sample_idx, j]
+        uniq = np.unique(sample)
+
+        if len(uniq) <= max_bins:
+            col_edges = (uniq[:-1] + uniq[1:]) / 2
+        else:
+            qs = np.linspace(0, 1, max_bins + 1)[1:-1]
+            col_edges = np.unique(np.quantile(sample, qs))
+
+        codes[:, j] = np.searchsorted(col_edges, X[:, j], side="right")
+        edges.append(col_edges)
+
+    return codes, edges
+
+
+# -----------------------------
+# T-Learner
+# -----------------------------
+def make_learner(params=None):
+    """Calibrated Decision Tree (one arm of the T-Learner)."""
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    base_dt = DecisionTreeClassifier(
+        max_depth=p["max_depth"],
+        min_samples_leaf=p["min_samples_leaf"],
+        random_state=42
+    )
+    return CalibratedClassifierCV(base_dt, method=p["calibration"], cv=p["calibration_cv"])
+
+
+def fit_t_learner(X, y, t, params=None, sample_weight=None):
+    """Fit the treatment and control arms. Returns (model_treat, model_ctrl)."""
+    y = np.asarray(y)
+    t = np.asarray(t)
+
+    treat_mask = t == 1
+    ctrl_mask = ~treat_mask
+
+    model_treat = make_learner(params)
+    model_ctrl = make_learner(params)
+
+    if sample_weight is None:
+        model_treat.fit(X[treat_mask], y[treat_mask])
+        model_ctrl.fit(X[ctrl_mask], y[ctrl_mask])
+    else:
+        sample_weight = np.asarray(sample_weight)
+        model_treat.fit(X[treat_mask], y[treat_mask], sample_weight=sample_weight[treat_mask])
+        model_ctrl.fit(X[ctrl_mask], y[ctrl_mask], sample_weight=sample_weight[ctrl_mask])
+
+    return model_treat, model_ctrl
+
+
+def predict_uplift(models, X):
+    """P(y | treated) - P(y | control) for every row of X."""
+    model_treat, model_ctrl = models
+    p_treat = model_treat.predict_proba(X)[:, 1]
+    p_ctrl = model_ctrl.predict_proba(X)[:, 1]
+    return p_treat - p_ctrl
+
+
+# -----------------------------
+# Cross-Fitting (Out-of-Fold Scores)
+# -----------------------------
+def make_folds(y, t, n_folds=5, random_state=42):
+    """
+    Stratified fold assignment on the (treatment, outcome) cell so every
+    fold keeps both arms and both labels. Returns an int8 fold id per row.
+    """
+    y = np.asarray(y).astype(int)
+    t = np.asarray(t).astype(int)
+    strata = t * 2 + y
+
+    fold_id = np.empty(len(y), dtype=np.int8)
+    skf = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    for k, (_, test_idx) in enumerate(skf.split(np.zeros(len(y)), strata)):
+        fold_id[test_idx] = k
+    return fold_id
+
+
+def _fit_score_fold(X, y, t, fold_id, k, params, sample_weight):
+    train_mask = fold_id != k
+    weights = None if sample_weight is None else sample_weight[train_mask]
+    model_treat, model_ctrl = fit_t_learner(
+        X[train_mask], y[train_mask], t[train_mask], params, sample_weight=weights
+    )
+    test_idx = np.flatnonzero(~train_mask)
+    X_test = X[test_idx]
+    return test_idx, model_treat.predict_proba(X_test)[:, 1], model_ctrl.predict_proba(X_test)[:, 1]
+
+
+def cross_fit_outcomes(X_binned, y, t, params=None, fold_id=None, n_folds=5, n_jobs=-1,
+                       sample_weight=None):
+    """
+    Out-of-fold outcome predictions of both T-Learner arms:
+    (mu1 = P(y | treated), mu0 = P(y | control), fold_id).
+
+    X_binned is the uint8 matrix from bin_features(); it is built once and
+    reused by every fold. joblib memory-maps it into the worker processes,
+    so parallel folds share one copy instead of pickling K copies.
+    """
+    y = np.asarray(y)
+    t = np.asarray(t)
+    if sample_weight is not None:
+        sample_weight = np.asarray(sample_weight, dtype=np.float64)
+    if fold_id is None:
+        fold_id = make_folds(y, t, n_folds=n_folds)
+    n_folds = int(fold_id.max()) + 1
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_score_fold)(X_binned, y, t, fold_id, k, params, sample_weight)
+        for k in range(n_folds)
+    )
+
+    mu1 = np.empty(len(y), dtype=np.float64)
+    mu0 = np.empty(len(y), dtype=np.float64)
+    for test_idx, fold_mu1, fold_mu0 in results:
+        mu1[test_idx] = fold_mu1
+        mu0[test_idx] = fold_mu0
+
+    return mu1, mu0, fold_id
+
+
+def cross_fit_uplift(X_binned, y, t, params=None, fold_id=None, n_folds=5, n_jobs=-1,
+                     sample_weight=None):
+    """
+    K-fold cross-fitted uplift: each user is scored by a T-Learner that
+    never saw them. Returns (oof_uplift, fold_id).
+    """
+    mu1, mu0, fold_id = cross_fit_outcomes(
+        X_binned, y, t, params, fold_id=fold_id, n_folds=n_folds, n_jobs=n_jobs,
+        sample_weight=sample_weight
+    )
+    return mu1 - mu0, fold_id
+
+
+# -----------------------------
+# DR-Learner (Doubly-Robust Pseudo-Outcome Regression)
+# -----------------------------
+def make_dr_regressor(params=None):
+    """Uncalibrated tree on the AIPW pseudo-outcome (its mean IS the uplift)."""
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    return DecisionTreeRegressor(
+        max_depth=p["max_depth"],
+        min_samples_leaf=p["min_samples_leaf"],
+        random_state=42
+    )
+
+
+def fit_dr_learner(X, pseudo_outcome, params=None):
+    model = make_dr_regressor(params)
+    model.fit(X, np.asarray(pseudo_outcome, dtype=np.float64))
+    return model
+
+
+def predict_dr(model, X):
+    """
+    DR-Learner uplift clipped to [-1, 1]: AIPW pseudo-outcomes are unbounded,
+    so a small leaf can average past what a difference of probabilities allows.
+    """
+    return np.clip(model.predict(X), -1.0, 1.0)
+
+
+def _fit_score_dr_fold(X, pseudo_outcome, fold_id, k, params):
+    train_mask = fold_id != k
+    model = fit_dr_learner(X[train_mask], pseudo_outcome[train_mask], params)
+    test_idx = np.flatnonzero(~train_mask)
+    return test_idx, predict_dr(model, X[test_idx])
+
+
+def cross_fit_dr_learner(X_binned, pseudo_outcome, fold_id, params=None, n_jobs=-1):
+    """Out-of-fold DR-Learner uplift on the shared binned matrix and folds."""
+    pseudo_outcome = np.asarray(pseudo_outcome, dtype=np.float64)
+    n_folds = int(fold_id.max()) + 1
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_score_dr_fold)(X_binned, pseudo_outcome, fold_id, k, params)
+        for k in range(n_folds)
+    )
+
+    oof_uplift = np.empty(len(pseudo_outcome), dtype=np.float64)
+    for test_idx, fold_uplift in results:
+        oof_uplift[test_idx] = fold_uplift
+    return oof_uplift
+
+
+# -----------------------------
+# Bootstrap Uncertainty (Poisson Weights)
+# -----------------------------
+def _fit_score_replicate(X, y, t, params, seed, base_weight):
+    # Poisson(1) counts approximate multinomial resampling without ever
+    # materializing a resampled matrix: rows with weight 0 are simply left
+    # out, the rest are re-weighted through sample_weight.
+    rng = np.random.default_rng(seed)
+    weights = rng.poisson(1.0, size=len(y)).astype(np.float64)
+    if base_weight is not None:
+        weights *= base_weight
+    keep = np.flatnonzero(weights > 0)
+
+    models = fit_t_learner(X[keep], y[keep], t[keep], params, sample_weight=weights[keep])
+    return predict_uplift(models, X).astype(np.float32)
+
+
+def bootstrap_uplift_intervals(X_binned, y, t, params=None, n_boot=50, ci_level=0.90,
+                               n_jobs=-1, random_state=BOOTSTRAP_SEED, sample_weight=None):
+    """
+    Per-user uplift confidence bounds from a Poisson-weighted bootstrap.
+
+    Each replicate refits the T-Learner with Poisson(1) sample weights and
+    rescores every user; replicates run across a joblib process pool that
+    shares the binned matrix. Returns (lower, upper) percentile bounds.
+    Replicate scores are held as float32 (n_boot x n_users).
+    sample_weight (e.g. IPW weights) multiplies the Poisson weights.
+    """
+    y = np.asarray(y)
+    t = np.asarray(t)
+    if sample_weight is not None:
+        sample_weight = np.asarray(sample_weight, dtype=np.float64)
+    seeds = np.random.SeedSequence(random_state).spawn(n_boot)
+
+    replicates = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_score_replicate)(X_binned, y, t, params, seed, sample_weight)
+        for seed in seeds
+    )
+    replicates = np.vstack(replicates)
+
+    tail = (1 - ci_level) / 2 * 100
+    lower, upper = np.percentile(replicates, [tail, 100 - tail], axis=0)
+    return lower, upper
@@ -0,0 +1,243 @@
+# =========================================
+# Phase 6 Library: Score Users with the Calibrated T-Learner
+# Purpose: Feature Table -> User Uplift Scores (+ Sanity Checks), In-Process
+# =========================================
+
+import sys
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.instrumentation import step
+from common.contracts import enforce
+from uplift_learners import (
+    DEFAULT_PARAMS, fit_t_learner, predict_uplift, make_folds,
+    bin_features, cross_fit_uplift, cross_fit_outcomes, bootstrap_uplift_intervals,
+    fit_dr_learner, predict_dr, cross_fit_dr_learner
+)
+from feature_cache import ID_COLS, TARGET, TREATMENT, observed_inputs
+from propensity import fit_propensity_oof, ipw_weights, aipw_pseudo_outcome, propensity_diagnostics
+from uplift_evaluation import evaluate_uplift
+
+# Folds used for out-of-fold nuisance models when cross_fit is not set
+NUISANCE_FOLDS = 5
+
+
+def output_columns(cross_fit=0, bootstrap=0, correction="none"):
+    """Columns of user_uplift_scores.csv for a given scoring configuration."""
+    cols = ["pred_uplift", "treatment_flag", "collab_activated_flag"]
+    if bootstrap:
+        cols[1:1] = ["pred_uplift_lower", "pred_uplift_upper"]
+    if correction != "none":
+        cols.append("propensity")
+    if cross_fit:
+        cols.append("cv_fold")
+    return ID_COLS + cols
+
+
+def score_users(features, params=None, cross_fit=0, bootstrap=0, ci_level=0.90,
+                correction="none", n_jobs=-1):
+    """
+    Train on users with an observed outcome and score them. `features` is
+    the feature DataFrame or the published FeatureMatrix (see load_features).
+
+    cross_fit=K scores every user out-of-fold; bootstrap=B adds per-user
+    bounds; correction is "none", "ipw" (weighted T-Learner) or "dr"
+    (AIPW DR-Learner). Returns (scored frame, IPW evaluation weights or None).
+    """
+    if bootstrap and correction == "dr":
+        raise ValueError("bootstrap is only available for the T-Learner (correction none/ipw).")
+    if bootstrap and cross_fit:
+        # Replicates refit on the full sample: their bounds describe the
+        # in-sample estimator, not out-of-fold scores
+        raise ValueError("bootstrap bounds are only available for in-sample scores (cross_fit=0).")
+
+    params = {**DEFAULT_PARAMS, **(params or {})}
+
+    # -----------------------------
+    # 6C. Feature Matrix
+    # -----------------------------
+    # float64 rows x features; a view of the published mmap matrix when given one
+    df, X, _ = observed_inputs(features)
+    y = df[TARGET]
+    t = df[TREATMENT]
+
+    # Binned once, shared by cross-fitting folds, nuisance models and bootstrap replicates
+    if cross_fit or bootstrap or correction != "none":
+        with step("model.bin_features", rows_in=len(X)):
+            X_binned, _ = bin_features(X)
+
+    # -----------------------------
+    # 6D-0. Propensity Stage (Confounding Correction)
+    # -----------------------------
+    # Treatment was assigned on activity, role and plan (Phase 4D), so raw
+    # treated-vs-control comparisons are biased. e(x) is fit out-of-fold and
+    # feeds both training (weights / DR targets) and evaluation (IPW metrics).
+    sample_weight = None
+    eval_weight = None
+
+    if correction != "none":
+        print("\nFitting Out-of-Fold Propensity Model...")
+
+        fold_id = make_folds(y.to_numpy(), t.to_numpy(), n_folds=cross_fit or NUISANCE_FOLDS)
+        with step("model.propensity_oof", rows_in=len(X)):
+            propensity = fit_propensity_oof(X, t.to_numpy(), fold_id, n_jobs=n_jobs)
+        df["propensity"] = propensity
+
+        eval_weight = ipw_weights(t.to_numpy(), propensity)
+        if correction == "ipw":
+            sample_weight = eval_weight
+
+        diag = propensity_diagnostics(t.to_numpy(), propensity)
+        print(f"  - Propensity AUC: {diag['auc']:.3f} (0.5 = no confounding signal)")
+        print(f"  - e(x) Range: {diag['e_min']:.3f} to {diag['e_max']:.3f} ({diag['share_clipped']:.1%} clipped)")
+        print(f"  - Effective Sample Size: {diag['ess_treated']:,.0f} treated / {diag['ess_control']:,.0f} control")
+
+    if correction == "dr":
+        # -----------------------------
+        # 6D/E (DR-Learner). Regress AIPW Pseudo-Outcomes
+        # -----------------------------
+        print("\nTraining Doubly-Robust DR-Learner...")
+
+        with step("model.outcome_nuisance", rows_in=len(X)):
+            mu1, mu0, _ = cross_fit_outcomes(
+                X_binned, y.to_numpy(), t.to_numpy(), params, fold_id=fold_id, n_jobs=n_jobs
+            )
+        pseudo_outcome = aipw_pseudo_outcome(y.to_numpy(), t.to_numpy(), propensity, mu1, mu0)
+        print(f"  - AIPW ATE: {pseudo_outcome.mean():.4f}")
+
+        with step("model.dr_learner", rows_in=len(X)):
+            if cross_fit:
+                df["pred_uplift"] = cross_fit_dr_learner(X_binned, pseudo_outcome, fold_id, params, n_jobs=n_jobs)
+                df["cv_fold"] = fold_id
+            else:
+                dr_model = fit_dr_learner(X_binned, pseudo_outcome, params)
+                df["pred_uplift"] = predict_dr(dr_model, X_binned)
+        if cross_fit:
+            print(f"  - {cross_fit} Fold DR Models Trained & Scored Out-of-Fold.")
+        else:
+            print("  - DR Model Trained.")
+
+    elif cross_fit:
+        # -----------------------------
+        # 6D/E (Cross-Fit). Honest Out-of-Fold Uplift
+        # -----------------------------
+        # Every user is scored by models trained on the other K-1 folds.
+        # Features are binned once and the same uint8 matrix is shared by all folds.
+        print(f"\nCross-fitting Calibrated Decision Tree T-Learner ({cross_fit} folds)...")
+
+        with step("model.cross_fit", rows_in=len(X)):
+            oof_uplift, fold_id = cross_fit_uplift(
+                X_binned, y.to_numpy(), t.to_numpy(), params,
+                fold_id=fold_id if correction != "none" else None,
+                n_folds=cross_fit, n_jobs=n_jobs, sample_weight=sample_weight
+            )
+
+        df["pred_uplift"] = oof_uplift
+        df["cv_fold"] = fold_id
+
+        print(f"  - {cross_fit} Fold Models Trained & Scored Out-of-Fold.")
+    else:
+        print("\nTraining Calibrated Decision Tree T-Learner...")
+
+        # With bootstrap bounds, fit on the same binned matrix as the replicates
+        # so the point estimate and its interval come from one model family.
+        X_fit = X_binned if bootstrap else X
+        with step("model.fit_t_learner", rows_in=len(X)):
+            models = fit_t_learner(X_fit, y, t, params, sample_weight=sample_weight)
+
+        print("  - Treatment Model Trained.")
+        print("  - Control Model Trained.")
+
+        # -----------------------------
+        # 6E. Estimate Uplift
+        # -----------------------------
+        print("\nPredicting Counterfactuals...")
+
+        with step("model.predict", rows_in=len(X)):
+            df["pred_uplift"] = predict_uplift(models, X_fit)
+
+    # -----------------------------
+    # 6E+. Uplift Uncertainty (Bootstrap)
+    # -----------------------------
+    # A user at -0.011 and a user at -0.3 are both "Sleeping Dogs" by point
+    # estimate; the bounds show which of those calls the data actually supports.
+    if bootstrap:
+        print(f"\nBootstrapping Uplift Intervals ({bootstrap} replicates, {ci_level:.0%} CI)...")
+
+        with step("model.bootstrap", rows_in=len(X)):
+            lower, upper = bootstrap_uplift_intervals(
+                X_binned, y.to_numpy(), t.to_numpy(), params,
+                n_boot=bootstrap, ci_level=ci_level, n_jobs=n_jobs,
+                sample_weight=sample_weight
+            )
+        df["pred_uplift_lower"] = lower
+        df["pred_uplift_upper"] = upper
+
+        width = df["pred_uplift_upper"] - df["pred_uplift_lower"]
+        confident_dogs = (df["pred_uplift_upper"] < 0).sum()
+        print(f"  - Median Interval Width: {width.median():.4f}")
+        print(f"  - Users Confidently Negative (upper bound < 0): {confident_dogs}")
+
+    enforce("scores", df)
+    return df, eval_weight
+
+
+def sanity_checks(df, latent=None, eval_weight=None):
+    """Print the 6F sanity checks for a scored frame; returns the evaluation dict."""
+    y = df[TARGET]
+    t = df[TREATMENT]
+
+    print("\n=== SANITY CHECKS ===")
+
+    # 1. Distribution
+    print("\n1. Uplift Distribution Stats:")
+    print(df["pred_uplift"].describe())
+
+    # 2. Treatment Neutrality
+    print("\n2. Mean Uplift by Actual Treatment:")
+    neutrality = df.groupby("treatment_flag")["pred_uplift"].mean()
+    print(neutrality)
+    diff = abs(neutrality[1] - neutrality[0])
+
+    if diff < 0.02:
+        print(f"✅ PASS: Bias ({diff:.4f}) is strictly controlled (< 0.02).")
+    elif diff < 0.04:
+        print(f"✅ PASS: Bias ({diff:.4f}) is acceptable given confounding.")
+    else:
+        print(f"⚠️ WARNING: Bias ({diff:.4f}) remains high.")
+
+    # 3. Directional Alignment
+    print("\n3. Directional Alignment with Hidden Truth:")
+    if latent is None:
+        print("(Hidden labels not found)")
+    else:
+        check_df = df.merge(latent, on="user_id", how="left")
+        alignment = check_df.groupby("latent_uplift_group")["pred_uplift"].mean()
+        print(alignment)
+
+        dog_lift = alignment.get("sleeping_dog", 0)
+        print(f"\n   -> Sleeping Dog Lift: {dog_lift:.4f}")
+
+        if dog_lift < -0.01:
+            print("✅ PASS: Sleeping Dogs have NEGATIVE lift.")
+        else:
+            print("❌ FAIL: Sleeping Dogs not detected (Signal lost in calibration).")
+
+    # 4. Ranking Quality (Qini / AUUC)
+    print("\n4. Ranking Quality on Observed Outcomes:")
+    with step("model.evaluate", rows_in=len(df)):
+        evaluation = evaluate_uplift(df["pred_uplift"], y, t, k=0.10, n_boot=200)
+    for name, value in evaluation["metrics"].items():
+        lo, hi = evaluation["ci"][name]
+        print(f"   {name:<18} {value: .4f}   (90% CI {lo: .4f} to {hi: .4f})")
+    print(evaluation["deciles"].round(4).to_string(index=False))
+
+    if eval_weight is not None:
+        print("\n   IPW-Weighted (Confounding-Corrected):")
+        ipw_evaluation = evaluate_uplift(df["pred_uplift"], y, t, weights=eval_weight, k=0.10, n_boot=200)
+        for name, value in ipw_evaluation["metrics"].items():
+            lo, hi = ipw_evaluation["ci"][name]
+            print(f"   {name:<18} {value: .4f}   (90% CI {lo: .4f} to {hi: .4f})")
+
+    return evaluation
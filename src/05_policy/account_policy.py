@@ -3,16 +3,23 @@
 # Purpose: Aggregate User Scores -> Account Decisions (With Admin Guardrails)
 # =========================================
 
-import pandas as pd
-import numpy as np
+import argparse
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.dimension_index import open_dimension_index
+from common.keys import read_encoded_csv, to_decoded_csv
+
 # -----------------------------
 # Configuration (The "Business Logic")
 # -----------------------------
-VALUE_PER_CONVERSION = 50.00  # $50 Value for a "Collab Activation"
-COST_PER_NUDGE = 1.00         # $1 Cost per email/in-app message
-SLEEPING_DOG_THRESHOLD = -0.01 # Uplift below this is "Toxic"
+# Thresholds live in policy_logic.py so batch, sweep and online paths agree.
+from policy_logic import (
+    VALUE_PER_CONVERSION, COST_PER_NUDGE, SLEEPING_DOG_THRESHOLD,
+    build_account_policy
+)
+from budget_optimizer import optimize_targets
 
 # -----------------------------
 # Setup
@@ -21,81 +28,78 @@ RESULTS_DIR = Path("results")
 RAW_DIR = Path("data/raw")
 RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
-print("Loading data...")
-# Load predictions
-df = pd.read_csv(RESULTS_DIR / "user_level_uplift_scores.csv")
+parser = argparse.ArgumentParser(description="Aggregate user uplift to account decisions.")
+parser.add_argument(
+    "--budget", type=float, default=None,
+    help="Nudge budget in $. When set, treatable accounts are chosen by the optimizer."
+)
+parser.add_argument(
+    "--channel-capacity", type=str, default=None, metavar="CH=N,...",
+    help="Max nudges per delivery channel, e.g. in_app=5000,email=2000 ('both' nudges count against both)."
+)
+parser.add_argument(
+    "--optimizer", choices=["greedy", "lp", "exact"], default="greedy",
+    help="greedy = value-density fast path; lp / exact = HiGHS (small books)."
+)
+args = parser.parse_args()
 
-# Load User Roles (Crucial for the Admin Guardrail)
-users = pd.read_csv(RAW_DIR / "users_raw.csv", usecols=["user_id", "role_type"])
+print("Loading data...")
+# Load predictions (user / account IDs as int32 keys until export)
+df = read_encoded_csv(RESULTS_DIR / "user_uplift_scores.csv")
 
-# Merge Roles onto Predictions
-df = df.merge(users, on="user_id", how="left")
+# Attach User Roles (Crucial for the Admin Guardrail)
+# Integer gather from the memory-mapped user dimension instead of re-parsing users_raw.csv
+df["role_type"] = open_dimension_index().lookup(df["user_id"], columns=("role_type",))["role_type"]
 
 # -----------------------------
-# 1. Account Aggregation
+# 1-2. Account Aggregation + Decision Logic (The Policy)
 # -----------------------------
 print("Aggregating to Account Level...")
 
-def get_account_stats(x):
-    n_users = len(x)
-    sum_uplift = x["pred_uplift"].sum()
-
-    # 1. General Toxicity: How many users are negative?
-    n_dogs = (x["pred_uplift"] < SLEEPING_DOG_THRESHOLD).sum()
-    dog_rate = n_dogs / n_users
-
-    # 2. SPECIFIC GUARDRAIL: Toxic Admin
-    # Is there ANY Admin who is a Sleeping Dog?
-    # Logic: Role is 'admin' AND Uplift is Negative
-    toxic_admin_mask = (x["role_type"] == "admin") & (x["pred_uplift"] < SLEEPING_DOG_THRESHOLD)
-    has_toxic_admin = toxic_admin_mask.any()
-
-    # Financial Calculation
-    expected_revenue = sum_uplift * VALUE_PER_CONVERSION
-    cost = n_users * COST_PER_NUDGE
-    net_value = expected_revenue - cost
-
-    return pd.Series({
-        "n_users": n_users,
-        "n_dogs": n_dogs,
-        "dog_rate": dog_rate,
-        "has_toxic_admin": has_toxic_admin,
-        "sum_uplift": sum_uplift,
-        "expected_revenue": expected_revenue,
-        "cost": cost,
-        "net_account_value": net_value
-    })
-
-# FIX: Added include_groups=False to silence FutureWarning
-accounts = df.groupby("account_id").apply(get_account_stats, include_groups=False).reset_index()
+# One named-aggregation groupby over precomputed dog / toxic-admin flags, then
+# guardrail priority: Toxic Admin > Toxic Users > Unprofitable > Too Small > Treat
+accounts = build_account_policy(
+    df,
+    value_per_conversion=VALUE_PER_CONVERSION,
+    cost_per_nudge=COST_PER_NUDGE,
+    sleeping_dog_threshold=SLEEPING_DOG_THRESHOLD
+)
 
 # -----------------------------
-# 2. Decision Logic (The Policy)
+# 2B. Budget Optimizer (Optional)
 # -----------------------------
-def make_decision(row):
-    # Guardrail 1: THE TOXIC ADMIN (Highest Priority)
-    # If the decision maker is a Sleeping Dog, DO NOT TOUCH the account.
-    if row["has_toxic_admin"]:
-        return "suppress_toxic_admin"
-
-    # Guardrail 2: General Toxicity
-    # If > 10% of users are haters, leave them alone.
-    if row["dog_rate"] > 0.10:
-        return "suppress_toxic_users"
-
-    # Guardrail 3: Profitability
-    # Don't spend money to lose money.
-    if row["net_account_value"] <= 0:
-        return "suppress_unprofitable"
-
-    # Guardrail 4: Small Account Noise
-    if row["n_users"] < 2:
-        return "suppress_too_small"
-
-    # If passed all gates -> TREAT
-    return "treat_account"
+# Guardrails decide who is SAFE to treat; the optimizer decides who we can
+# AFFORD to treat under a fixed budget and per-channel capacity.
+treatable = accounts[accounts["decision"] == "treat_account"]
 
-accounts["decision"] = accounts.apply(make_decision, axis=1)
+if args.budget is not None:
+    print(f"\nOptimizing Targets (budget=${args.budget:,.0f}, mode={args.optimizer})...")
+
+    channel_capacity = None
+    if args.channel_capacity:
+        channel_capacity = {
+            ch: float(n) for ch, n in (pair.split("=") for pair in args.channel_capacity.split(","))
+        }
+        # Account channel = the delivery channel most of its users were assigned
+        intv = read_encoded_csv(RAW_DIR / "interventions_raw.csv", usecols=["account_id", "delivery_channel"])
+        account_channel = (
+            intv.groupby(["account_id", "delivery_channel"]).size()
+            .reset_index(name="n")
+            .sort_values(["account_id", "n", "delivery_channel"], ascending=[True, False, True])
+            .drop_duplicates("account_id")
+            .set_index("account_id")["delivery_channel"]
+        )
+        treatable = treatable.assign(channel=treatable["account_id"].map(account_channel))
+
+    selected, summary = optimize_targets(
+        treatable, budget=args.budget, channel_capacity=channel_capacity, mode=args.optimizer
+    )
+    accounts["budget_selected"] = accounts["account_id"].isin(treatable.loc[selected, "account_id"])
+    treatable = treatable[selected]
+
+    print(f"  - Selected: {summary['n_selected']} accounts, spend ${summary['spend']:,.2f}")
+    print(f"  - Net Value: ${summary['net_value']:,.2f} "
+          f"(upper bound ${summary['upper_bound']:,.2f}, gap {summary['optimality_gap']:.2%})")
 
 # -----------------------------
 # 3. Impact Analysis
@@ -103,7 +107,6 @@ accounts["decision"] = accounts.apply(make_decision, axis=1)
 print("\n=== ACCOUNT DECISION SUMMARY ===")
 print(accounts["decision"].value_counts())
 
-treatable = accounts[accounts["decision"] == "treat_account"]
 toxic_admin_saves = accounts[accounts["decision"] == "suppress_toxic_admin"]
 
 print(f"\nTotal Accounts: {len(accounts)}")
@@ -116,8 +119,8 @@ print(f"Projected Net Value (Treatable): ${treatable['net_account_value'].sum():
 # -----------------------------
 # We save the LIST of accounts to target
 target_list = treatable[["account_id", "net_account_value", "n_users"]]
-target_list.to_csv(RESULTS_DIR / "final_target_accounts.csv", index=False)
+to_decoded_csv(target_list, RESULTS_DIR / "final_target_accounts.csv")
 print(f"\nTarget list saved to: {RESULTS_DIR / 'final_target_accounts.csv'}")
 
 # Save full debug log (useful for analyzing why accounts were suppressed)
-accounts.to_csv(RESULTS_DIR / "account_policy_debug.csv", index=False)
+to_decoded_csv(accounts, RESULTS_DIR / "account_policy_debug.csv")
@@ -0,0 +1,167 @@
+# =========================================
+# Phase 7 Library: Incremental Account State
+# Purpose: Per-Account Sufficient Statistics, Updated by User-Score Deltas
+# =========================================
+
+import json
+import numpy as np
+import pandas as pd
+
+from policy_logic import (
+    VALUE_PER_CONVERSION, COST_PER_NUDGE, SLEEPING_DOG_THRESHOLD,
+    MAX_DOG_RATE, MIN_ACCOUNT_USERS, make_decision
+)
+
+
+class AccountState:
+    """
+    Compact in-memory index of user scores keyed by account.
+
+    Users are rows of flat numpy arrays (account code, admin flag, current
+    uplift); accounts hold the sufficient statistics of the guardrails:
+    n_users, n_dogs, n_toxic_admins and sum_uplift. A score change only
+    touches the counters of the user's own account, so decisions stay
+    current without re-aggregating the book. `source` records the scores
+    file the state was built from (see incremental_policy.py).
+    """
+
+    def __init__(self, account_ids, user_ids, user_account, user_is_admin, user_uplift,
+                 sleeping_dog_threshold=SLEEPING_DOG_THRESHOLD):
+        self.threshold = sleeping_dog_threshold
+        self.source = None
+
+        # Integer ID keys (common/keys.py) or string IDs
+        self.account_ids = np.asarray(account_ids)
+        self.account_index = {acct: i for i, acct in enumerate(self.account_ids)}
+
+        self.user_ids = np.asarray(user_ids)
+        self.user_index = {user: i for i, user in enumerate(self.user_ids)}
+        # Owned, writable copies (score updates patch user_uplift in place)
+        self.user_account = np.array(user_account, dtype=np.int64)
+        self.user_is_admin = np.array(user_is_admin, dtype=bool)
+        self.user_uplift = np.array(user_uplift, dtype=np.float64)
+
+        n_accounts = len(self.account_ids)
+        is_dog = self.user_uplift < self.threshold
+        self.n_users = np.bincount(self.user_account, minlength=n_accounts)
+        self.n_dogs = np.bincount(self.user_account, weights=is_dog, minlength=n_accounts).astype(np.int64)
+        self.n_toxic_admins = np.bincount(
+            self.user_account, weights=is_dog & self.user_is_admin, minlength=n_accounts
+        ).astype(np.int64)
+        self.sum_uplift = np.bincount(self.user_account, weights=self.user_uplift, minlength=n_accounts)
+
+    # -----------------------------
+    # Construction / Persistence
+    # -----------------------------
+    @classmethod
+    def from_scores(cls, df, sleeping_dog_threshold=SLEEPING_DOG_THRESHOLD):
+        """Build from user scores with account_id, user_id, pred_uplift, role_type."""
+        codes, account_ids = pd.factorize(df["account_id"], sort=True)
+        return cls(
+            account_ids=account_ids,
+            user_ids=df["user_id"].to_numpy(),
+            user_account=codes,
+            user_is_admin=df["role_type"].to_numpy() == "admin",
+            user_uplift=df["pred_uplift"].to_numpy(),
+            sleeping_dog_threshold=sleeping_dog_threshold,
+        )
+
+    @staticmethod
+    def _savable(ids):
+        return ids.astype(str) if ids.dtype == object else ids
+
+    def save(self, path):
+        np.savez(
+            path,
+            account_ids=self._savable(self.account_ids),
+            user_ids=self._savable(self.user_ids),
+            user_account=self.user_account,
+            user_is_admin=self.user_is_admin,
+            user_uplift=self.user_uplift,
+            threshold=self.threshold,
+            source=json.dumps(self.source),
+        )
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        state = cls(
+            account_ids=data["account_ids"],
+            user_ids=data["user_ids"],
+            user_account=data["user_account"],
+            user_is_admin=data["user_is_admin"],
+            user_uplift=data["user_uplift"],
+            sleeping_dog_threshold=float(data["threshold"]),
+        )
+        state.source = json.loads(str(data["source"])) if "source" in data.files else None
+        return state
+
+    # -----------------------------
+    # Incremental Updates
+    # -----------------------------
+    def accounts_for_users(self, user_ids):
+        """Unique account codes of the (known) given users."""
+        rows = np.array([self.user_index.get(u, -1) for u in user_ids], dtype=np.int64)
+        return np.unique(self.user_account[rows[rows >= 0]])
+
+    def apply_updates(self, user_ids, new_uplift):
+        """
+        Replace the scores of the given users and patch their accounts'
+        counters in place. The last score wins for repeated users; unknown
+        users are skipped. Returns (affected account codes, n_unknown).
+        """
+        rows = np.array([self.user_index.get(u, -1) for u in user_ids], dtype=np.int64)
+        new_uplift = np.asarray(new_uplift, dtype=np.float64)
+
+        known = rows >= 0
+        n_unknown = int((~known).sum())
+        rows, new_uplift = rows[known], new_uplift[known]
+
+        # Last write wins
+        _, last = np.unique(rows[::-1], return_index=True)
+        keep = len(rows) - 1 - last
+        rows, new_uplift = rows[keep], new_uplift[keep]
+
+        accts = self.user_account[rows]
+        admin = self.user_is_admin[rows]
+        old_dog = self.user_uplift[rows] < self.threshold
+        new_dog = new_uplift < self.threshold
+
+        dog_delta = new_dog.astype(np.int64) - old_dog.astype(np.int64)
+        np.add.at(self.n_dogs, accts, dog_delta)
+        np.add.at(self.n_toxic_admins, accts, dog_delta * admin)
+        np.add.at(self.sum_uplift, accts, new_uplift - self.user_uplift[rows])
+        self.user_uplift[rows] = new_uplift
+
+        return np.unique(accts), n_unknown
+
+    # -----------------------------
+    # Decisions
+    # -----------------------------
+    def stats(self, codes=None, value_per_conversion=VALUE_PER_CONVERSION, cost_per_nudge=COST_PER_NUDGE):
+        """Account stats in the account_policy_debug.csv layout (all or selected accounts)."""
+        codes = slice(None) if codes is None else codes
+        n_users = self.n_users[codes]
+        sum_uplift = self.sum_uplift[codes]
+        expected_revenue = sum_uplift * value_per_conversion
+        cost = n_users * cost_per_nudge
+        return {
+            "account_id": self.account_ids[codes],
+            "n_users": n_users,
+            "n_dogs": self.n_dogs[codes],
+            "dog_rate": self.n_dogs[codes] / n_users,
+            "has_toxic_admin": self.n_toxic_admins[codes] > 0,
+            "sum_uplift": sum_uplift,
+            "expected_revenue": expected_revenue,
+            "cost": cost,
+            "net_account_value": expected_revenue - cost,
+        }
+
+    def decide(self, codes=None, max_dog_rate=MAX_DOG_RATE, min_account_users=MIN_ACCOUNT_USERS):
+        """Same guardrail cascade as the batch policy (make_decision)."""
+        return make_decision(self.stats(codes), max_dog_rate=max_dog_rate, min_account_users=min_account_users)
+
+    def to_frame(self):
+        accounts = pd.DataFrame(self.stats())
+        accounts["decision"] = self.decide()
+        return accounts
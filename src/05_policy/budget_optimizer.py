@@ -0,0 +1,200 @@
+# =========================================
+# Phase 7 Library: Budget-Constrained Account Selection
+# Purpose: Max Net Value s.t. Nudge Budget + Per-Channel Capacity
+# =========================================
+
+import numpy as np
+import pandas as pd
+
+# Exact MILP is only attempted below this many candidate accounts
+EXACT_MAX_ACCOUNTS = 5_000
+
+# Delivery channels that send on several others: their nudges count against
+# each part's capacity (and their own, when it is capped too)
+CHANNEL_PARTS = {"both": ("in_app", "email")}
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def _channel_load(nudges, channel, channel_capacity):
+    """
+    (n_accounts, n_capped) nudges each account puts on each capped channel,
+    plus those capacities. Missing or uncapped channels load nothing.
+    """
+    if channel is None or not channel_capacity:
+        return np.zeros((len(nudges), 0)), np.zeros(0)
+
+    channel = pd.Series(channel)
+    names = list(channel_capacity)
+    load = np.zeros((len(nudges), len(names)))
+    for k, name in enumerate(names):
+        senders = [name] + [ch for ch, parts in CHANNEL_PARTS.items() if name in parts]
+        load[:, k] = np.where(channel.isin(senders).to_numpy(), nudges, 0.0)
+    return load, np.array([float(channel_capacity[name]) for name in names])
+
+
+def dantzig_bound(value, cost, budget):
+    """
+    Fractional-knapsack (LP) upper bound on the budget constraint alone.
+    Dropping the channel constraints can only loosen it, so it stays a
+    valid bound for the full problem.
+    """
+    keep = (value > 0) & (cost > 0)
+    v, c = value[keep], cost[keep]
+    order = np.argsort(-(v / c), kind="stable")
+    v, c = v[order], c[order]
+
+    cum_cost = np.cumsum(c)
+    n_full = np.searchsorted(cum_cost, budget, side="right")
+    bound = v[:n_full].sum()
+    if n_full < len(v):
+        spent = cum_cost[n_full - 1] if n_full else 0.0
+        bound += v[n_full] * (budget - spent) / c[n_full]
+    return float(bound + value[(value > 0) & (cost <= 0)].sum())
+
+
+# -----------------------------
+# Fast Path: Greedy by Value Density
+# -----------------------------
+def greedy_select(value, cost, budget, nudges=None, channel=None, channel_capacity=None):
+    """
+    Greedy-with-skip by value density (value / cost), fully vectorized.
+
+    Each round accepts the longest prefix that fits the remaining budget and
+    every channel's remaining capacity, then drops the candidates that can no
+    longer fit. This is exactly the sequential "take it if it fits" greedy,
+    but costs a handful of cumsums instead of a Python loop over accounts.
+    """
+    value = np.asarray(value, dtype=np.float64)
+    cost = np.asarray(cost, dtype=np.float64)
+    nudges = np.ones(len(value)) if nudges is None else np.asarray(nudges, dtype=np.float64)
+    load, capacity = _channel_load(nudges, channel, channel_capacity)
+    return _greedy(value, cost, budget, load, capacity)
+
+
+def _greedy(value, cost, budget, load, capacity):
+    selected = np.zeros(len(value), dtype=bool)
+
+    # Free, positive-value accounts are always worth taking
+    density = np.divide(value, cost, out=np.full(len(value), np.inf), where=cost > 0)
+    cand = np.flatnonzero(value > 0)
+    cand = cand[np.argsort(-density[cand], kind="stable")]
+
+    rem_budget = float(budget)
+    rem_capacity = capacity.copy()
+
+    while cand.size:
+        fits = (cost[cand] <= rem_budget) & (load[cand] <= rem_capacity).all(axis=1)
+        cand = cand[fits]
+        if not cand.size:
+            break
+
+        ok = np.cumsum(cost[cand]) <= rem_budget
+        ok &= (np.cumsum(load[cand], axis=0) <= rem_capacity).all(axis=1)
+        n_ok = len(ok) if ok.all() else int(np.argmin(ok))
+
+        accepted = cand[:n_ok]
+        selected[accepted] = True
+        rem_budget -= cost[accepted].sum()
+        rem_capacity -= load[accepted].sum(axis=0)
+        cand = cand[n_ok:]
+
+    return selected
+
+
+# -----------------------------
+# Small Instances: LP Relaxation / Exact MILP
+# -----------------------------
+def _lp_matrices(cost, load, capacity, budget):
+    finite = np.isfinite(capacity)
+    return np.vstack([cost, load[:, finite].T]), np.concatenate([[budget], capacity[finite]])
+
+
+def lp_select(value, cost, budget, nudges=None, channel=None, channel_capacity=None, exact=False):
+    """
+    Solve the LP relaxation (exact=False) or the 0/1 MILP (exact=True) with
+    HiGHS. The LP solution is rounded down and topped up greedily. When
+    HiGHS returns no solution, falls back to the LP (from exact) or the greedy.
+    Returns (selected mask, upper bound on the optimum).
+    """
+    from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+
+    value = np.asarray(value, dtype=np.float64)
+    cost = np.asarray(cost, dtype=np.float64)
+    nudges = np.ones(len(value)) if nudges is None else np.asarray(nudges, dtype=np.float64)
+    load, capacity = _channel_load(nudges, channel, channel_capacity)
+
+    cand = np.flatnonzero(value > 0)
+    A, ub = _lp_matrices(cost[cand], load[cand], capacity, budget)
+    selected = np.zeros(len(value), dtype=bool)
+
+    if exact:
+        res = milp(
+            -value[cand],
+            constraints=LinearConstraint(A, -np.inf, ub),
+            integrality=np.ones(len(cand)),
+            bounds=Bounds(0, 1),
+        )
+        if res.x is None:  # no incumbent (solver failure / time limit)
+            print(f"⚠️ MILP returned no solution ({res.message}). Using LP relaxation.")
+            return lp_select(value, cost, budget, nudges, channel, channel_capacity, exact=False)
+        selected[cand[res.x > 0.5]] = True
+        return selected, float(-res.mip_dual_bound) if res.mip_dual_bound is not None else float(-res.fun)
+
+    res = linprog(-value[cand], A_ub=A, b_ub=ub, bounds=(0, 1), method="highs")
+    if not res.success:
+        print(f"⚠️ LP relaxation failed ({res.message}). Using greedy selection.")
+        return _greedy(value, cost, budget, load, capacity), dantzig_bound(value, cost, budget)
+    selected[cand[res.x > 1 - 1e-9]] = True
+
+    # Top up with the greedy on whatever budget / capacity rounding left over
+    rest = ~selected
+    extra = _greedy(
+        value[rest], cost[rest], budget - cost[selected].sum(),
+        load[rest], capacity - load[selected].sum(axis=0)
+    )
+    selected[np.flatnonzero(rest)[extra]] = True
+    return selected, float(-res.fun)
+
+
+# -----------------------------
+# Public Entry Point
+# -----------------------------
+def optimize_targets(accounts, budget, channel_capacity=None, mode="greedy",
+                     value_col="net_account_value", cost_col="cost",
+                     nudges_col="n_users", channel_col="channel"):
+    """
+    Pick the accounts that maximize expected net value under the nudge
+    budget (and optional per-channel nudge capacity).
+
+    mode: "greedy" (millions of accounts), "lp" (LP relaxation + rounding)
+    or "exact" (MILP, small instances only; falls back to "lp" above
+    EXACT_MAX_ACCOUNTS). Returns (selected mask, summary dict).
+    """
+    value = accounts[value_col].to_numpy(dtype=np.float64)
+    cost = accounts[cost_col].to_numpy(dtype=np.float64)
+    nudges = accounts[nudges_col].to_numpy(dtype=np.float64)
+    channel = accounts[channel_col].to_numpy() if channel_capacity and channel_col in accounts else None
+
+    if mode == "exact" and len(accounts) > EXACT_MAX_ACCOUNTS:
+        print(f"⚠️ {len(accounts):,} accounts is too large for exact mode. Using LP relaxation.")
+        mode = "lp"
+
+    if mode == "greedy":
+        selected = greedy_select(value, cost, budget, nudges, channel, channel_capacity)
+        bound = dantzig_bound(value, cost, budget)
+    else:
+        selected, bound = lp_select(value, cost, budget, nudges, channel, channel_capacity,
+                                    exact=(mode == "exact"))
+
+    achieved = float(value[selected].sum())
+    summary = {
+        "mode": mode,
+        "n_selected": int(selected.sum()),
+        "spend": float(cost[selected].sum()),
+        "net_value": achieved,
+        "upper_bound": bound,
+        "optimality_gap": max(0.0, (bound - achieved) / bound) if bound > 0 else 0.0,
+    }
+    return selected, summary
@@ -0,0 +1,264 @@
+# =========================================
+# Phase 7F: Multi-Campaign Account Policy
+# Purpose: Best Campaign / Channel per Account Under Per-Campaign Budgets + Frequency Cap
+# =========================================
+
+import argparse
+import json
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from policy_logic import MAX_DOG_RATE, MIN_ACCOUNT_USERS, aggregate_accounts
+from budget_optimizer import greedy_select
+
+# -----------------------------
+# Configuration (The "Business Logic")
+# -----------------------------
+# One row per concurrent campaign. uplift_multiplier scales the model's
+# (channel-agnostic) user uplift to the campaign's channel; budget is in $.
+DEFAULT_CAMPAIGNS = [
+    {"campaign": "collab_in_app", "channel": "in_app", "value_per_conversion": 50.0,
+     "cost_per_nudge": 0.50, "uplift_multiplier": 1.00, "budget": 2_000.0},
+    {"campaign": "collab_email", "channel": "email", "value_per_conversion": 50.0,
+     "cost_per_nudge": 1.00, "uplift_multiplier": 0.80, "budget": 1_500.0},
+    {"campaign": "collab_both", "channel": "both", "value_per_conversion": 50.0,
+     "cost_per_nudge": 1.50, "uplift_multiplier": 1.25, "budget": 1_000.0},
+]
+FREQUENCY_CAP = 1  # Max campaigns per account per planning period
+CHANNEL_BALANCE_TOL = 0.02  # Max gap between a channel's treated share and the pooled one
+
+
+# -----------------------------
+# 1. Value Matrix
+# -----------------------------
+def campaign_value_matrix(accounts, campaigns):
+    """
+    (n_accounts, n_campaigns) expected net value of running each campaign
+    on each account: sum_uplift * multiplier * value - n_users * cost.
+    """
+    sum_uplift = accounts["sum_uplift"].to_numpy(dtype=np.float64)[:, None]
+    n_users = accounts["n_users"].to_numpy(dtype=np.float64)[:, None]
+    gain = (campaigns["uplift_multiplier"] * campaigns["value_per_conversion"]).to_numpy(dtype=np.float64)
+    return sum_uplift * gain[None, :] - n_users * campaigns["cost_per_nudge"].to_numpy(dtype=np.float64)[None, :]
+
+
+def campaign_lift_matrix(accounts, campaigns):
+    """
+    (n_accounts, n_campaigns) per-user activation lift of each campaign on
+    each account: the account's mean uplift * multiplier, clipped to [0, 1].
+    """
+    mean_uplift = (accounts["sum_uplift"] / accounts["n_users"]).to_numpy(dtype=np.float64)[:, None]
+    return np.clip(mean_uplift * campaigns["uplift_multiplier"].to_numpy(dtype=np.float64)[None, :], 0.0, 1.0)
+
+
+def safe_accounts(accounts, max_dog_rate=MAX_DOG_RATE, min_account_users=MIN_ACCOUNT_USERS):
+    """Campaign-independent guardrails: toxic admin, toxic users, too small."""
+    return (
+        ~accounts["has_toxic_admin"].to_numpy(dtype=bool)
+        & (accounts["dog_rate"].to_numpy() <= max_dog_rate)
+        & (accounts["n_users"].to_numpy() >= min_account_users)
+    )
+
+
+# -----------------------------
+# 2. Assignment (Vectorized Argmax Rounds)
+# -----------------------------
+def assign_campaigns(value, n_users, campaigns, eligible, frequency_cap=FREQUENCY_CAP, lift=None):
+    """
+    Assign campaigns to accounts, maximizing net value under each campaign's
+    budget and at most `frequency_cap` campaigns per account.
+
+    A further campaign on an account only reaches the users earlier ones did
+    not convert: with per-user lifts p (campaign_lift_matrix), its gain is
+    scaled by prod(1 - p) over the campaigns already won, i.e. the account's
+    combined lift is 1 - prod(1 - p). `lift` is required when frequency_cap > 1.
+
+    Every round, each account with a free slot bids for its best remaining
+    campaign (one argmax over the value matrix). Each campaign then fills
+    its remaining budget from its bidders by value density (greedy_select).
+    A rejected bidder is closed off from that campaign and bids for its next
+    best one in the following round. Every bid closes an (account, campaign)
+    pair, so the loop ends after at most n_campaigns rounds.
+
+    Returns (boolean assignment matrix, net value each assignment adds), both
+    (n_accounts, n_campaigns).
+    """
+    if frequency_cap > 1 and lift is None:
+        raise ValueError("frequency_cap > 1 needs per-user campaign lifts to value repeat campaigns.")
+
+    n_accounts, n_campaigns = value.shape
+    cost_per_nudge = campaigns["cost_per_nudge"].to_numpy(dtype=np.float64)
+    remaining = campaigns["budget"].to_numpy(dtype=np.float64).copy()
+    n_users = np.asarray(n_users, dtype=np.float64)
+
+    cost = n_users[:, None] * cost_per_nudge[None, :]
+    gross = value + cost  # expected revenue of each campaign as the account's first
+    value = value.copy()
+    added = np.zeros_like(value)
+    reach = np.ones(n_accounts)  # share of each account's lift no campaign has taken yet
+
+    assigned = np.zeros((n_accounts, n_campaigns), dtype=bool)
+    # closed = ineligible, unprofitable, already assigned or lost the bid
+    closed = ~(eligible[:, None] & (value > 0))
+    slots = np.full(n_accounts, frequency_cap, dtype=np.int64)
+
+    # Accounts that can still bid (free slot + an open campaign); shrinks every round
+    active = np.flatnonzero(~closed.all(axis=1))
+
+    while active.size:
+        # Budgets only shrink, so an unaffordable campaign stays unaffordable
+        unaffordable = n_users[active, None] * cost_per_nudge[None, :] > remaining[None, :]
+        score = np.where(closed[active] | unaffordable | (value[active] <= 0), -np.inf, value[active])
+        best = np.argmax(score, axis=1)
+        can_bid = (slots[active] > 0) & np.isfinite(score[np.arange(len(active)), best])
+        active, best = active[can_bid], best[can_bid]
+        if not active.size:
+            break
+
+        # Group bidders by campaign with one stable sort
+        order = np.argsort(best, kind="stable")
+        bidders, bid_campaign = active[order], best[order]
+        starts = np.searchsorted(bid_campaign, np.arange(n_campaigns + 1))
+
+        for c in np.flatnonzero(np.diff(starts)):
+            acct = bidders[starts[c]:starts[c + 1]]
+            won = greedy_select(value[acct, c], cost[acct, c], remaining[c])
+            winners = acct[won]
+
+            assigned[winners, c] = True
+            added[winners, c] = value[winners, c]
+            slots[winners] -= 1
+            remaining[c] -= cost[winners, c].sum()
+            closed[acct, c] = True
+
+            # Later campaigns on the winners only add what this one left
+            if lift is not None:
+                reach[winners] *= 1.0 - lift[winners, c]
+                value[winners] = gross[winners] * reach[winners, None] - cost[winners]
+
+    return assigned, added
+
+
+def summarize_assignments(assigned, value, n_users, campaigns):
+    """Per-campaign accounts, spend, budget use and net value (value = what each assignment adds)."""
+    spend = assigned * (np.asarray(n_users, dtype=np.float64)[:, None] * campaigns["cost_per_nudge"].to_numpy()[None, :])
+    return pd.DataFrame({
+        "campaign": campaigns["campaign"].to_numpy(),
+        "channel": campaigns["channel"].to_numpy(),
+        "n_accounts": assigned.sum(axis=0),
+        "spend": spend.sum(axis=0),
+        "budget": campaigns["budget"].to_numpy(dtype=np.float64),
+        "net_value": np.where(assigned, value, 0.0).sum(axis=0),
+    })
+
+
+# -----------------------------
+# 3. Channel Lift (Optional, From Observed Outcomes)
+# -----------------------------
+def estimate_channel_multipliers(interventions, outcomes):
+    """
+    Observed treated-vs-control activation gap per delivery_channel, relative
+    to the pooled gap. The ratio only isolates the channel from the
+    (confounded) treatment choice when channels are spread evenly over
+    treated and control users, so that balance is checked first.
+    """
+    df = interventions.merge(
+        outcomes[["intervention_id", "collab_activated_flag"]], on="intervention_id", how="inner"
+    ).dropna(subset=["collab_activated_flag"])
+
+    treated_share = df.groupby("delivery_channel", observed=True)["treatment_flag"].mean()
+    gap = (treated_share - df["treatment_flag"].mean()).abs()
+    if (gap > CHANNEL_BALANCE_TOL).any():
+        raise ValueError(
+            f"Treatment share differs by channel (max gap {gap.max():.1%} > {CHANNEL_BALANCE_TOL:.0%}); "
+            "channel multipliers would be confounded."
+        )
+
+    rates = df.groupby(["delivery_channel", "treatment_flag"], observed=True)["collab_activated_flag"].mean().unstack()
+    pooled = df.groupby("treatment_flag")["collab_activated_flag"].mean()
+    return (rates[1] - rates[0]) / (pooled[1] - pooled[0])
+
+
+# -----------------------------
+# 4. CLI
+# -----------------------------
+def _budgets(text):
+    return {name: float(b) for name, b in (pair.split("=") for pair in text.split(","))}
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+    from common.dimension_index import open_dimension_index
+    from common.keys import read_encoded_csv, to_decoded_csv
+    from common.instrumentation import step
+
+    RESULTS_DIR = Path("results")
+    RAW_DIR = Path("data/raw")
+
+    parser = argparse.ArgumentParser(description="Assign the best campaign per account under per-campaign budgets.")
+    parser.add_argument("--campaigns", type=Path, default=None,
+                        help="JSON list of campaigns (fields as in DEFAULT_CAMPAIGNS).")
+    parser.add_argument("--budgets", type=_budgets, default=None, metavar="CAMPAIGN=$,...",
+                        help="Override campaign budgets, e.g. collab_email=500,collab_both=0.")
+    parser.add_argument("--frequency-cap", type=int, default=FREQUENCY_CAP,
+                        help="Max campaigns per account in this planning period.")
+    parser.add_argument("--estimate-channel-lift", action="store_true",
+                        help="Set uplift multipliers from observed per-channel activation gaps.")
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "campaign_assignments.csv")
+    args = parser.parse_args()
+
+    if args.campaigns is not None:
+        with open(args.campaigns) as f:
+            campaigns = pd.DataFrame(json.load(f))
+    else:
+        campaigns = pd.DataFrame(DEFAULT_CAMPAIGNS)
+    if args.budgets:
+        campaigns["budget"] = campaigns["campaign"].map(args.budgets).fillna(campaigns["budget"])
+
+    print("Loading data...")
+    df = read_encoded_csv(RESULTS_DIR / "user_uplift_scores.csv", usecols=["user_id", "account_id", "pred_uplift"])
+    df["role_type"] = open_dimension_index().lookup(df["user_id"], columns=("role_type",))["role_type"]
+    with step("campaigns.aggregate_accounts", rows_in=len(df)) as s:
+        accounts = aggregate_accounts(df)
+        s.rows_out = len(accounts)
+
+    if args.estimate_channel_lift:
+        lift = estimate_channel_multipliers(
+            read_encoded_csv(RAW_DIR / "interventions_raw.csv",
+                             usecols=["intervention_id", "treatment_flag", "delivery_channel"]),
+            read_encoded_csv(RAW_DIR / "outcomes_raw.csv", usecols=["intervention_id", "collab_activated_flag"]),
+        )
+        campaigns["uplift_multiplier"] = campaigns["channel"].map(lift).fillna(campaigns["uplift_multiplier"])
+        print("Estimated channel multipliers:")
+        print(lift.round(3).to_string())
+
+    print(f"Scoring {len(accounts):,} accounts x {len(campaigns)} campaigns...")
+    value = campaign_value_matrix(accounts, campaigns)
+    n_users = accounts["n_users"].to_numpy()
+    with step("campaigns.assign", rows_in=len(accounts)) as s:
+        assigned, value = assign_campaigns(value, n_users, campaigns, safe_accounts(accounts), args.frequency_cap,
+                                           lift=campaign_lift_matrix(accounts, campaigns))
+        s.rows_out = int(assigned.sum())
+
+    # -----------------------------
+    # Save Assignments
+    # -----------------------------
+    acct_idx, camp_idx = np.nonzero(assigned)
+    assignments = pd.DataFrame({
+        "account_id": accounts["account_id"].to_numpy()[acct_idx],
+        "campaign": campaigns["campaign"].to_numpy()[camp_idx],
+        "channel": campaigns["channel"].to_numpy()[camp_idx],
+        "n_users": n_users[acct_idx],
+        "cost": n_users[acct_idx] * campaigns["cost_per_nudge"].to_numpy()[camp_idx],
+        "net_value": value[acct_idx, camp_idx],
+    })
+    to_decoded_csv(assignments, args.output)
+
+    summary = summarize_assignments(assigned, value, n_users, campaigns)
+    print("\n=== CAMPAIGN ASSIGNMENT SUMMARY ===")
+    print(summary.round(2).to_string(index=False))
+    print(f"\nAccounts Nudged: {assigned.any(axis=1).sum():,} of {len(accounts):,}")
+    print(f"Projected Net Value: ${summary['net_value'].sum():,.2f}")
+    print(f"Assignments saved to: {args.output}")
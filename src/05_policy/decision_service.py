@@ -0,0 +1,202 @@
+# =========================================
+# Phase 7D: Online Account-Decision Service
+# Purpose: "Should we nudge account X right now?" in Milliseconds
+# =========================================
+#
+# Endpoints (local HTTP, stdlib asyncio only):
+#   GET  /decision?account_id=acct_00042  -> decision + guardrail stats
+#   POST /scores   [{"user_id": ..., "pred_uplift": ...}, ...]
+#                                          -> updates state, returns re-decided accounts
+#   GET  /metrics                          -> latency histograms (p50 / p90 / p99)
+#   GET  /health
+
+import argparse
+import asyncio
+import bisect
+import json
+import sys
+import time
+import numpy as np
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.dimension_index import open_dimension_index
+from common.keys import decode_key, encode_key, read_encoded_csv
+from account_state import AccountState
+
+# Latency histogram bucket upper bounds (microseconds), log-spaced
+LATENCY_BUCKETS_US = [25, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000, float("inf")]
+
+
+# -----------------------------
+# Latency Histogram
+# -----------------------------
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles reported as bucket upper bounds."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_US):
+        self.buckets = list(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0
+        self.sum_us = 0.0
+
+    def observe(self, elapsed_us):
+        self.counts[bisect.bisect_left(self.buckets, elapsed_us)] += 1
+        self.total += 1
+        self.sum_us += elapsed_us
+
+    def percentile(self, q):
+        if not self.total:
+            return None
+        target = q * self.total
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.total,
+            "mean_us": self.sum_us / self.total if self.total else None,
+            "p50_us": self.percentile(0.50),
+            "p90_us": self.percentile(0.90),
+            "p99_us": self.percentile(0.99),
+            "buckets_us": {
+                ("+inf" if np.isinf(b) else str(b)): c for b, c in zip(self.buckets, self.counts)
+            },
+        }
+
+
+# -----------------------------
+# Request Handling
+# -----------------------------
+def _jsonable(stats):
+    return {k: (v.item() if hasattr(v, "item") else v) for k, v in stats.items()}
+
+
+class DecisionService:
+    def __init__(self, state):
+        self.state = state
+        self.latency = {}
+
+    def account_decision(self, account_id):
+        # State is keyed by integer IDs (common/keys.py); the API speaks string IDs
+        code = self.state.account_index.get(encode_key([account_id], "account_id")[0])
+        if code is None:
+            return 404, {"error": f"unknown account_id {account_id}"}
+        stats = _jsonable(self.state.stats(code))
+        stats["account_id"] = account_id
+        stats["decision"] = str(self.state.decide(code))
+        return 200, stats
+
+    def update_scores(self, payload):
+        records = payload if isinstance(payload, list) else [payload]
+        user_ids = encode_key([r["user_id"] for r in records], "user_id")
+        uplift = [float(r["pred_uplift"]) for r in records]
+
+        affected, n_unknown = self.state.apply_updates(user_ids, uplift)
+        decisions = self.state.decide(affected)
+        return 200, {
+            "updated_users": len(records) - n_unknown,
+            "unknown_users": n_unknown,
+            "accounts": dict(zip(decode_key(self.state.account_ids[affected], "account_id").tolist(),
+                                 np.atleast_1d(decisions).tolist())),
+        }
+
+    def route(self, method, target, body):
+        url = urlsplit(target)
+        if method == "GET" and url.path == "/decision":
+            account_id = parse_qs(url.query).get("account_id", [None])[0]
+            if account_id is None:
+                return 400, {"error": "account_id query parameter is required"}
+            return self.account_decision(account_id)
+        if method == "POST" and url.path == "/scores":
+            return self.update_scores(json.loads(body or b"[]"))
+        if method == "GET" and url.path == "/metrics":
+            return 200, {path: hist.snapshot() for path, hist in self.latency.items()}
+        if method == "GET" and url.path == "/health":
+            return 200, {"status": "ok", "accounts": len(self.state.account_ids), "users": len(self.state.user_ids)}
+        return 404, {"error": f"no route for {method} {url.path}"}
+
+    def handle(self, method, target, body):
+        start = time.perf_counter()
+        try:
+            status, payload = self.route(method, target, body)
+        except (KeyError, ValueError, TypeError) as e:
+            status, payload = 400, {"error": str(e)}
+
+        path = urlsplit(target).path
+        if path != "/metrics":
+            elapsed_us = (time.perf_counter() - start) * 1e6
+            self.latency.setdefault(path, LatencyHistogram()).observe(elapsed_us)
+        return status, payload
+
+    # -----------------------------
+    # Minimal HTTP/1.1 (keep-alive) over asyncio streams
+    # -----------------------------
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = self.handle(method, target, body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(service, host, port):
+    server = await asyncio.start_server(service.serve_connection, host, port)
+    print(f"Decision service listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+# -----------------------------
+# Startup
+# -----------------------------
+if __name__ == "__main__":
+    RESULTS_DIR = Path("results")
+
+    parser = argparse.ArgumentParser(description="Serve account nudge decisions from in-memory state.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scores", type=Path, default=RESULTS_DIR / "user_uplift_scores.csv")
+    args = parser.parse_args()
+
+    print("Loading latest user scores and roles...")
+    scores = read_encoded_csv(args.scores, usecols=["user_id", "account_id", "pred_uplift"])
+    scores["role_type"] = open_dimension_index().lookup(scores["user_id"], columns=("role_type",))["role_type"]
+
+    state = AccountState.from_scores(scores)
+    print(f"  - Indexed {len(state.user_ids):,} users across {len(state.account_ids):,} accounts.")
+
+    asyncio.run(serve(DecisionService(state), args.host, args.port))
@@ -0,0 +1,121 @@
+# =========================================
+# Phase 7E: Incremental Account Policy
+# Purpose: Apply User-Score Deltas -> Re-Decide Only Affected Accounts
+# =========================================
+
+import argparse
+import pandas as pd
+import numpy as np
+import sys
+from pathlib import Path
+from datetime import datetime, timezone
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.dimension_index import open_dimension_index
+from common.contracts import enforce
+from common.keys import read_encoded_csv, to_decoded_csv
+from account_state import AccountState
+
+# -----------------------------
+# Setup
+# -----------------------------
+RESULTS_DIR = Path("results")
+SCORES_FILE = RESULTS_DIR / "user_uplift_scores.csv"
+STATE_FILE = RESULTS_DIR / "policy_state.npz"
+CHANGELOG_FILE = RESULTS_DIR / "policy_changelog.csv"
+
+
+def _source_signature(path):
+    stat = Path(path).stat()
+    return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+parser = argparse.ArgumentParser(description="Incrementally update account decisions from changed user scores.")
+parser.add_argument(
+    "--delta", type=Path, default=None,
+    help="CSV of changed scores (user_id, pred_uplift). Omit to (re)build the state only."
+)
+parser.add_argument(
+    "--rebuild", action="store_true",
+    help="Rebuild the account state from the full user_uplift_scores.csv first."
+)
+parser.add_argument(
+    "--write-snapshot", action="store_true",
+    help="Also rewrite account_policy_debug.csv / final_target_accounts.csv from the updated state."
+)
+args = parser.parse_args()
+
+# -----------------------------
+# 1. Load (or Build) Sufficient Statistics
+# -----------------------------
+# A saved state is only reused while the scores file it was built from is unchanged
+source = _source_signature(SCORES_FILE)
+state = None
+if not args.rebuild and STATE_FILE.exists():
+    state = AccountState.load(STATE_FILE)
+    if state.source == source:
+        print(f"Loaded account state from {STATE_FILE}.")
+    else:
+        print(f"{SCORES_FILE} changed since {STATE_FILE} was built; rebuilding.")
+        state = None
+
+if state is None:
+    print("Building account state from full scores...")
+    scores = read_encoded_csv(SCORES_FILE, usecols=["user_id", "account_id", "pred_uplift"])
+    scores["role_type"] = open_dimension_index().lookup(scores["user_id"], columns=("role_type",))["role_type"]
+    state = AccountState.from_scores(scores)
+    state.source = source
+
+print(f"  - {len(state.user_ids):,} users across {len(state.account_ids):,} accounts.")
+
+# -----------------------------
+# 2. Apply Delta & Re-Decide Affected Accounts
+# -----------------------------
+if args.delta is not None:
+    delta = read_encoded_csv(args.delta, usecols=["user_id", "pred_uplift"])
+    print(f"\nApplying {len(delta):,} changed user scores from {args.delta}...")
+
+    user_ids = delta["user_id"].to_numpy()
+    affected = state.accounts_for_users(user_ids)
+    old_decisions = np.atleast_1d(state.decide(affected))
+
+    _, n_unknown = state.apply_updates(user_ids, delta["pred_uplift"].to_numpy())
+    new_stats = state.stats(affected)
+    new_decisions = np.atleast_1d(state.decide(affected))
+
+    if n_unknown:
+        print(f"⚠️ {n_unknown} delta rows reference unknown users and were skipped.")
+
+    # -----------------------------
+    # 3. Changelog (Flipped Decisions Only)
+    # -----------------------------
+    flipped = old_decisions != new_decisions
+    changelog = pd.DataFrame({
+        "account_id": state.account_ids[affected][flipped],
+        "old_decision": old_decisions[flipped],
+        "new_decision": new_decisions[flipped],
+        "net_account_value": new_stats["net_account_value"][flipped],
+        "n_users": new_stats["n_users"][flipped],
+        "changed_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    })
+    to_decoded_csv(changelog, CHANGELOG_FILE, mode="a", header=not CHANGELOG_FILE.exists())
+
+    print(f"  - Accounts Re-Decided: {len(affected):,} of {len(state.account_ids):,}")
+    print(f"  - Decisions Flipped: {flipped.sum():,}")
+    if flipped.any():
+        print(changelog.groupby(["old_decision", "new_decision"]).size().to_string())
+    print(f"Changelog saved to: {CHANGELOG_FILE}")
+
+state.save(STATE_FILE)
+print(f"State saved to: {STATE_FILE}")
+
+# -----------------------------
+# 4. Optional Full Snapshot
+# -----------------------------
+if args.write_snapshot:
+    accounts = state.to_frame()
+    enforce("account_policy", accounts)
+    treatable = accounts[accounts["decision"] == "treat_account"]
+    to_decoded_csv(treatable[["account_id", "net_account_value", "n_users"]], RESULTS_DIR / "final_target_accounts.csv")
+    to_decoded_csv(accounts, RESULTS_DIR / "account_policy_debug.csv")
+    print(f"Snapshot written: {len(treatable):,} treatable accounts.")
@@ -0,0 +1,127 @@
+# =========================================
+# Phase 7 Library: Account Aggregation & Guardrail Cascade
+# Purpose: Vectorized User Scores -> Account Stats -> Decisions
+# =========================================
+
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.instrumentation import step
+from common.contracts import enforce
+
+# -----------------------------
+# Configuration (The "Business Logic")
+# -----------------------------
+VALUE_PER_CONVERSION = 50.00  # $50 Value for a "Collab Activation"
+COST_PER_NUDGE = 1.00         # $1 Cost per email/in-app message
+SLEEPING_DOG_THRESHOLD = -0.01 # Uplift below this is "Toxic"
+MAX_DOG_RATE = 0.10           # > 10% Sleeping Dogs -> account is toxic
+MIN_ACCOUNT_USERS = 2         # Smaller accounts are noise
+
+# Decisions in guardrail priority order (first matching rule wins)
+DECISIONS = [
+    "suppress_toxic_admin",
+    "suppress_toxic_users",
+    "suppress_unprofitable",
+    "suppress_too_small",
+    "treat_account",
+]
+
+ACCOUNT_COLS = [
+    "account_id", "n_users", "n_dogs", "dog_rate", "has_toxic_admin",
+    "sum_uplift", "expected_revenue", "cost", "net_account_value"
+]
+
+
+# -----------------------------
+# 1. Account Aggregation
+# -----------------------------
+def aggregate_accounts(df, value_per_conversion=VALUE_PER_CONVERSION,
+                       cost_per_nudge=COST_PER_NUDGE,
+                       sleeping_dog_threshold=SLEEPING_DOG_THRESHOLD):
+    """
+    User scores (account_id, pred_uplift, role_type) -> one row per account.
+
+    Flags are precomputed as boolean columns so the whole aggregation is a
+    single named-aggregation groupby (no per-account Python call).
+    """
+    is_dog = df["pred_uplift"].to_numpy() < sleeping_dog_threshold
+    flags = pd.DataFrame({
+        "account_id": df["account_id"].to_numpy(),
+        "pred_uplift": df["pred_uplift"].to_numpy(),
+        # 1. General Toxicity: How many users are negative?
+        "is_dog": is_dog,
+        # 2. SPECIFIC GUARDRAIL: Toxic Admin (Role is 'admin' AND Uplift is Negative)
+        "is_toxic_admin": is_dog & (df["role_type"].to_numpy() == "admin"),
+    })
+
+    accounts = (
+        flags
+        .groupby("account_id", sort=True)
+        .agg(
+            n_users=("pred_uplift", "size"),
+            n_dogs=("is_dog", "sum"),
+            has_toxic_admin=("is_toxic_admin", "any"),
+            sum_uplift=("pred_uplift", "sum"),
+        )
+        .reset_index()
+    )
+
+    accounts["dog_rate"] = accounts["n_dogs"] / accounts["n_users"]
+
+    # Financial Calculation
+    accounts["expected_revenue"] = accounts["sum_uplift"] * value_per_conversion
+    accounts["cost"] = accounts["n_users"] * cost_per_nudge
+    accounts["net_account_value"] = accounts["expected_revenue"] - accounts["cost"]
+
+    return accounts[ACCOUNT_COLS]
+
+
+# -----------------------------
+# 2. Decision Logic (The Policy)
+# -----------------------------
+def make_decision(stats, max_dog_rate=MAX_DOG_RATE, min_account_users=MIN_ACCOUNT_USERS):
+    """
+    Guardrail cascade as one np.select. `stats` is anything indexable by
+    column name: a DataFrame of accounts (returns an array of decisions) or
+    a dict of scalars for a single account (returns a 0-d array).
+    """
+    conditions = [
+        # Guardrail 1: THE TOXIC ADMIN (Highest Priority)
+        # If the decision maker is a Sleeping Dog, DO NOT TOUCH the account.
+        np.asarray(stats["has_toxic_admin"], dtype=bool),
+        # Guardrail 2: General Toxicity
+        # If > 10% of users are haters, leave them alone.
+        np.asarray(stats["dog_rate"]) > max_dog_rate,
+        # Guardrail 3: Profitability
+        # Don't spend money to lose money.
+        np.asarray(stats["net_account_value"]) <= 0,
+        # Guardrail 4: Small Account Noise
+        np.asarray(stats["n_users"]) < min_account_users,
+    ]
+    # If passed all gates -> TREAT
+    return np.select(conditions, DECISIONS[:-1], default=DECISIONS[-1])
+
+
+# -----------------------------
+# 3. Whole Stage (In-Process)
+# -----------------------------
+def build_account_policy(df, value_per_conversion=VALUE_PER_CONVERSION, cost_per_nudge=COST_PER_NUDGE,
+                         sleeping_dog_threshold=SLEEPING_DOG_THRESHOLD, max_dog_rate=MAX_DOG_RATE,
+                         min_account_users=MIN_ACCOUNT_USERS):
+    """User scores with role_type -> one row per account with its decision."""
+    with step("policy.aggregate_accounts", rows_in=len(df)) as s:
+        accounts = aggregate_accounts(
+            df,
+            value_per_conversion=value_per_conversion,
+            cost_per_nudge=cost_per_nudge,
+            sleeping_dog_threshold=sleeping_dog_threshold
+        )
+        s.rows_out = len(accounts)
+    with step("policy.decisions", rows_in=len(accounts)):
+        accounts["decision"] = make_decision(accounts, max_dog_rate=max_dog_rate, min_account_users=min_account_users)
+    enforce("account_policy", accounts)
+    return accounts
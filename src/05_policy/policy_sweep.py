@@ -0,0 +1,187 @@
+# =========================================
+# Phase 7C: Policy What-If Sweep Engine
+# Purpose: Decision Counts & Net Value for a Whole Grid of Business Scenarios
+# =========================================
+
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from policy_logic import (
+    VALUE_PER_CONVERSION, COST_PER_NUDGE, SLEEPING_DOG_THRESHOLD,
+    MAX_DOG_RATE, MIN_ACCOUNT_USERS, DECISIONS
+)
+
+
+# -----------------------------
+# 1. Precompute (Once per Score File)
+# -----------------------------
+def precompute_sweep_state(df):
+    """
+    Per-account sufficient statistics for any (value, cost, threshold,
+    dog-rate) scenario:
+
+    - users sorted by (account, uplift) with exact int64 keys
+      account_code * n_users + global_rank, so "how many users of each
+      account are below tau" is ONE searchsorted for all accounts
+    - n_users, sum_uplift and the lowest admin uplift per account
+    """
+    uplift = df["pred_uplift"].to_numpy(dtype=np.float64)
+    codes, account_ids = pd.factorize(df["account_id"], sort=True)
+    n_total = len(uplift)
+    n_accounts = len(account_ids)
+
+    global_order = np.argsort(uplift, kind="stable")
+    global_rank = np.empty(n_total, dtype=np.int64)
+    global_rank[global_order] = np.arange(n_total)
+
+    keys = np.sort(codes.astype(np.int64) * n_total + global_rank)
+
+    n_users = np.bincount(codes, minlength=n_accounts)
+    is_admin = df["role_type"].to_numpy() == "admin"
+    min_admin_uplift = np.full(n_accounts, np.inf)
+    np.minimum.at(min_admin_uplift, codes[is_admin], uplift[is_admin])
+
+    return {
+        "account_ids": np.asarray(account_ids),
+        "sorted_uplift": uplift[global_order],
+        "keys": keys,
+        "offsets": np.concatenate([[0], np.cumsum(n_users)[:-1]]),
+        "n_users": n_users,
+        "sum_uplift": np.bincount(codes, weights=uplift, minlength=n_accounts),
+        "min_admin_uplift": min_admin_uplift,
+    }
+
+
+def dogs_per_account(state, thresholds):
+    """(n_thresholds, n_accounts) count of users with uplift < threshold."""
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+    n_total = len(state["sorted_uplift"])
+    n_accounts = len(state["n_users"])
+
+    # Global rank cut: users with rank < r are exactly those with uplift < tau
+    rank_cut = np.searchsorted(state["sorted_uplift"], thresholds, side="left")
+    queries = np.arange(n_accounts, dtype=np.int64)[None, :] * n_total + rank_cut[:, None]
+    return np.searchsorted(state["keys"], queries, side="left") - state["offsets"][None, :]
+
+
+# -----------------------------
+# 2. Sweep (Vectorized over the Grid)
+# -----------------------------
+def sweep_policy(state, values, costs, thresholds, dog_rates, min_account_users=MIN_ACCOUNT_USERS):
+    """
+    Evaluate every (value, cost, threshold, dog-rate cutoff) scenario.
+
+    Toxicity guardrails depend only on (threshold, cutoff). For V > 0,
+    profitability (S*V - n*C > 0) depends only on mean uplift vs C/V, so the
+    accounts that survive the toxicity gates are sorted by mean uplift once
+    and every (V, C) pair is read off prefix / suffix sums.
+    Returns one row per scenario with decision counts and projected net value.
+    """
+    n_users = state["n_users"]
+    sum_uplift = state["sum_uplift"]
+    mean_uplift = sum_uplift / n_users
+    big_enough = n_users >= min_account_users
+
+    vc_pairs = list(itertools.product(values, costs))
+    ratio = np.array([c / v for v, c in vc_pairs])
+
+    n_dogs = dogs_per_account(state, thresholds)
+    rows = []
+
+    for i, tau in enumerate(thresholds):
+        toxic_admin = state["min_admin_uplift"] < tau
+        dog_rate = n_dogs[i] / n_users
+
+        for cutoff in dog_rates:
+            toxic_users = ~toxic_admin & (dog_rate > cutoff)
+            survivors = ~toxic_admin & ~toxic_users
+
+            m = mean_uplift[survivors]
+            order = np.argsort(m, kind="stable")
+            m_sorted = m[order]
+            big = big_enough[survivors][order]
+
+            # Suffix sums over "big" accounts: candidates that would be treated
+            def suffix(x):
+                return np.concatenate([np.cumsum(x[::-1])[::-1], [0]])
+
+            big_count = suffix(big.astype(np.int64))
+            big_uplift = suffix(np.where(big, sum_uplift[survivors][order], 0.0))
+            big_users = suffix(np.where(big, n_users[survivors][order], 0))
+
+            # Accounts with mean uplift <= C/V are unprofitable
+            cut = np.searchsorted(m_sorted, ratio, side="right")
+            n_unprofitable = cut
+            n_treat = big_count[cut]
+            n_too_small = len(m_sorted) - cut - n_treat
+
+            for j, (v, c) in enumerate(vc_pairs):
+                rows.append({
+                    "value_per_conversion": v,
+                    "cost_per_nudge": c,
+                    "sleeping_dog_threshold": tau,
+                    "max_dog_rate": cutoff,
+                    "suppress_toxic_admin": int(toxic_admin.sum()),
+                    "suppress_toxic_users": int(toxic_users.sum()),
+                    "suppress_unprofitable": int(n_unprofitable[j]),
+                    "suppress_too_small": int(n_too_small[j]),
+                    "treat_account": int(n_treat[j]),
+                    "projected_net_value": float(big_uplift[cut[j]] * v - big_users[cut[j]] * c),
+                })
+
+    return pd.DataFrame(rows)[
+        ["value_per_conversion", "cost_per_nudge", "sleeping_dog_threshold", "max_dog_rate"]
+        + DECISIONS + ["projected_net_value"]
+    ]
+
+
+# -----------------------------
+# 3. CLI
+# -----------------------------
+def _floats(text):
+    return [float(x) for x in text.split(",")]
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+    from common.dimension_index import open_dimension_index
+    from common.keys import read_encoded_csv, to_decoded_csv
+    from common.instrumentation import step
+
+    RESULTS_DIR = Path("results")
+
+    parser = argparse.ArgumentParser(description="What-if sweep over the account policy constants.")
+    parser.add_argument("--values", type=_floats, default=[25.0, VALUE_PER_CONVERSION, 75.0, 100.0])
+    parser.add_argument("--costs", type=_floats, default=[0.5, COST_PER_NUDGE, 2.0, 5.0])
+    parser.add_argument("--thresholds", type=_floats, default=[-0.05, -0.02, SLEEPING_DOG_THRESHOLD, 0.0])
+    parser.add_argument("--dog-rates", type=_floats, default=[0.05, MAX_DOG_RATE, 0.20, 0.30])
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "policy_sweep.csv")
+    args = parser.parse_args()
+
+    if min(args.values) <= 0:
+        parser.error("--values must be positive (profitability is evaluated as mean uplift > cost / value).")
+
+    print("Loading data...")
+    df = read_encoded_csv(RESULTS_DIR / "user_uplift_scores.csv", usecols=["user_id", "account_id", "pred_uplift"])
+    df["role_type"] = open_dimension_index().lookup(df["user_id"], columns=("role_type",))["role_type"]
+
+    print("Precomputing account state...")
+    with step("sweep.precompute", rows_in=len(df)) as s:
+        state = precompute_sweep_state(df)
+        s.rows_out = len(state["n_users"])
+
+    n_scenarios = len(args.values) * len(args.costs) * len(args.thresholds) * len(args.dog_rates)
+    print(f"Sweeping {n_scenarios} scenarios over {len(state['n_users']):,} accounts...")
+    with step("sweep.grid", rows_in=len(state["n_users"])) as s:
+        sweep = sweep_policy(state, args.values, args.costs, args.thresholds, args.dog_rates)
+        s.rows_out = len(sweep)
+
+    to_decoded_csv(sweep, args.output)
+    best = sweep.loc[sweep["projected_net_value"].idxmax()]
+    print(f"\nBest scenario by projected net value: ${best['projected_net_value']:,.2f}")
+    print(best.to_string())
+    print(f"\nSweep saved to: {args.output}")
@@ -0,0 +1,63 @@
+# =========================================
+# Phase 8 Library: Cumulative Curve Summaries
+# Purpose: Threshold Crossings & Bounded-Error Decimation for Plotting
+# =========================================
+#
+# Gain / budget curves have one point per account. Crossings are found by
+# binary search on the running maximum, and the curve is reduced to a fixed
+# vertex budget before plotting, so chart cost does not grow with accounts.
+
+import numpy as np
+
+MAX_VERTICES = 2000
+
+
+def cumulative_curve(values):
+    """Values sorted descending -> (percent of items 1..100, cumulative sum)."""
+    values = np.sort(np.asarray(values, dtype=np.float64))[::-1]
+    cumulative = np.cumsum(values)
+    percent = np.arange(1, len(values) + 1) / len(values) * 100
+    return percent, cumulative
+
+
+def first_crossing(cumulative, share):
+    """
+    First index where cumulative >= share * max(cumulative), i.e. the same
+    row as `df[df.cum >= t].index[0]`. Binary search on the running max,
+    which is monotone even when negative values make the curve dip.
+    """
+    running_max = np.maximum.accumulate(cumulative)
+    return int(np.searchsorted(running_max, share * running_max[-1], side="left"))
+
+
+def decimate_curve(y, max_vertices=MAX_VERTICES):
+    """
+    Indices of at most max_vertices points that keep the curve's shape.
+
+    The points (evenly spaced in x) are split into max_vertices // 4
+    equal-count buckets and each bucket keeps its first, last, min-y and
+    max-y points (M4). The drawn line then stays inside every bucket's true
+    y-range, so the error is bounded by one bucket width in x. Curves
+    already under the budget are returned whole.
+    """
+    n = len(y)
+    if n <= max_vertices:
+        return np.arange(n)
+
+    y = np.asarray(y)
+    n_buckets = max(1, max_vertices // 4)
+    starts = np.linspace(0, n, n_buckets + 1).astype(np.int64)[:-1]
+    ends = np.append(starts[1:], n) - 1
+
+    # Per-bucket min / max, then the first index attaining each
+    bucket = np.repeat(np.arange(n_buckets), np.diff(np.append(starts, n)))
+    y_min = np.minimum.reduceat(y, starts)
+    y_max = np.maximum.reduceat(y, starts)
+    is_min = y == y_min[bucket]
+    is_max = y == y_max[bucket]
+    idx = np.arange(n)
+    big = np.iinfo(np.int64).max
+    arg_min = np.minimum.reduceat(np.where(is_min, idx, big), starts)
+    arg_max = np.minimum.reduceat(np.where(is_max, idx, big), starts)
+
+    return np.unique(np.concatenate([starts, ends, arg_min, arg_max]))
@@ -0,0 +1,334 @@
+# =========================================
+# Phase 8: Summary Tables -> Self-Contained HTML Dashboard
+# Purpose: Reduce Policy Output Once, Refresh the Report from Kilobytes
+# =========================================
+#
+# Run from the repository root:
+#   python src/06_visualization/report_builder.py                   # summarize + render
+#   python src/06_visualization/report_builder.py --from-summaries  # re-render only
+#
+# Step 1 reduces account_policy_debug.csv (and the hidden-truth audit, when
+# available) to small tables in results/report/summaries/. Step 2 renders
+# results/report/dashboard.html from those tables alone: inline SVG charts
+# with hover tooltips, no external scripts, styles or images.
+
+import argparse
+import html
+import json
+import sys
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.instrumentation import step
+from curve_summary import cumulative_curve, first_crossing, decimate_curve
+from safety_audit import SEGMENTS, account_true_segments, build_safety_audit, audit_matrix
+
+RESULTS_DIR = Path("results")
+RAW_DIR = Path("data/raw")
+REPORT_DIR = RESULTS_DIR / "report"
+SUMMARY_DIR = REPORT_DIR / "summaries"
+DASHBOARD_FILE = REPORT_DIR / "dashboard.html"
+
+DECISION_ORDER = [
+    "treat_account",
+    "suppress_toxic_admin",
+    "suppress_toxic_users",
+    "suppress_too_small",
+    "suppress_unprofitable"
+]
+CURVE_VERTICES = 400
+HIST_BINS = 40
+
+COLOR_TARGET = '#16A34A'
+COLOR_SUPPRESSED = '#B45309'
+COLOR_MUTED = '#9CA3AF'
+COLOR_RISK = '#B71C1C'
+
+
+# -----------------------------
+# 1. Summary Tables
+# -----------------------------
+def build_summaries(policy_df, audit=None):
+    """Every number the dashboard shows, as small DataFrames keyed by name."""
+    targeted = policy_df["decision"] == "treat_account"
+
+    counts = policy_df["decision"].value_counts().reindex(DECISION_ORDER, fill_value=0)
+    funnel = pd.DataFrame({
+        "decision": DECISION_ORDER,
+        "n_accounts": counts.to_numpy(),
+        "share": counts.to_numpy() / len(policy_df),
+    })
+
+    blind = policy_df["decision"] != "suppress_too_small"
+    risk_reward = pd.DataFrame({
+        "strategy": ["blind_nudge", "precision"],
+        "net_value": [policy_df.loc[blind, "net_account_value"].sum(),
+                      policy_df.loc[targeted, "net_account_value"].sum()],
+        "toxic_admins": [int(policy_df.loc[blind, "has_toxic_admin"].sum()),
+                         int(policy_df.loc[targeted, "has_toxic_admin"].sum())],
+        "n_accounts": [int(blind.sum()), int(targeted.sum())],
+    })
+
+    percent, cumulative = cumulative_curve(policy_df.loc[targeted, "net_account_value"])
+    keep = decimate_curve(cumulative, CURVE_VERTICES)
+    p80 = first_crossing(cumulative, 0.80)
+    budget_curve = pd.DataFrame({
+        "percent_accounts": np.concatenate([[0.0], percent[keep]]),
+        "cumulative_value": np.concatenate([[0.0], cumulative[keep]]),
+        "is_p80": np.concatenate([[False], keep == p80]),
+    })
+    if not budget_curve["is_p80"].any():
+        budget_curve = pd.concat([budget_curve, pd.DataFrame({
+            "percent_accounts": [percent[p80]], "cumulative_value": [cumulative[p80]], "is_p80": [True]
+        })]).sort_values("percent_accounts", kind="stable", ignore_index=True)
+
+    edges = np.histogram_bin_edges(policy_df["sum_uplift"], bins=HIST_BINS)
+    uplift_hist = pd.DataFrame({
+        "bin_left": edges[:-1],
+        "bin_right": edges[1:],
+        "targeted": np.histogram(policy_df.loc[targeted, "sum_uplift"], bins=edges)[0],
+        "suppressed": np.histogram(policy_df.loc[~targeted, "sum_uplift"], bins=edges)[0],
+    })
+
+    summaries = {
+        "funnel": funnel,
+        "risk_reward": risk_reward,
+        "budget_curve": budget_curve,
+        "uplift_hist": uplift_hist,
+    }
+    if audit is not None:
+        matrix = audit_matrix(audit)
+        summaries["audit_matrix"] = pd.DataFrame({
+            "true_segment": SEGMENTS,
+            "n_accounts": audit["true_segment"].value_counts().reindex(SEGMENTS, fill_value=0).to_numpy(),
+            "targeted_rate": matrix.loc[True].to_numpy() if True in matrix.index else np.zeros(len(SEGMENTS)),
+        })
+    return summaries
+
+
+def save_summaries(summaries, summary_dir=SUMMARY_DIR, sources=()):
+    """CSV per table + manifest (creation time, source files, sizes)."""
+    summary_dir = Path(summary_dir)
+    summary_dir.mkdir(parents=True, exist_ok=True)
+    for name, table in summaries.items():
+        table.to_csv(summary_dir / f"{name}.csv", index=False)
+    manifest = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "tables": sorted(summaries),
+        "sources": {str(p): Path(p).stat().st_size for p in sources if Path(p).exists()},
+        "summary_bytes": sum((summary_dir / f"{n}.csv").stat().st_size for n in summaries),
+    }
+    with open(summary_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_summaries(summary_dir=SUMMARY_DIR):
+    summary_dir = Path(summary_dir)
+    with open(summary_dir / "manifest.json") as f:
+        manifest = json.load(f)
+    return {name: pd.read_csv(summary_dir / f"{name}.csv") for name in manifest["tables"]}, manifest
+
+
+# -----------------------------
+# 2. Inline SVG Charts
+# -----------------------------
+W, H, PAD = 560, 300, 44
+
+
+def _svg(body):
+    return (f'<svg viewBox="0 0 {W} {H}" width="100%" role="img" '
+            f'xmlns="http://www.w3.org/2000/svg">{body}</svg>')
+
+
+def _tip(text):
+    return f"<title>{html.escape(text)}</title>"
+
+
+def svg_bars(labels, values, colors, fmt="{:,.0f}"):
+    top = max(max(values), 1)
+    slot = (W - 2 * PAD) / len(values)
+    parts = []
+    for i, (label, value, color) in enumerate(zip(labels, values, colors)):
+        h = (H - 2 * PAD) * value / top
+        x = PAD + i * slot + slot * 0.15
+        y = H - PAD - h
+        parts.append(
+            f'<rect x="{x:.1f}" y="{y:.1f}" width="{slot * 0.7:.1f}" height="{h:.1f}" fill="{color}">'
+            f'{_tip(f"{label}: {fmt.format(value)}")}</rect>'
+            f'<text x="{x + slot * 0.35:.1f}" y="{y - 6:.1f}" text-anchor="middle" class="v">{fmt.format(value)}</text>'
+            f'<text x="{x + slot * 0.35:.1f}" y="{H - PAD + 16}" text-anchor="middle" class="l">{html.escape(label)}</text>'
+        )
+    return _svg("".join(parts))
+
+
+def svg_curve(x, y, marker=None):
+    x_max, y_max = max(x.max(), 1e-9), max(y.max(), 1e-9)
+    y_min = min(y.min(), 0)
+
+    def px(xv, yv):
+        return (PAD + (W - 2 * PAD) * xv / x_max,
+                H - PAD - (H - 2 * PAD) * (yv - y_min) / (y_max - y_min))
+
+    points = " ".join("{:.1f},{:.1f}".format(*px(a, b)) for a, b in zip(x, y))
+    x0, y0 = px(0, 0)
+    x1, y1 = px(x_max, y_max)
+    body = (f'<line x1="{x0:.1f}" y1="{y0:.1f}" x2="{x1:.1f}" y2="{y1:.1f}" stroke="{COLOR_MUTED}" '
+            f'stroke-dasharray="5,4"/>'
+            f'<polyline points="{points}" fill="none" stroke="{COLOR_TARGET}" stroke-width="4"/>')
+    if marker is not None:
+        mx, my = px(*marker)
+        body += (f'<circle cx="{mx:.1f}" cy="{my:.1f}" r="6" fill="#333">'
+                 f'{_tip(f"{marker[0]:.1f}% of accounts -> ${marker[1]:,.0f} (80% of value)")}</circle>'
+                 f'<text x="{mx + 10:.1f}" y="{my + 18:.1f}" class="v">80% of Value</text>')
+    body += (f'<text x="{W / 2}" y="{H - 8}" text-anchor="middle" class="l">% of Targeted Accounts</text>')
+    return _svg(body)
+
+
+def svg_histogram(hist):
+    top = max(hist[["targeted", "suppressed"]].to_numpy().max(), 1)
+    lo, hi = hist["bin_left"].iloc[0], hist["bin_right"].iloc[-1]
+    span = (hi - lo) or 1.0
+
+    def x_of(v):
+        return PAD + (W - 2 * PAD) * (v - lo) / span
+
+    parts = []
+    for series, color, opacity in (("suppressed", COLOR_SUPPRESSED, 0.45), ("targeted", COLOR_TARGET, 0.7)):
+        for row in hist.itertuples(index=False):
+            n = getattr(row, series)
+            if n == 0:
+                continue
+            h = (H - 2 * PAD) * n / top
+            parts.append(
+                f'<rect x="{x_of(row.bin_left):.1f}" y="{H - PAD - h:.1f}" '
+                f'width="{max(x_of(row.bin_right) - x_of(row.bin_left) - 0.5, 0.5):.1f}" height="{h:.1f}" '
+                f'fill="{color}" fill-opacity="{opacity}">'
+                f'{_tip(f"{series}: {n} accounts, uplift {row.bin_left:.2f} to {row.bin_right:.2f}")}</rect>'
+            )
+    if lo < 0 < hi:
+        parts.append(f'<line x1="{x_of(0):.1f}" y1="{PAD}" x2="{x_of(0):.1f}" y2="{H - PAD}" '
+                     f'stroke="#222" stroke-dasharray="2,3"/>'
+                     f'<text x="{x_of(0) + 4:.1f}" y="{PAD + 10}" class="v">Zero Lift</text>')
+    parts.append(f'<text x="{W / 2}" y="{H - 8}" text-anchor="middle" class="l">'
+                 f'Predicted Account-Level Uplift (sum of Δ probability)</text>')
+    return _svg("".join(parts))
+
+
+def html_audit_table(audit):
+    rows = []
+    for row in audit.itertuples(index=False):
+        rate = row.targeted_rate
+        shade = int(255 - 180 * rate)
+        rows.append(
+            f"<tr><td>{html.escape(row.true_segment.replace('_', ' ').title())}</td>"
+            f"<td>{row.n_accounts:,}</td>"
+            f"<td style='background:rgb({shade},{shade},{shade});color:{'#fff' if rate > 0.5 else '#111'}'>"
+            f"{rate:.1%}</td><td>{1 - rate:.1%}</td></tr>"
+        )
+    return ("<table><tr><th>True segment</th><th>Accounts</th><th>Targeted</th><th>Suppressed</th></tr>"
+            + "".join(rows) + "</table>")
+
+
+# -----------------------------
+# 3. Dashboard
+# -----------------------------
+def render_dashboard(summaries, manifest, path=DASHBOARD_FILE):
+    funnel = summaries["funnel"]
+    rr = summaries["risk_reward"].set_index("strategy")
+    curve = summaries["budget_curve"]
+    p80 = curve[curve["is_p80"]].iloc[0]
+    treat_share = funnel.loc[funnel["decision"] == "treat_account", "share"].iloc[0]
+
+    labels = ["Targeted", "Toxic Admin", "Toxic Users", "Too Small", "Unprofitable"]
+    colors = [COLOR_TARGET, '#C53030', '#D97706', COLOR_MUTED, '#D1D5DB']
+
+    cards = [
+        ("Risk Filters Eliminate {:.0%} of Accounts Before Targeting".format(1 - treat_share),
+         svg_bars(labels, funnel["n_accounts"].tolist(), colors)),
+        ("Precision Targeting Trades Revenue for Zero Admin Churn Risk",
+         svg_bars(["Blind Nudge", "Precision"],
+                  [rr.loc["blind_nudge", "net_value"], rr.loc["precision", "net_value"]],
+                  ['#D6D9E1', COLOR_TARGET], fmt="${:,.0f}")
+         + f"<p class='note'>Toxic admins risked: blind nudge "
+           f"<b style='color:{COLOR_RISK}'>{rr.loc['blind_nudge', 'toxic_admins']:,}</b>, "
+           f"precision <b>{rr.loc['precision', 'toxic_admins']:,}</b>.</p>"),
+        (f"Top ~{int(p80['percent_accounts'])}% of Targeted Accounts Capture 80% of Total Value",
+         svg_curve(curve["percent_accounts"].to_numpy(), curve["cumulative_value"].to_numpy(),
+                   marker=(p80["percent_accounts"], p80["cumulative_value"]))),
+        ("Guardrails Shift Targeting Toward Positive Uplift",
+         svg_histogram(summaries["uplift_hist"])
+         + f"<p class='note'><span style='color:{COLOR_TARGET}'>■</span> Targeted "
+           f"<span style='color:{COLOR_SUPPRESSED}'>■</span> Suppressed</p>"),
+    ]
+    if "audit_matrix" in summaries:
+        audit = summaries["audit_matrix"]
+        dogs = audit.loc[audit["true_segment"] == "sleeping_dog", "targeted_rate"].iloc[0]
+        cards.append((f"Policy Suppresses {1 - dogs:.0%} of Sleeping-Dog Accounts (Hidden-Truth Audit)",
+                      html_audit_table(audit)))
+
+    body = "".join(f"<section><h2>{html.escape(title)}</h2>{content}</section>" for title, content in cards)
+    page = f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8">
+<title>Uplift Account Policy — Impact Dashboard</title>
+<style>
+body{{font-family:-apple-system,Segoe UI,Helvetica,Arial,sans-serif;color:#333;margin:0;background:#F9FAFB}}
+header{{padding:24px 32px;background:#fff;border-bottom:1px solid #E5E7EB}}
+h1{{margin:0;font-size:22px}} header p{{margin:4px 0 0;color:#6B7280;font-size:13px}}
+main{{display:grid;grid-template-columns:repeat(auto-fit,minmax(520px,1fr));gap:20px;padding:24px 32px}}
+section{{background:#fff;border:1px solid #E5E7EB;border-radius:8px;padding:16px 20px}}
+h2{{font-size:16px;margin:0 0 8px}} .v{{font-size:12px;font-weight:bold;fill:#333}} .l{{font-size:11px;fill:#374151}}
+.note{{font-size:13px;color:#555}} table{{border-collapse:collapse;width:100%;font-size:14px}}
+td,th{{border:1px solid #E5E7EB;padding:6px 10px;text-align:left}} rect:hover{{stroke:#111;stroke-width:1}}
+</style></head><body>
+<header><h1>Uplift Account Policy — Impact Dashboard</h1>
+<p>Built {manifest['created_at']} from {len(manifest['tables'])} summary tables
+({manifest['summary_bytes'] / 1024:.1f} KB). Hover bars and points for values.</p></header>
+<main>{body}</main></body></html>
+"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(page, encoding="utf-8")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize policy output and render the HTML dashboard.")
+    parser.add_argument("--from-summaries", action="store_true",
+                        help="Skip summarizing; render from the saved summary tables.")
+    parser.add_argument("--output", type=Path, default=DASHBOARD_FILE)
+    args = parser.parse_args()
+
+    if not args.from_summaries:
+        policy_file = RESULTS_DIR / "account_policy_debug.csv"
+        hidden_file = RAW_DIR / "latent_uplift_groups_hidden.csv"
+        print("Summarizing policy output...")
+        with step("report.load") as s:
+            policy_df = pd.read_csv(policy_file)
+            s.rows_out = len(policy_df)
+
+        audit = None
+        if hidden_file.exists():
+            from common.dimension_index import open_dimension_index
+            with step("report.safety_audit", rows_in=len(policy_df)) as s:
+                audit = build_safety_audit(
+                    policy_df, account_true_segments(pd.read_csv(hidden_file), open_dimension_index())
+                )
+                s.rows_out = len(audit)
+        else:
+            print("⚠️ Hidden truth not found. Dashboard will omit the safety audit.")
+
+        with step("report.summarize", rows_in=len(policy_df)) as s:
+            summaries = build_summaries(policy_df, audit)
+            manifest = save_summaries(summaries, sources=[policy_file, hidden_file])
+            s.rows_out = sum(len(t) for t in summaries.values())
+        print(f"Saved {len(manifest['tables'])} summary tables ({manifest['summary_bytes']:,} bytes) to {SUMMARY_DIR}")
+
+    with step("report.render") as s:
+        summaries, manifest = load_summaries()
+        s.rows_in = sum(len(t) for t in summaries.values())
+        path = render_dashboard(summaries, manifest, args.output)
+    print(f"Dashboard saved to: {path} ({path.stat().st_size / 1024:.1f} KB)")
@@ -0,0 +1,116 @@
+# =========================================
+# Phase 8 Library: Policy Safety Audit (Hidden Truth)
+# Purpose: Per-Account Modal True Segment -> Audit Table -> Run History
+# =========================================
+#
+# Each account's true segment is the most common latent group among its
+# users (ties -> alphabetically first, like Series.mode()[0]). Counted as
+# one bincount over (account code, segment code) pairs instead of a
+# groupby-apply per account.
+
+import sys
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.keys import NULL_KEY, decode_key
+
+RESULTS_DIR = Path("results")
+AUDIT_FILE = RESULTS_DIR / "safety_audit.csv"
+HISTORY_FILE = RESULTS_DIR / "safety_audit_history.csv"
+
+SEGMENTS = ["persuadable", "sure_thing", "lost_cause", "sleeping_dog"]
+
+
+# -----------------------------
+# 1. Modal Segment per Account
+# -----------------------------
+def account_true_segments(hidden_df, dim_index):
+    """
+    One row per account: true_segment (modal latent group), modal_share and
+    n_<segment> user counts. Users missing from the index are dropped.
+    """
+    account_keys = dim_index.lookup(hidden_df["user_id"], columns=("account_id",), decode=False)["account_id"].to_numpy()
+    segments = pd.Categorical(hidden_df["latent_uplift_group"])  # sorted categories -> argmax tie-break = mode()[0]
+    keep = (account_keys != NULL_KEY) & (segments.codes >= 0)
+
+    acct_code, acct_keys = pd.factorize(account_keys[keep], sort=True)
+    n_seg = len(segments.categories)
+    counts = np.bincount(
+        acct_code.astype(np.int64) * n_seg + segments.codes[keep],
+        minlength=len(acct_keys) * n_seg
+    ).reshape(len(acct_keys), n_seg)
+
+    modal = counts.argmax(axis=1)
+    n_users = counts.sum(axis=1)
+    truth = pd.DataFrame({
+        "account_id": decode_key(acct_keys, "account_id"),
+        "true_segment": pd.Categorical.from_codes(modal, segments.categories),
+        "modal_share": counts[np.arange(len(modal)), modal] / n_users,
+        "n_users_truth": n_users,
+    })
+    for j, seg in enumerate(segments.categories):
+        truth[f"n_{seg}"] = counts[:, j]
+    return truth
+
+
+# -----------------------------
+# 2. Audit Table
+# -----------------------------
+def build_safety_audit(policy_df, truth):
+    """Policy decision next to each account's true segment (one row per account)."""
+    audit = policy_df[["account_id", "decision", "n_users", "sum_uplift", "net_account_value"]].merge(
+        truth, on="account_id", how="left"
+    )
+    audit.insert(2, "targeted", audit["decision"] == "treat_account")
+    return audit
+
+
+def audit_matrix(audit):
+    """Share of each true segment's accounts that were suppressed / targeted."""
+    return pd.crosstab(
+        audit["targeted"],
+        audit["true_segment"],
+        normalize='columns'
+    ).reindex(columns=SEGMENTS)
+
+
+def audit_snapshot(audit):
+    """One history row: targeting rates per true segment + critical failures."""
+    row = {
+        "audited_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "n_accounts": len(audit),
+        "n_targeted": int(audit["targeted"].sum()),
+        "critical_failures": int((audit["targeted"] & (audit["true_segment"] == "sleeping_dog")).sum()),
+        "sleeping_dog_users_targeted": int(audit.loc[audit["targeted"], "n_sleeping_dog"].sum()),
+    }
+    rates = audit.groupby("true_segment", observed=True)["targeted"].mean()
+    for seg in SEGMENTS:
+        row[f"targeted_rate_{seg}"] = round(float(rates.get(seg, np.nan)), 4)
+    return row
+
+
+def write_safety_audit(audit, audit_file=AUDIT_FILE, history_file=HISTORY_FILE):
+    """Save the audit table and append this run's snapshot to the history."""
+    Path(audit_file).parent.mkdir(parents=True, exist_ok=True)
+    audit.to_csv(audit_file, index=False)
+    snapshot = pd.DataFrame([audit_snapshot(audit)])
+    history_file = Path(history_file)
+    snapshot.to_csv(history_file, mode="a", header=not history_file.exists(), index=False)
+    return snapshot
+
+
+if __name__ == "__main__":
+    from common.dimension_index import open_dimension_index
+
+    policy_df = pd.read_csv(RESULTS_DIR / "account_policy_debug.csv")
+    hidden_df = pd.read_csv(Path("data/raw") / "latent_uplift_groups_hidden.csv")
+
+    audit = build_safety_audit(policy_df, account_true_segments(hidden_df, open_dimension_index()))
+    snapshot = write_safety_audit(audit)
+
+    print(audit_matrix(audit).round(3).to_string())
+    print(snapshot.T.to_string(header=False))
+    print(f"Audit saved to: {AUDIT_FILE} (history: {HISTORY_FILE})")
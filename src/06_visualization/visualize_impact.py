@@ -2,13 +2,41 @@
 # Phase 8: Validation & Impact Visualization (Final Master Polish)
 # Purpose: Generate Portfolio-Ready Evidence (10/10 Quality)
 # =========================================
+#
+# Charts are registered in CHARTS with the data they need. Each chart loads
+# its data lazily and renders in its own worker process; a chart whose
+# inputs (and this script) are unchanged since its PNG was written is skipped.
+# The safety audit table (and its history row) is rewritten on every run.
+#   python src/06_visualization/visualize_impact.py                   # stale charts
+#   python src/06_visualization/visualize_impact.py budget_efficiency  # one chart
+#   python src/06_visualization/visualize_impact.py --force -j 2
+
+import argparse
+import hashlib
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 
+import matplotlib
+matplotlib.use("Agg")  # headless workers
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
+from matplotlib.ticker import MaxNLocator
 import seaborn as sns
-from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (shared helpers)
+from common.dimension_index import open_dimension_index
+from common.pipeline import Ledger, Stage
+from common.instrumentation import step
+from curve_summary import cumulative_curve, first_crossing, decimate_curve
+from safety_audit import (
+    AUDIT_FILE, HISTORY_FILE, SEGMENTS,
+    account_true_segments, build_safety_audit, audit_matrix, write_safety_audit
+)
 
 # -----------------------------
 # Setup & Global Styling
@@ -16,7 +44,12 @@ from pathlib import Path
 RESULTS_DIR = Path("results")
 RAW_DIR = Path("data/raw")
 IMG_DIR = Path("images")
-IMG_DIR.mkdir(parents=True, exist_ok=True)
+
+POLICY_FILE = RESULTS_DIR / "account_policy_debug.csv"
+HIDDEN_FILE = RAW_DIR / "latent_uplift_groups_hidden.csv"
+USERS_FILE = RAW_DIR / "users_raw.csv"
+CHART_LEDGER = Path("data/pipeline_cache/charts.json")
+DPI = 300
 
 # Director-Level Styling
 plt.style.use('seaborn-v0_8-white')
@@ -46,272 +79,280 @@ COLOR_SUPPRESSED = '#B45309'  # Muted Brick
 # Darker Text Color for Axis Labels
 COLOR_AXIS_TEXT  = '#374151'
 
-print("Loading data...")
-policy_df = pd.read_csv(RESULTS_DIR / "account_policy_debug.csv")
 
-try:
-    hidden_df = pd.read_csv(RAW_DIR / "latent_uplift_groups_hidden.csv")
-    users_df = pd.read_csv(RAW_DIR / "users_raw.csv", usecols=["user_id", "account_id"])
-    HAS_TRUTH = True
-except FileNotFoundError:
-    print("⚠️ Hidden truth files not found. Skipping Truth-based charts.")
-    HAS_TRUTH = False
+# -----------------------------
+# Lazy Data Sources (once per process)
+# -----------------------------
+@lru_cache(maxsize=None)
+def load_policy():
+    return pd.read_csv(POLICY_FILE)
+
+
+@lru_cache(maxsize=None)
+def load_truth():
+    """(hidden truth, dimension index); raises FileNotFoundError without them."""
+    hidden_df = pd.read_csv(HIDDEN_FILE)
+    return hidden_df, open_dimension_index()
+
+
+@lru_cache(maxsize=None)
+def load_safety_audit():
+    policy_df = load_policy()
+    hidden_df, dim_index = load_truth()
+    return build_safety_audit(policy_df, account_true_segments(hidden_df, dim_index))
+
 
 # =========================================
 # CHART 1: The Policy Funnel
 # =========================================
-print("Generating Chart 1: Policy Funnel...")
-
-order = [
-    "treat_account",
-    "suppress_toxic_admin",
-    "suppress_toxic_users",
-    "suppress_too_small",
-    "suppress_unprofitable"
-]
-labels = [
-    "Targeted",
-    "Suppressed:\nToxic Admin",
-    "Suppressed:\nToxic Users",
-    "Suppressed:\nToo Small",
-    "Suppressed:\nUnprofitable"
-]
-# Desaturated palette to emphasize the first bar (Targeted)
-colors = [COLOR_TARGET, COLOR_RISK_ADMIN_MUTED, COLOR_RISK_USER_MUTED, COLOR_MUTED_1, COLOR_MUTED_2]
-
-counts = policy_df["decision"].value_counts().reindex(order).fillna(0)
-total_accounts = len(policy_df)
-suppressed_pct = (total_accounts - counts['treat_account']) / total_accounts
-
-fig, ax = plt.subplots(figsize=(12, 7))
-bars = ax.bar(labels, counts, color=colors, width=0.65)
-
-# Annotations
-for bar in bars:
-    height = bar.get_height()
-    ax.text(bar.get_x() + bar.get_width()/2., height + 30,
-            f'{int(height)}',
-            ha='center', va='bottom', fontsize=14, fontweight='bold', color='#333333')
-
-# Admin Callout
-admin_bar = bars[1]
-callout_x = admin_bar.get_x() + admin_bar.get_width()/2
-callout_y = admin_bar.get_height() + 400
-
-ax.annotate("281 accounts suppressed\ndue to Admin churn risk",
-            xy=(callout_x, admin_bar.get_height()),
-            xytext=(callout_x, callout_y),
-            ha='center', va='bottom', fontsize=13, color='#555555',
-            arrowprops=dict(arrowstyle='->', color='#555555', connectionstyle="arc3,rad=.2"))
-
-ax.set_title(f'Risk Filters Eliminate {suppressed_pct:.0%} of Accounts Before Targeting', pad=40)
-ax.set_yticks([])
-ax.set_xlabel('')
-
-# ADJUSTMENTS: Remove baseline, increase X-axis font
-ax.spines['bottom'].set_visible(False)
-ax.tick_params(axis='x', labelsize=13) # Increased size
-
-plt.tight_layout()
-plt.savefig(IMG_DIR / "01_policy_funnel.png", dpi=300)
-print(f"Saved: {IMG_DIR / '01_policy_funnel.png'}")
+def chart_policy_funnel(dpi=DPI):
+    policy_df = load_policy()
+
+    order = [
+        "treat_account",
+        "suppress_toxic_admin",
+        "suppress_toxic_users",
+        "suppress_too_small",
+        "suppress_unprofitable"
+    ]
+    labels = [
+        "Targeted",
+        "Suppressed:\nToxic Admin",
+        "Suppressed:\nToxic Users",
+        "Suppressed:\nToo Small",
+        "Suppressed:\nUnprofitable"
+    ]
+    # Desaturated palette to emphasize the first bar (Targeted)
+    colors = [COLOR_TARGET, COLOR_RISK_ADMIN_MUTED, COLOR_RISK_USER_MUTED, COLOR_MUTED_1, COLOR_MUTED_2]
+
+    counts = policy_df["decision"].value_counts().reindex(order).fillna(0)
+    total_accounts = len(policy_df)
+    suppressed_pct = (total_accounts - counts['treat_account']) / total_accounts
+
+    fig, ax = plt.subplots(figsize=(12, 7))
+    bars = ax.bar(labels, counts, color=colors, width=0.65)
+
+    # Annotations
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 30,
+                f'{int(height)}',
+                ha='center', va='bottom', fontsize=14, fontweight='bold', color='#333333')
+
+    # Admin Callout
+    admin_bar = bars[1]
+    callout_x = admin_bar.get_x() + admin_bar.get_width()/2
+    callout_y = admin_bar.get_height() + 400
+
+    ax.annotate("281 accounts suppressed\ndue to Admin churn risk",
+                xy=(callout_x, admin_bar.get_height()),
+                xytext=(callout_x, callout_y),
+                ha='center', va='bottom', fontsize=13, color='#555555',
+                arrowprops=dict(arrowstyle='->', color='#555555', connectionstyle="arc3,rad=.2"))
+
+    ax.set_title(f'Risk Filters Eliminate {suppressed_pct:.0%} of Accounts Before Targeting', pad=40)
+    ax.set_yticks([])
+    ax.set_xlabel('')
+
+    # ADJUSTMENTS: Remove baseline, increase X-axis font
+    ax.spines['bottom'].set_visible(False)
+    ax.tick_params(axis='x', labelsize=13) # Increased size
+
+    plt.tight_layout()
+    plt.savefig(IMG_DIR / "01_policy_funnel.png", dpi=dpi)
+    print(f"Saved: {IMG_DIR / '01_policy_funnel.png'}")
+
 
 # =========================================
 # CHART 2: Risk vs. Reward
 # =========================================
-print("Generating Chart 2: Risk vs. Reward...")
+def chart_risk_vs_reward(dpi=DPI):
+    policy_df = load_policy()
 
-blind_mask = policy_df["decision"] != "suppress_too_small"
-blind_val = policy_df.loc[blind_mask, "net_account_value"].sum()
-blind_risk = policy_df.loc[blind_mask, "has_toxic_admin"].sum()
+    blind_mask = policy_df["decision"] != "suppress_too_small"
+    blind_val = policy_df.loc[blind_mask, "net_account_value"].sum()
+    blind_risk = policy_df.loc[blind_mask, "has_toxic_admin"].sum()
 
-prec_mask = policy_df["decision"] == "treat_account"
-prec_val = policy_df.loc[prec_mask, "net_account_value"].sum()
-prec_risk = policy_df.loc[prec_mask, "has_toxic_admin"].sum()
+    prec_mask = policy_df["decision"] == "treat_account"
+    prec_val = policy_df.loc[prec_mask, "net_account_value"].sum()
+    prec_risk = policy_df.loc[prec_mask, "has_toxic_admin"].sum()
 
-fig, ax1 = plt.subplots(figsize=(10, 6))
-ax2 = ax1.twinx()
+    fig, ax1 = plt.subplots(figsize=(10, 6))
+    ax2 = ax1.twinx()
 
-x = np.arange(1)
-width = 0.45
+    x = np.arange(1)
+    width = 0.45
 
-# Bars (Blind Nudge is lighter now)
-ax1.bar(x - width/2, [blind_val], width, color=COLOR_BLIND, label='Revenue')
-ax1.bar(x + width/2, [prec_val], width, color=COLOR_TARGET, label='Revenue')
+    # Bars (Blind Nudge is lighter now)
+    ax1.bar(x - width/2, [blind_val], width, color=COLOR_BLIND, label='Revenue')
+    ax1.bar(x + width/2, [prec_val], width, color=COLOR_TARGET, label='Revenue')
 
-# Points
-ax2.scatter(x - width/2, [blind_risk], s=300, color='#B71C1C', zorder=9) # Full saturation red
-ax2.scatter(x + width/2, [prec_risk], s=300, color=COLOR_TARGET, zorder=9)
+    # Points
+    ax2.scatter(x - width/2, [blind_risk], s=300, color='#B71C1C', zorder=9) # Full saturation red
+    ax2.scatter(x + width/2, [prec_risk], s=300, color=COLOR_TARGET, zorder=9)
 
-ax1.set_title('Precision Targeting Sacrifices Revenue to Avoid Admin Churn Risk', pad=35)
-# Subtitle
-ax1.text(0, 1.05, "Higher short-term revenue, unacceptable churn risk",
-         transform=ax1.transAxes, fontsize=12, color='#555555')
+    ax1.set_title('Precision Targeting Sacrifices Revenue to Avoid Admin Churn Risk', pad=35)
+    # Subtitle
+    ax1.text(0, 1.05, "Higher short-term revenue, unacceptable churn risk",
+             transform=ax1.transAxes, fontsize=12, color='#555555')
 
-# ax1.set_ylabel('Projected Revenue ($)', color=COLOR_AXIS_TEXT)
-ax1.set_yticks([])
-ax1.set_xticks([])
+    # ax1.set_ylabel('Projected Revenue ($)', color=COLOR_AXIS_TEXT)
+    ax1.set_yticks([])
+    ax1.set_xticks([])
 
-# Remove Y-axis ticks for Risk
-# ax2.set_ylabel('Toxic Admins Risked', color='#B91C1C', rotation=270, labelpad=20)
-ax2.set_yticks([])
-ax2.spines['right'].set_visible(False)
+    # Remove Y-axis ticks for Risk
+    # ax2.set_ylabel('Toxic Admins Risked', color='#B91C1C', rotation=270, labelpad=20)
+    ax2.set_yticks([])
+    ax2.spines['right'].set_visible(False)
 
-ax1.spines['bottom'].set_visible(False)
-ax2.spines['bottom'].set_visible(False)
+    ax1.spines['bottom'].set_visible(False)
+    ax2.spines['bottom'].set_visible(False)
 
-left_x = float(x[0] - width/2)
-right_x = float(x[0] + width/2)
+    left_x = float(x[0] - width/2)
+    right_x = float(x[0] + width/2)
 
-# Value Labels
-ax1.text(left_x, blind_val/2, f"Blind Nudge\n${blind_val/1000:.0f}k value",
-         ha='center', va='center', color='#555555', fontweight='bold', fontsize=11)
-ax1.text(right_x, prec_val/2, f"Precision\n${prec_val/1000:.0f}k value",
-         ha='center', va='center', color='white', fontweight='bold', fontsize=11)
+    # Value Labels
+    ax1.text(left_x, blind_val/2, f"Blind Nudge\n${blind_val/1000:.0f}k value",
+             ha='center', va='center', color='#555555', fontweight='bold', fontsize=11)
+    ax1.text(right_x, prec_val/2, f"Precision\n${prec_val/1000:.0f}k value",
+             ha='center', va='center', color='white', fontweight='bold', fontsize=11)
 
-# Risk Annotations (Increased size +20%)
-ax2.text(left_x, blind_risk + 10, f"{int(blind_risk)} Admins!",
-         ha='left', color='#B71C1C', fontweight='bold', fontsize=15)
+    # Risk Annotations (Increased size +20%)
+    ax2.text(left_x, blind_risk + 10, f"{int(blind_risk)} Admins!",
+             ha='left', color='#B71C1C', fontweight='bold', fontsize=15)
 
-ax2.text(right_x, prec_risk + 15, "0 Risk",
-         ha='center', color=COLOR_TARGET, fontweight='bold', fontsize=12)
+    ax2.text(right_x, prec_risk + 15, "0 Risk",
+             ha='center', color=COLOR_TARGET, fontweight='bold', fontsize=12)
+
+    plt.tight_layout()
+    plt.savefig(IMG_DIR / "02_risk_vs_reward.png", dpi=dpi)
+    print(f"Saved: {IMG_DIR / '02_risk_vs_reward.png'}")
 
-plt.tight_layout()
-plt.savefig(IMG_DIR / "02_risk_vs_reward.png", dpi=300)
-print(f"Saved: {IMG_DIR / '02_risk_vs_reward.png'}")
 
 # =========================================
 # CHART 3: Budget Efficiency Curve
 # =========================================
-print("Generating Chart 3: Budget Efficiency...")
+def chart_budget_efficiency(dpi=DPI):
+    policy_df = load_policy()
 
-target_df = policy_df[policy_df["decision"] == "treat_account"].copy()
-target_df = target_df.sort_values("net_account_value", ascending=False).reset_index(drop=True)
-target_df["cumulative_value"] = target_df["net_account_value"].cumsum()
-target_df["percent_accounts"] = (target_df.index + 1) / len(target_df) * 100
+    # Arrays only: sorted values -> cumulative curve (no per-account frame)
+    percent_accounts, cumulative_value = cumulative_curve(
+        policy_df.loc[policy_df["decision"] == "treat_account", "net_account_value"]
+    )
 
-fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = plt.subplots(figsize=(10, 6))
 
-ax.plot(target_df["percent_accounts"], target_df["cumulative_value"],
-        color=COLOR_TARGET, linewidth=5.0)
-# Thinned random baseline (~25%)
-ax.plot([0, 100], [0, target_df["cumulative_value"].max()],
-        color=COLOR_MUTED_1, linestyle='--', linewidth=1.1, alpha=0.6)
+    # At most MAX_VERTICES vertices, whatever the number of accounts
+    keep = decimate_curve(cumulative_value)
+    ax.plot(percent_accounts[keep], cumulative_value[keep],
+            color=COLOR_TARGET, linewidth=5.0)
 
-# 1. Calculate Total Value
-max_val = target_df["cumulative_value"].max()
+    # 1. Calculate Total Value
+    max_val = cumulative_value.max()
 
-# 2. Find the index where we cross the 80% value threshold
-threshold_val = max_val * 0.80
-p80_idx = target_df[target_df["cumulative_value"] >= threshold_val].index[0]
+    # Thinned random baseline (~25%)
+    ax.plot([0, 100], [0, max_val],
+            color=COLOR_MUTED_1, linestyle='--', linewidth=1.1, alpha=0.6)
 
-# 3. Get the specific X and Y coordinates for that index
-p80_val = target_df.iloc[p80_idx]["cumulative_value"]
-p80_pct = target_df.iloc[p80_idx]["percent_accounts"]
+    # 2. Find the index where we cross the 80% value threshold
+    p80_idx = first_crossing(cumulative_value, 0.80)
 
-# 4. Dynamic Title based on the calculated percentage
-ax.set_title(f"Top ~{int(p80_pct)}% of Targeted Accounts Capture 80% of Total Value", pad=40)
+    # 3. Get the specific X and Y coordinates for that index
+    p80_val = cumulative_value[p80_idx]
+    p80_pct = percent_accounts[p80_idx]
 
-# User's specific placement code
-ax.text(0, 1.05, "Model-driven targeting concentrates value early",
-        transform=ax.transAxes, fontsize=11, color='#555555', va='bottom')
+    # 4. Dynamic Title based on the calculated percentage
+    ax.set_title(f"Top ~{int(p80_pct)}% of Targeted Accounts Capture 80% of Total Value", pad=40)
 
-# Increase axis labels size
-ax.set_xlabel('% of Targeted Accounts', fontsize=13, labelpad=10)
-ax.set_ylabel('Cumulative Net Value ($)', fontsize=13, labelpad=10)
-ax.tick_params(axis='both', which='major', labelsize=12)
+    # User's specific placement code
+    ax.text(0, 1.05, "Model-driven targeting concentrates value early",
+            transform=ax.transAxes, fontsize=11, color='#555555', va='bottom')
 
-ax.grid(axis='y', linestyle=':', alpha=0.15)
-ax.spines['bottom'].set_visible(False)
-from matplotlib.ticker import MaxNLocator
-ax.yaxis.set_major_locator(MaxNLocator(nbins=3))
+    # Increase axis labels size
+    ax.set_xlabel('% of Targeted Accounts', fontsize=13, labelpad=10)
+    ax.set_ylabel('Cumulative Net Value ($)', fontsize=13, labelpad=10)
+    ax.tick_params(axis='both', which='major', labelsize=12)
 
-# Plot the dot at the 80% value mark
-ax.scatter([p80_pct], [p80_val], color='#333333', s=40, zorder=5)
+    ax.grid(axis='y', linestyle=':', alpha=0.15)
+    ax.spines['bottom'].set_visible(False)
+    ax.yaxis.set_major_locator(MaxNLocator(nbins=3))
 
-# User's specific placement code for callout
-label_y_pos = p80_val - (max_val * 0.05) # Slightly lower to avoid overlapping the line
+    # Plot the dot at the 80% value mark
+    ax.scatter([p80_pct], [p80_val], color='#333333', s=40, zorder=5)
 
-ax.text(
-    p80_pct + 3, # Offset X slightly to the right
-    label_y_pos,
-    "80% of Value", # Fixed text since we forced the location
-    fontsize=11,
-    fontweight='bold',
-    va='top'
-)
+    # User's specific placement code for callout
+    label_y_pos = p80_val - (max_val * 0.05) # Slightly lower to avoid overlapping the line
+
+    ax.text(
+        p80_pct + 3, # Offset X slightly to the right
+        label_y_pos,
+        "80% of Value", # Fixed text since we forced the location
+        fontsize=11,
+        fontweight='bold',
+        va='top'
+    )
+
+    # Connector line
+    ax.plot([p80_pct, p80_pct], [p80_val, label_y_pos + (max_val * 0.04)],
+            color='#333333', linestyle=':', linewidth=1)
+    plt.tight_layout()
+    plt.savefig(IMG_DIR / "03_budget_efficiency.png", dpi=dpi)
+    print(f"Saved: {IMG_DIR / '03_budget_efficiency.png'}")
 
-# Connector line
-ax.plot([p80_pct, p80_pct], [p80_val, label_y_pos + (max_val * 0.04)],
-        color='#333333', linestyle=':', linewidth=1)
-plt.tight_layout()
-plt.savefig(IMG_DIR / "03_budget_efficiency.png", dpi=300)
-print(f"Saved: {IMG_DIR / '03_budget_efficiency.png'}")
 
 # =========================================
 # CHART 4: Uplift Distribution
 # =========================================
-print("Generating Chart 4: Uplift Distribution...")
+def chart_uplift_distribution(dpi=DPI):
+    policy_df = load_policy()
 
-plt.figure(figsize=(10, 6))
+    plt.figure(figsize=(10, 6))
 
-plot_df = policy_df.copy()
-# Separate dataframes for explicit control
-targeted = plot_df[plot_df["decision"] == "treat_account"]
-suppressed = plot_df[plot_df["decision"] != "treat_account"]
+    plot_df = policy_df.copy()
+    # Separate dataframes for explicit control
+    targeted = plot_df[plot_df["decision"] == "treat_account"]
+    suppressed = plot_df[plot_df["decision"] != "treat_account"]
 
-# Plot Targeted (Green, Higher Opacity)
-sns.kdeplot(
-    data=targeted, x="sum_uplift", fill=True,
-    color=COLOR_TARGET, alpha=0.65, linewidth=0, label='Targeted'
-)
+    # Plot Targeted (Green, Higher Opacity)
+    sns.kdeplot(
+        data=targeted, x="sum_uplift", fill=True,
+        color=COLOR_TARGET, alpha=0.65, linewidth=0, label='Targeted'
+    )
 
-# Plot Suppressed (Red, Lower Opacity)
-sns.kdeplot(
-    data=suppressed, x="sum_uplift", fill=True,
-    color=COLOR_SUPPRESSED, alpha=0.35, linewidth=0, label='Suppressed'
-)
+    # Plot Suppressed (Red, Lower Opacity)
+    sns.kdeplot(
+        data=suppressed, x="sum_uplift", fill=True,
+        color=COLOR_SUPPRESSED, alpha=0.35, linewidth=0, label='Suppressed'
+    )
 
-plt.title('Guardrails Shift Targeting Toward Positive Uplift', pad=30)
-plt.xlabel('Predicted Account-Level Uplift (Δ Probability)', fontsize=15)
-plt.ylabel('')
-plt.yticks([])
+    plt.title('Guardrails Shift Targeting Toward Positive Uplift', pad=30)
+    plt.xlabel('Predicted Account-Level Uplift (Δ Probability)', fontsize=15)
+    plt.ylabel('')
+    plt.yticks([])
 
-plt.axvline(0, color='#222222', linestyle=':', linewidth=2, alpha=1.0)
-plt.text(0.5, plt.gca().get_ylim()[1]*0.95, "Zero Lift",
-         color='#222222', fontsize=11, fontweight='bold')
+    plt.axvline(0, color='#222222', linestyle=':', linewidth=2, alpha=1.0)
+    plt.text(0.5, plt.gca().get_ylim()[1]*0.95, "Zero Lift",
+             color='#222222', fontsize=11, fontweight='bold')
 
-handles = [
-    mpatches.Patch(color=COLOR_TARGET, label='Targeted'),
-    mpatches.Patch(color=COLOR_SUPPRESSED, label='Suppressed')
-]
-plt.legend(handles=handles, frameon=False, loc='upper right')
+    handles = [
+        mpatches.Patch(color=COLOR_TARGET, label='Targeted'),
+        mpatches.Patch(color=COLOR_SUPPRESSED, label='Suppressed')
+    ]
+    plt.legend(handles=handles, frameon=False, loc='upper right')
+
+    plt.tight_layout()
+    plt.savefig(IMG_DIR / "04_uplift_distribution.png", dpi=dpi)
+    print(f"Saved: {IMG_DIR / '04_uplift_distribution.png'}")
 
-plt.tight_layout()
-plt.savefig(IMG_DIR / "04_uplift_distribution.png", dpi=300)
-print(f"Saved: {IMG_DIR / '04_uplift_distribution.png'}")
 
 # =========================================
 # CHART 5: Safety Audit (Heatmap)
 # =========================================
-if HAS_TRUTH:
-    print("Generating Chart 5: Safety Audit...")
-
-    account_truth = users_df.merge(hidden_df, on="user_id")
-    truth_agg = account_truth.groupby("account_id").apply(
-        lambda x: x["latent_uplift_group"].mode()[0], include_groups=False
-    ).reset_index(name="true_segment")
-
-    audit_df = policy_df.merge(truth_agg, on="account_id", how="left")
+def chart_failure_matrix(dpi=DPI):
+    audit_df = load_safety_audit()
 
-    audit_pivot = pd.crosstab(
-        audit_df["decision"] == "treat_account",
-        audit_df["true_segment"],
-        normalize='columns'
-    )
-
-    col_order = ["persuadable", "sure_thing", "lost_cause", "sleeping_dog"]
-    audit_pivot = audit_pivot.reindex(columns=col_order)
+    col_order = SEGMENTS
+    audit_pivot = audit_matrix(audit_df)
 
     fig, ax = plt.subplots(figsize=(10, 5))
 
@@ -347,15 +388,125 @@ if HAS_TRUTH:
             pass
 
     plt.tight_layout()
-    plt.savefig(IMG_DIR / "05_failure_matrix.png", dpi=300)
+    plt.savefig(IMG_DIR / "05_failure_matrix.png", dpi=dpi)
     print(f"Saved: {IMG_DIR / '05_failure_matrix.png'}")
 
     failures = audit_df[
         (audit_df["true_segment"] == "sleeping_dog") &
-        (audit_df["decision"] == "treat_account")
+        audit_df["targeted"]
     ]
     with open(RESULTS_DIR / "failure_mode_analysis.txt", "w") as f:
         f.write(f"CRITICAL FAILURE COUNT: {len(failures)}")
 
-print("\nVisualization Phase Complete.")
 
+# -----------------------------
+# Chart Registry
+# -----------------------------
+# name -> (render function, input files, output files)
+CHARTS = {
+    "policy_funnel": (chart_policy_funnel, [POLICY_FILE], [IMG_DIR / "01_policy_funnel.png"]),
+    "risk_vs_reward": (chart_risk_vs_reward, [POLICY_FILE], [IMG_DIR / "02_risk_vs_reward.png"]),
+    "budget_efficiency": (chart_budget_efficiency, [POLICY_FILE], [IMG_DIR / "03_budget_efficiency.png"]),
+    "uplift_distribution": (chart_uplift_distribution, [POLICY_FILE], [IMG_DIR / "04_uplift_distribution.png"]),
+    "failure_matrix": (chart_failure_matrix, [POLICY_FILE, HIDDEN_FILE, USERS_FILE],
+                       [IMG_DIR / "05_failure_matrix.png", RESULTS_DIR / "failure_mode_analysis.txt"]),
+}
+
+# Sibling modules a chart's output depends on (hashed with everything they import)
+CHART_MODULES = {
+    "budget_efficiency": ["curve_summary.py"],
+    "failure_matrix": ["safety_audit.py"],
+}
+
+
+def chart_code_files(name):
+    """This script plus the chart's helper modules (transitively, as Stage.code_files)."""
+    script = Path(__file__).resolve()
+    files = {script}
+    for module in CHART_MODULES.get(name, []):
+        files.update(Stage(module, script.parent / module).code_files())
+    return sorted(files)
+
+
+def chart_key(ledger, name, dpi):
+    """Hash of the chart's code, its input files and the render settings."""
+    _, inputs, _ = CHARTS[name]
+    h = hashlib.sha256(f"{name}:{dpi}".encode())
+    for path in chart_code_files(name):
+        h.update(f"code:{path.name}:{ledger.file_hash(path)}".encode())
+    for path in inputs:
+        h.update(f"{path}:{ledger.file_hash(path)}".encode())
+    return h.hexdigest()
+
+
+def render_chart(name, dpi=DPI):
+    """Worker entry point: render one chart; returns (name, status, seconds)."""
+    render, _, _ = CHARTS[name]
+    print(f"Generating {name}...")
+    start = time.perf_counter()
+    try:
+        render(dpi=dpi)
+    except FileNotFoundError as exc:
+        print(f"⚠️ {name}: input not found ({exc.filename}). Skipping.")
+        return name, "skipped", 0.0
+    finally:
+        plt.close("all")
+    return name, "rendered", time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the impact charts (only those whose inputs changed).")
+    parser.add_argument("charts", nargs="*", metavar="CHART",
+                        help=f"Charts to render (default: all): {', '.join(CHARTS)}.")
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="Worker processes.")
+    parser.add_argument("--force", action="store_true", help="Render even if unchanged.")
+    parser.add_argument("--dpi", type=int, default=DPI)
+    args = parser.parse_args()
+    unknown = [c for c in args.charts if c not in CHARTS]
+    if unknown:
+        parser.error(f"unknown chart(s): {', '.join(unknown)}")
+
+    IMG_DIR.mkdir(parents=True, exist_ok=True)
+    with step("visualize.plan", rows_in=len(args.charts or CHARTS)) as s:
+        ledger = Ledger(CHART_LEDGER)
+        keys = {name: chart_key(ledger, name, args.dpi) for name in (args.charts or CHARTS)}
+
+        todo = []
+        for name, key in keys.items():
+            _, _, outputs = CHARTS[name]
+            fresh = ledger.stages.get(name) == key and all(p.exists() for p in outputs)
+            if fresh and not args.force:
+                print(f"Unchanged: {name}")
+            else:
+                todo.append(name)
+        s.rows_out = len(todo)
+
+    # The audit table and its history row are written on every run, not only
+    # when the failure-matrix chart is stale
+    with step("visualize.safety_audit") as s:
+        try:
+            audit_df = load_safety_audit()
+            write_safety_audit(audit_df)
+            s.rows_out = len(audit_df)
+            print(f"Saved: {AUDIT_FILE} (history: {HISTORY_FILE})")
+        except FileNotFoundError as exc:
+            print(f"⚠️ safety_audit: input not found ({exc.filename}). Skipping.")
+
+    if todo:
+        print(f"Rendering {len(todo)} chart(s) with {min(args.jobs, len(todo))} worker(s)...")
+        with step("visualize.render", rows_in=len(todo)) as s:
+            if args.jobs > 1 and len(todo) > 1:
+                with ProcessPoolExecutor(max_workers=min(args.jobs, len(todo))) as pool:
+                    results = list(pool.map(render_chart, todo, [args.dpi] * len(todo)))
+            else:
+                results = [render_chart(name, args.dpi) for name in todo]
+            s.rows_out = sum(status == "rendered" for _, status, _ in results)
+
+        with step("visualize.write_ledger", rows_in=len(results)):
+            for name, status, seconds in results:
+                if status == "rendered":
+                    ledger.stages[name] = keys[name]
+                    print(f"  {name:<20} {seconds:6.2f}s")
+            ledger.save()
+
+    print("\nVisualization Phase Complete.")
@@ -0,0 +1,201 @@
+# =========================================
+# Benchmarks: Pipeline Scale Suite
+# Purpose: Synthetic Data at N Users -> Per-Stage Time, Throughput & Peak RSS
+# =========================================
+#
+# Run from the repository root:
+#   python src/benchmarks/scale_benchmark.py                      # 10k + 100k users
+#   python src/benchmarks/scale_benchmark.py --scales 10k 1m 10m  # larger (hours at 10m)
+#   python src/benchmarks/scale_benchmark.py --save-baseline      # store as the baseline
+#
+# Each scale gets its own workspace (data/benchmarks/<scale>/) in which
+# every stage of run_pipeline.STAGES runs in order as a subprocess, with
+# generator 01 sized through --n-accounts (all generators keep seed 42).
+# Results go to results/benchmarks/scale_benchmark.json; when a baseline
+# exists, stages that got slower / bigger beyond the tolerance are listed
+# and the exit code is 1.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+REPO_DIR = SRC_DIR.parent
+sys.path.insert(0, str(SRC_DIR))  # src/ (shared helpers + runner)
+from common.pipeline import Stage, run_stage, stage_steps, LOG_DIR
+from common.instrumentation import compare_runs
+from run_pipeline import STAGES, USERS
+
+WORK_DIR = Path("data/benchmarks")
+RESULTS_FILE = Path("results/benchmarks/scale_benchmark.json")
+BASELINE_FILE = Path("results/benchmarks/scale_baseline.json")
+
+# Generator 01 averages ~11.44 users per account (28,607 users / 2,500 accounts)
+USERS_PER_ACCOUNT = 11.44
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_SCALES = ["10k", "100k"]
+
+# Regression thresholds (both must be exceeded to flag)
+TIME_TOLERANCE = 1.25
+MIN_SECONDS = 0.5
+MEMORY_TOLERANCE = 1.25
+MIN_MEMORY_MB = 50
+
+
+def _count_rows(path):
+    """Data rows of a CSV (newline count minus header), in 1 MB blocks."""
+    with open(path, "rb") as f:
+        return sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b"")) - 1
+
+
+def scaled_stages(n_accounts):
+    """The pipeline stages with absolute scripts and generator 01 resized."""
+    return [
+        Stage(s.name, REPO_DIR / s.script, s.inputs, s.outputs,
+              ["--n-accounts", n_accounts] if s.name == "accounts_users" else s.args)
+        for s in STAGES
+    ]
+
+
+# -----------------------------
+# One Scale
+# -----------------------------
+def run_scale(scale, n_users, work_dir=WORK_DIR, keep_data=False):
+    """Run every stage on a fresh workspace; returns the scale's result record."""
+    workspace = (Path(work_dir) / scale).resolve()
+    shutil.rmtree(workspace, ignore_errors=True)
+    workspace.mkdir(parents=True)
+    n_accounts = max(1, round(n_users / USERS_PER_ACCOUNT))
+
+    print(f"\n=== {scale}: ~{n_users:,} users ({n_accounts:,} accounts) in {workspace} ===")
+    cwd = Path.cwd()
+    os.chdir(workspace)
+    try:
+        records = []
+        actual_users = None
+        for stage in scaled_stages(n_accounts):
+            exit_code, elapsed, peak = run_stage(stage)
+            if actual_users is None and USERS.exists():
+                actual_users = _count_rows(USERS)
+            status = "ran" if exit_code == 0 and all(p.exists() for p in stage.outputs) else "failed"
+            records.append({
+                "stage": stage.name, "status": status, "exit_code": exit_code,
+                "duration_s": round(elapsed, 3), "peak_rss_mb": round(peak, 1),
+                "users_per_s": round(actual_users / elapsed, 1) if actual_users and elapsed > 0 else None,
+                "steps": stage_steps(stage),
+            })
+            print(f"  [{status:>6}] {stage.name:<16} {elapsed:9.2f}s  peak {peak:8.1f} MB")
+            if status == "failed":
+                print(f"   log: {workspace / LOG_DIR / (stage.name + '.log')}")
+                break
+
+        data_rows = {p.name: _count_rows(p) for p in sorted(Path("data/raw").glob("*.csv"))}
+    finally:
+        os.chdir(cwd)
+        if not keep_data:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    ran = [r for r in records if r["status"] == "ran"]
+    return {
+        "scale": scale,
+        "target_users": n_users,
+        "n_accounts": n_accounts,
+        "n_users": actual_users,
+        "raw_rows": data_rows,
+        "total_s": round(sum(r["duration_s"] for r in ran), 3),
+        "max_peak_rss_mb": max((r["peak_rss_mb"] for r in ran), default=None),
+        "complete": len(ran) == len(STAGES),
+        "stages": records,
+    }
+
+
+# -----------------------------
+# Regression Check
+# -----------------------------
+def find_regressions(baseline, current, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """(scale, stage/step, metric, before, after, ratio) rows beyond tolerance."""
+    base_scales = {s["scale"]: s for s in baseline["scales"]}
+    rows = []
+    for cur in current["scales"]:
+        base = base_scales.get(cur["scale"])
+        if base is None:
+            continue
+        for name, before, after, ratio in compare_runs(base, cur, time_tolerance, MIN_SECONDS):
+            rows.append((cur["scale"], name, "seconds", before, after, ratio))
+
+        base_mem = {s["stage"]: s["peak_rss_mb"] for s in base["stages"] if s["status"] == "ran"}
+        for s in cur["stages"]:
+            before = base_mem.get(s["stage"])
+            if before is None or s["status"] != "ran":
+                continue
+            after = s["peak_rss_mb"]
+            if after - before >= MIN_MEMORY_MB and after / before >= memory_tolerance:
+                rows.append((cur["scale"], s["stage"], "peak_rss_mb", before, after, after / before))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every pipeline stage on generated data at several scales.")
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES, choices=list(SCALES))
+    parser.add_argument("--work-dir", type=Path, default=WORK_DIR)
+    parser.add_argument("--keep-data", action="store_true", help="Keep each scale's generated workspace.")
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Also store these results as the baseline.")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = {
+        "finished_at": None,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "scales": [run_scale(s, SCALES[s], args.work_dir, args.keep_data) for s in args.scales],
+    }
+    results["finished_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    results["wall_s"] = round(time.perf_counter() - started, 3)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to: {args.output}")
+
+    # -----------------------------
+    # Summary
+    # -----------------------------
+    print("\n=== THROUGHPUT (users / s) ===")
+    names = [s.name for s in STAGES]
+    print(f"{'stage':<16}" + "".join(f"{r['scale']:>12}" for r in results["scales"]))
+    for name in names:
+        cells = []
+        for r in results["scales"]:
+            rec = next((s for s in r["stages"] if s["stage"] == name), None)
+            cells.append(f"{rec['users_per_s']:>12,.0f}" if rec and rec["users_per_s"] else f"{'-':>12}")
+        print(f"{name:<16}" + "".join(cells))
+
+    failed = [r["scale"] for r in results["scales"] if not r["complete"]]
+    regressions = []
+    if args.baseline.exists() and not args.save_baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(json.load(f), results, args.time_tolerance, args.memory_tolerance)
+        print(f"\n=== REGRESSIONS vs {args.baseline}: {len(regressions)} ===")
+        for scale, name, metric, before, after, ratio in regressions:
+            print(f"  {scale:<5} {name:<44} {metric:<12} {before:10.2f} -> {after:10.2f}  (x{ratio:.2f})")
+    elif not args.save_baseline:
+        print(f"\nNo baseline at {args.baseline} (run with --save-baseline to create one).")
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Baseline saved to: {args.baseline}")
+
+    if failed:
+        print(f"⚠️ Incomplete scales: {', '.join(failed)}")
+    sys.exit(1 if failed or regressions else 0)
@@ -0,0 +1 @@
+# Shared, stage-independent helpers (imported by scripts under src/NN_*/).
@@ -0,0 +1,498 @@
+# =========================================
+# Shared Library: Data Contracts
+# Purpose: Declared Table Constraints -> Fused Vectorized Checks at Every Handoff
+# =========================================
+#
+# Every table handed between stages has one contract in CONTRACTS below:
+# uniqueness, not-null, foreign keys, temporal ordering, ranges and rates.
+# Stages call enforce(name, df, refs) right where they hand a frame on
+# (generators before writing, library functions before returning), so a
+# bad table stops the stage that made it instead of surfacing in the
+# final audit.
+#
+# Checks on one table share a single scan: column arrays, null masks and
+# `where` masks are computed once, every range / not-null check on a
+# column reads the same (null count, min, max) pass, and reference lookups
+# (key sets, per-key maxima of another table) are built once per run and
+# reused by every table that points at them. Row-level work beyond that
+# only happens when a check fails and the offending rows are counted.
+#
+# Predicates are (column, op, value) tuples, op one of
+#   == != < <= > >= in notnull isnull within_quantiles
+# Constraints that reference a table not passed in `refs` are skipped.
+
+import operator
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from common.instrumentation import step
+
+
+class ContractViolation(AssertionError):
+    """A table broke its declared data contract."""
+
+
+CheckResult = namedtuple("CheckResult", ["contract", "message", "status", "detail"])  # status: pass / fail / skip
+
+_COMPARE = {"==": operator.eq, "!=": operator.ne, "<": operator.lt,
+            "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+def _freeze(pred):
+    """Hashable predicate (list values -> tuples), so masks can be cached by it."""
+    if pred is None:
+        return None
+    column, op, *value = pred
+    value = value[0] if value else None
+    if isinstance(value, list):
+        value = tuple(value)
+    return (column, op, value)
+
+
+def _within(value, lo, hi, inclusive):
+    if pd.isna(value):
+        return False
+    below = operator.lt if inclusive else operator.le
+    above = operator.gt if inclusive else operator.ge
+    return not ((lo is not None and below(value, lo)) or (hi is not None and above(value, hi)))
+
+
+def _bounds_text(lo, hi, inclusive):
+    lo_op, hi_op = ("<=", "<=") if inclusive else ("<", "<")
+    parts = [f"{lo} {lo_op}" if lo is not None else "", "x", f"{hi_op} {hi}" if hi is not None else ""]
+    return " ".join(p for p in parts if p)
+
+
+# -----------------------------
+# 1. Shared Scans
+# -----------------------------
+class References:
+    """Other tables a contract may point at, with lookups cached across checks."""
+
+    def __init__(self, tables=None):
+        self.tables = dict(tables or {})
+        self._keys = {}
+        self._maxima = {}
+
+    def __contains__(self, name):
+        return name in self.tables
+
+    def keys(self, table, column):
+        """Distinct values of table.column (foreign-key targets)."""
+        if (table, column) not in self._keys:
+            self._keys[(table, column)] = pd.Index(self.tables[table][column].dropna().unique())
+        return self._keys[(table, column)]
+
+    def max_by(self, table, column, on):
+        """Per-key maximum of table.column (temporal ordering against another table)."""
+        if (table, column, on) not in self._maxima:
+            frame = self.tables[table]
+            self._maxima[(table, column, on)] = frame.groupby(on, observed=True, sort=False)[column].max()
+        return self._maxima[(table, column, on)]
+
+
+class _Scan:
+    """Per-table memo of masks and column statistics shared by all its checks."""
+
+    def __init__(self, df, refs):
+        self.df = df
+        self.refs = refs
+        self._masks = {}
+        self._stats = {}
+
+    def mask(self, pred):
+        """Boolean row mask for a frozen predicate (None = all rows)."""
+        if pred is None:
+            return None
+        if pred not in self._masks:
+            column, op, value = pred
+            s = self.df[column]
+            if op in _COMPARE:
+                m = _COMPARE[op](s, value)
+            elif op == "in":
+                m = s.isin(value)
+            elif op == "notnull":
+                m = s.notna()
+            elif op == "isnull":
+                m = s.isna()
+            elif op == "within_quantiles":
+                lo, hi = s.quantile(list(value))
+                m = (s >= lo) & (s <= hi)
+            else:
+                raise ValueError(f"Unknown predicate op: {op}")
+            self._masks[pred] = np.asarray(m, dtype=bool)
+        return self._masks[pred]
+
+    def rows(self, column, where=None):
+        s = self.df[column]
+        m = self.mask(where)
+        return s if m is None else s[m]
+
+    def stats(self, column, where=None):
+        """(rows, nulls, min, max) of a column in one pass; shared by NotNull / InRange."""
+        if (column, where) not in self._stats:
+            s = self.rows(column, where)
+            nulls = int(s.isna().sum())
+            values = s.dropna() if nulls else s
+            unordered = isinstance(s.dtype, pd.CategoricalDtype) and not s.dtype.ordered
+            lo, hi = (values.min(), values.max()) if len(values) and not unordered else (np.nan, np.nan)
+            self._stats[(column, where)] = (len(s), nulls, lo, hi)
+        return self._stats[(column, where)]
+
+
+# -----------------------------
+# 2. Constraint Types
+# -----------------------------
+class Constraint:
+    """Base: `columns` it reads, `stats` it needs, `check(scan)` -> (ok, detail)."""
+
+    refs = ()
+    stats_keys = ()
+
+    def __init__(self, message):
+        self.message = message
+
+
+class Unique(Constraint):
+    def __init__(self, columns, message=None):
+        self.columns = [columns] if isinstance(columns, str) else list(columns)
+        super().__init__(message or f"{', '.join(self.columns)} unique")
+
+    def check(self, scan):
+        df = scan.df
+        if len(self.columns) == 1 and df[self.columns[0]].is_unique:
+            return True, ""
+        dupes = int(df.duplicated(self.columns).sum())
+        return dupes == 0, f"{dupes} duplicate rows"
+
+
+class NotNull(Constraint):
+    def __init__(self, columns, message=None):
+        self.columns = [columns] if isinstance(columns, str) else list(columns)
+        self.stats_keys = [(c, None) for c in self.columns]
+        super().__init__(message or f"{', '.join(self.columns)} not null")
+
+    def check(self, scan):
+        nulls = {c: scan.stats(c)[1] for c in self.columns}
+        bad = {c: n for c, n in nulls.items() if n}
+        return not bad, ", ".join(f"{c}: {n} nulls" for c, n in bad.items())
+
+
+class InRange(Constraint):
+    """
+    Non-null values (of rows matching `where`) within [lo, hi]. A `where`
+    that matches no non-null value fails: the check would otherwise pass
+    without having looked at anything.
+    """
+
+    def __init__(self, column, lo=None, hi=None, where=None, inclusive=True, message=None):
+        self.columns = [column]
+        self.lo, self.hi, self.inclusive = lo, hi, inclusive
+        self.where = _freeze(where)
+        self.columns += [self.where[0]] if self.where else []
+        self.stats_keys = [(column, self.where)]
+        super().__init__(message or f"{column}: {_bounds_text(lo, hi, inclusive)}")
+
+    def check(self, scan):
+        column = self.columns[0]
+        n, nulls, lo, hi = scan.stats(column, self.where)
+        if n == nulls:  # nothing to check
+            if self.where:
+                return False, "no non-null rows where {} {} {!r}".format(*self.where)
+            return True, ""
+        if _within(lo, self.lo, self.hi, self.inclusive) and _within(hi, self.lo, self.hi, self.inclusive):
+            return True, ""
+        outside = int((~self._vector_within(scan.rows(column, self.where).dropna())).sum())
+        return False, f"{outside} rows outside (min {lo}, max {hi})"
+
+    def _vector_within(self, values):
+        ok = np.ones(len(values), dtype=bool)
+        if self.lo is not None:
+            ok &= (values >= self.lo) if self.inclusive else (values > self.lo)
+        if self.hi is not None:
+            ok &= (values <= self.hi) if self.inclusive else (values < self.hi)
+        return ok
+
+
+class OneOf(Constraint):
+    def __init__(self, column, values, message=None):
+        self.columns = [column]
+        self.values = list(values)
+        super().__init__(message or f"{column} in {self.values}")
+
+    def check(self, scan):
+        s = scan.df[self.columns[0]]
+        bad = s.notna() & ~s.isin(self.values)
+        n = int(bad.sum())
+        return n == 0, f"{n} rows, e.g. {s[bad].unique()[:3].tolist()}" if n else ""
+
+
+class ForeignKey(Constraint):
+    """Every non-null value of `column` exists in ref = (table, column)."""
+
+    def __init__(self, column, ref, message=None):
+        self.columns = [column]
+        self.ref = ref
+        self.refs = (ref[0],)
+        super().__init__(message or f"{column} -> {ref[0]}.{ref[1]}")
+
+    def check(self, scan):
+        s = scan.df[self.columns[0]]
+        orphans = int((s.notna() & ~s.isin(scan.refs.keys(*self.ref))).sum())
+        return orphans == 0, f"{orphans} orphan rows"
+
+
+class Implies(Constraint):
+    """Rows matching `if_` also match `then`."""
+
+    def __init__(self, if_, then, message=None):
+        self.if_, self.then = _freeze(if_), _freeze(then)
+        self.columns = [self.if_[0], self.then[0]]
+        super().__init__(message or f"{self.if_} => {self.then}")
+
+    def check(self, scan):
+        n = int((scan.mask(self.if_) & ~scan.mask(self.then)).sum())
+        return n == 0, f"{n} rows"
+
+
+class Before(Constraint):
+    """
+    earlier < later row by row (<= if not strict). `earlier` may be
+    (table, column): then the per-`on` maximum of that table is compared,
+    i.e. every referenced row precedes this one.
+    """
+
+    def __init__(self, earlier, later, on=None, where=None, strict=True, message=None):
+        self.earlier, self.later, self.on, self.strict = earlier, later, on, strict
+        self.where = _freeze(where)
+        local = [] if isinstance(earlier, tuple) else [earlier]
+        self.columns = local + [later] + ([on] if on else []) + ([self.where[0]] if self.where else [])
+        self.refs = (earlier[0],) if isinstance(earlier, tuple) else ()
+        name = ".".join(earlier) if isinstance(earlier, tuple) else earlier
+        super().__init__(message or f"{name} {'<' if strict else '<='} {later}")
+
+    def check(self, scan):
+        if isinstance(self.earlier, tuple):
+            table, column = self.earlier
+            earlier = scan.df[self.on].map(scan.refs.max_by(table, column, self.on))
+        else:
+            earlier = scan.df[self.earlier]
+        later = scan.df[self.later]
+        bad = (earlier >= later) if self.strict else (earlier > later)
+        m = scan.mask(self.where)
+        n = int((bad if m is None else bad & m).sum())
+        return n == 0, f"{n} rows out of order"
+
+
+class Rate(Constraint):
+    """Mean of `column` over rows matching `where` within [lo, hi]."""
+
+    def __init__(self, column, lo=None, hi=None, where=None, inclusive=True, message=None):
+        self.columns = [column]
+        self.lo, self.hi, self.inclusive = lo, hi, inclusive
+        self.where = _freeze(where)
+        self.columns += [self.where[0]] if self.where else []
+        super().__init__(message or f"mean({column}): {_bounds_text(lo, hi, inclusive)}")
+
+    def check(self, scan):
+        rate = scan.rows(self.columns[0], self.where).mean()
+        return _within(rate, self.lo, self.hi, self.inclusive), f"rate {rate:.2%}"
+
+
+class RowShare(Constraint):
+    """len(table) / len(of) within [lo, hi]."""
+
+    def __init__(self, of, lo=None, hi=None, inclusive=True, message=None):
+        self.columns = []
+        self.of = of
+        self.refs = (of,)
+        self.lo, self.hi, self.inclusive = lo, hi, inclusive
+        super().__init__(message or f"rows / {of}: {_bounds_text(lo, hi, inclusive)}")
+
+    def check(self, scan):
+        share = len(scan.df) / max(len(scan.refs.tables[self.of]), 1)
+        return _within(share, self.lo, self.hi, self.inclusive), f"share {share:.2%}"
+
+
+# -----------------------------
+# 3. Compiled Contracts
+# -----------------------------
+class Contract:
+    """
+    Constraints of one table, compiled once: the columns they read and the
+    (column, where) statistics they share, computed in a single pass
+    before any constraint is evaluated.
+    """
+
+    def __init__(self, name, constraints):
+        self.name = name
+        self.constraints = list(constraints)
+        self.columns = sorted({c for con in self.constraints for c in con.columns if c})
+        self.stats_keys = list(dict.fromkeys(k for con in self.constraints for k in con.stats_keys))
+
+    def check(self, df, refs=None):
+        refs = refs if isinstance(refs, References) else References(refs)
+        missing = [c for c in self.columns if c not in df.columns]
+        if missing:
+            raise ContractViolation(f"{self.name}: missing columns {missing}")
+
+        scan = _Scan(df, refs)
+        for column, where in self.stats_keys:  # fused column pass
+            scan.stats(column, where)
+
+        results = []
+        for con in self.constraints:
+            if any(r not in refs for r in con.refs):
+                results.append(CheckResult(self.name, con.message, "skip", f"needs {', '.join(con.refs)}"))
+                continue
+            ok, detail = con.check(scan)
+            results.append(CheckResult(self.name, con.message, "pass" if ok else "fail", detail))
+        return results
+
+
+def check(name, df, refs=None):
+    """Evaluate the named contract; returns CheckResults (never raises on failure)."""
+    with step(f"contract.{name}", rows_in=len(df)):
+        return CONTRACTS[name].check(df, refs)
+
+
+def enforce(name, df, refs=None):
+    """Evaluate the named contract and raise ContractViolation on any failure."""
+    results = check(name, df, refs)
+    failed = [r for r in results if r.status == "fail"]
+    if failed:
+        raise ContractViolation(
+            f"❌ {name} broke its contract:\n" + "\n".join(f"  - {r.message} ({r.detail})" for r in failed)
+        )
+    return results
+
+
+def enforce_tables(tables, refs=None):
+    """Enforce every named table's contract; the tables double as each other's references."""
+    refs = References({**(refs or {}), **tables})
+    return {name: enforce(name, df, refs) for name, df in tables.items()}
+
+
+# -----------------------------
+# 4. Declarations
+# -----------------------------
+SEGMENTS = ["persuadable", "sure_thing", "lost_cause", "sleeping_dog"]
+
+INELIGIBLE_NEVER_TREATED = Implies(
+    ("eligibility_flag", "==", 0), ("treatment_flag", "==", 0),
+    message="No ineligible users were treated."
+)
+
+MODEL_INPUT_COLS = [
+    "login_days_l7", "login_days_30d", "core_actions_30d", "collab_actions_30d",
+    "time_spent_30d", "feature_diversity_avg_30d", "days_observed_30d", "days_since_last_active",
+]
+
+CONTRACTS = {c.name: c for c in [
+    # Raw tables (generators write them; cleaning and validation re-check them together)
+    Contract("raw.accounts", [
+        Unique("account_id"),
+        NotNull(["account_id", "plan_tier", "seat_count"]),
+        OneOf("plan_tier", ["starter", "growth", "enterprise"]),
+        InRange("seat_count", lo=1),
+        InRange("cs_assigned_flag", 0, 1),
+        InRange("account_health_score", 0, 1),
+    ]),
+    Contract("raw.users", [
+        Unique("user_id", message="User IDs are unique."),
+        NotNull(["user_id", "account_id", "user_created_date", "role_type"]),
+        OneOf("role_type", ["admin", "power_user", "basic"]),
+        ForeignKey("account_id", ("raw.accounts", "account_id")),
+    ]),
+    Contract("raw.activity", [
+        Unique(["user_id", "activity_date"]),
+        NotNull(["user_id", "activity_date"]),
+        InRange("login_flag", 0, 1),
+        InRange("core_action_count", lo=0),
+        InRange("collab_action_count", lo=0),
+        InRange("time_spent_minutes", lo=0),
+        ForeignKey("user_id", ("raw.users", "user_id")),
+        Before(("raw.users", "user_created_date"), "activity_date", on="user_id", strict=False,
+               message="No activity before the user was created."),
+    ]),
+    Contract("raw.latent", [
+        Unique("user_id"),
+        OneOf("latent_uplift_group", SEGMENTS),
+        ForeignKey("user_id", ("raw.users", "user_id")),
+    ]),
+    Contract("raw.interventions", [
+        Unique("intervention_id"),
+        Unique("user_id"),
+        NotNull(["intervention_id", "user_id", "intervention_date"]),
+        InRange("eligibility_flag", 0, 1),
+        InRange("treatment_flag", 0, 1),
+        OneOf("delivery_channel", ["in_app", "email", "both"]),
+        INELIGIBLE_NEVER_TREATED,
+        ForeignKey("user_id", ("raw.users", "user_id")),
+        Before(("raw.activity", "activity_date"), "intervention_date", on="user_id",
+               message="All activity strictly precedes intervention."),
+        RowShare("raw.users", hi=0.90, inclusive=False,
+                 message="Population eligibility rate is below 90%."),
+    ]),
+    Contract("raw.outcomes", [
+        Unique("intervention_id"),
+        InRange("collab_activated_flag", 0, 1),
+        Implies(("collab_activated_flag", "!=", 1), ("activation_date", "isnull"),
+                message="Only activations carry an activation date."),
+        ForeignKey("intervention_id", ("raw.interventions", "intervention_id")),
+        Before(("raw.interventions", "intervention_date"), "activation_date", on="intervention_id",
+               where=("collab_activated_flag", "==", 1),
+               message="All activations strictly follow interventions."),
+    ]),
+
+    # Stage outputs
+    Contract("treatment_assignment", [INELIGIBLE_NEVER_TREATED]),
+    Contract("modeling_base", [
+        Unique("user_id"),
+        Unique("intervention_id"),
+        NotNull(["user_id", "account_id", "treatment_flag", "outcome_observed_flag"] + MODEL_INPUT_COLS),
+        InRange("treatment_flag", 0, 1),
+        InRange("days_since_last_active", 0, 30),
+        Implies(("outcome_observed_flag", "==", 0), ("collab_activated_flag", "isnull"),
+                message="Unobserved outcomes stay missing (never imputed)."),
+        Implies(("outcome_observed_flag", "==", 1), ("collab_activated_flag", "notnull")),
+    ]),
+    Contract("features", [
+        Unique("user_id"),
+        NotNull(["user_id", "treatment_flag", "outcome_observed_flag"] + MODEL_INPUT_COLS),
+        InRange("treatment_flag", 0, 1),
+        InRange("momentum_ratio", 0, 1),
+        InRange("collab_intensity_ratio", lo=0),
+    ]),
+    Contract("scores", [
+        Unique("user_id"),
+        NotNull(["user_id", "pred_uplift", "treatment_flag"]),
+        InRange("pred_uplift", -1, 1),
+    ]),
+    Contract("account_policy", [
+        Unique("account_id"),
+        NotNull(["account_id", "decision", "net_account_value"]),
+        OneOf("decision", ["suppress_toxic_admin", "suppress_toxic_users", "suppress_unprofitable",
+                           "suppress_too_small", "treat_account"]),
+        InRange("n_users", lo=1),
+        InRange("dog_rate", 0, 1),
+    ]),
+
+    # Validation audits (derived frames built in 01_validate_data.py)
+    Contract("audit.eligibility_activity", [
+        Rate("is_eligible", hi=0.20, where=("login_days", "<", 3), inclusive=False,
+             message="Low-activity users are mostly excluded."),
+        Rate("is_eligible", lo=0.40, where=("login_days", "within_quantiles", [0.25, 0.75]), inclusive=False,
+             message="Eligibility concentrates in mid-activity band."),
+        Rate("is_eligible", hi=0.30, where=("avg_diversity", ">", 2), inclusive=False,
+             message="High-diversity users are mostly excluded."),
+    ]),
+    Contract("audit.uplift_by_segment", [
+        InRange("observed_lift", lo=0.10, where=("latent_uplift_group", "==", "persuadable"), inclusive=False,
+                message="Persuadables lift under treatment."),
+        InRange("observed_lift", hi=-0.05, where=("latent_uplift_group", "==", "sleeping_dog"), inclusive=False,
+                message="Sleeping Dogs backfire under treatment."),
+    ]),
+]}
@@ -0,0 +1,193 @@
+# =========================================
+# Shared Library: User Dimension Index
+# Purpose: user -> account / role lookups as integer gathers (no CSV re-parse)
+# =========================================
+#
+# Layout of data/index/ (all .npy files are opened memory-mapped):
+#   users_dim.npy       structured rows (user_key int64, account_code int32, role_code int8)
+#   key_to_row.npy      dense int32 table: user_key -> row in users_dim (-1 = unknown)
+#   account_vocab.npy   account_code -> account_id (fixed-width strings)
+#   manifest.json       role vocabulary, source file signature (size, sha256)
+# User / account keys follow common/keys.py.
+
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/ (also runnable as a script)
+from common.keys import NULL_KEY, encode_key, decode_key
+
+RAW_DIR = Path("data/raw")
+USERS_FILE = RAW_DIR / "users_raw.csv"
+INDEX_DIR = Path("data/index")
+INDEX_FILES = ["users_dim.npy", "key_to_row.npy", "account_vocab.npy", "manifest.json"]
+
+USERS_DIM_DTYPE = np.dtype([("user_key", np.int64), ("account_code", np.int32), ("role_code", np.int8)])
+
+
+def _atomic_save(path, arr):
+    """np.save via rename, so a concurrent reader never maps a half-written file."""
+    tmp = path.with_name(path.stem + ".tmp.npy")
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _source_signature(path):
+    # Content only (no mtime): a rebuild from identical users writes an identical
+    # manifest, and a users file restored from the pipeline cache stays fresh
+    return {"path": str(path), "size": Path(path).stat().st_size, "sha256": _file_sha256(path)}
+
+
+# -----------------------------
+# Build
+# -----------------------------
+def build_dimension_index(users=None, users_file=USERS_FILE, index_dir=INDEX_DIR):
+    """
+    Encode users_raw.csv (or an in-memory users frame) once into the
+    columnar index. Account codes follow sorted account_id order.
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    if users is None:
+        users = pd.read_csv(users_file, usecols=["user_id", "account_id", "role_type"])
+
+    user_key = encode_key(users["user_id"], "user_id")
+    account_code, account_vocab = pd.factorize(users["account_id"], sort=True)
+    role_code, role_vocab = pd.factorize(users["role_type"], sort=True)
+
+    dim = np.empty(len(users), dtype=USERS_DIM_DTYPE)
+    dim["user_key"] = user_key
+    dim["account_code"] = account_code
+    dim["role_code"] = role_code
+    _atomic_save(index_dir / "users_dim.npy", dim)
+
+    key_to_row = np.full(int(user_key.max()) + 1 if len(user_key) else 0, -1, dtype=np.int32)
+    key_to_row[user_key] = np.arange(len(user_key), dtype=np.int32)
+    _atomic_save(index_dir / "key_to_row.npy", key_to_row)
+
+    _atomic_save(index_dir / "account_vocab.npy", np.asarray(account_vocab, dtype=str))
+
+    manifest = {
+        "source": _source_signature(users_file) if Path(users_file).exists() else None,
+        "n_users": int(len(users)),
+        "n_accounts": int(len(account_vocab)),
+        "role_vocab": [str(r) for r in role_vocab],
+    }
+    tmp = index_dir / "manifest.json.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, index_dir / "manifest.json")
+    return manifest
+
+
+# -----------------------------
+# Open / Query
+# -----------------------------
+class DimensionIndex:
+    """Read-only, memory-mapped view of the user dimension."""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        index_dir = Path(index_dir)
+        with open(index_dir / "manifest.json") as f:
+            self.manifest = json.load(f)
+
+        self.users = np.load(index_dir / "users_dim.npy", mmap_mode="r")
+        self.key_to_row = np.load(index_dir / "key_to_row.npy", mmap_mode="r")
+        self.account_vocab = np.load(index_dir / "account_vocab.npy", mmap_mode="r")
+        self.role_vocab = self.manifest["role_vocab"]
+        self.account_keys = encode_key(self.account_vocab, "account_id")
+
+    def __len__(self):
+        return len(self.users)
+
+    def rows(self, user_ids):
+        """Row of each user (string IDs or integer keys; -1 for unknown users)."""
+        keys = encode_key(user_ids, "user_id")
+        in_range = (keys >= 0) & (keys < len(self.key_to_row))
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        rows[in_range] = self.key_to_row[keys[in_range]]
+        return rows
+
+    def _gather(self, field, user_ids):
+        rows = self.rows(user_ids)
+        known = rows >= 0
+        codes = np.asarray(self.users[field][np.where(known, rows, 0)], dtype=np.int64)
+        codes[~known] = -1
+        return codes
+
+    def account_codes(self, user_ids):
+        """Account code per user (-1 for unknown users)."""
+        return self._gather("account_code", user_ids)
+
+    def role_codes(self, user_ids):
+        """Role code per user (-1 for unknown users)."""
+        return self._gather("role_code", user_ids)
+
+    def account_ids(self, codes):
+        """Decode account codes (export boundary only)."""
+        return self.account_vocab[np.asarray(codes)].astype(object)
+
+    def roles(self, codes):
+        """Role codes as a Categorical (compares / groups without string hashing)."""
+        return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int8), categories=self.role_vocab)
+
+    def lookup(self, user_ids, columns=("account_id", "role_type"), decode=True):
+        """
+        Drop-in replacement for merging users_raw.csv columns onto user_ids.
+        Unknown users get NaN (or NULL_KEY account keys when decode=False).
+        """
+        out = {}
+        if "account_id" in columns:
+            codes = self.account_codes(user_ids)
+            acct = self.account_keys[np.maximum(codes, 0)]
+            acct[codes < 0] = NULL_KEY
+            out["account_id"] = decode_key(acct, "account_id") if decode else acct
+        if "role_type" in columns:
+            out["role_type"] = self.roles(self.role_codes(user_ids))
+        return pd.DataFrame(out)
+
+    def frame(self, columns=("user_id", "account_id", "role_type")):
+        """The whole user dimension in users_raw.csv row order (decoded)."""
+        out = {}
+        if "user_id" in columns:
+            out["user_id"] = decode_key(self.users["user_key"], "user_id")
+        if "account_id" in columns:
+            out["account_id"] = self.account_ids(self.users["account_code"])
+        if "role_type" in columns:
+            out["role_type"] = np.asarray(self.role_vocab, dtype=object)[self.users["role_code"]]
+        return pd.DataFrame(out)
+
+
+def index_is_fresh(users_file=USERS_FILE, index_dir=INDEX_DIR):
+    manifest_path = Path(index_dir) / "manifest.json"
+    if not manifest_path.exists():
+        return False
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    return Path(users_file).exists() and manifest["source"] == _source_signature(users_file)
+
+
+def open_dimension_index(users_file=USERS_FILE, index_dir=INDEX_DIR):
+    """Open the index, (re)building it first only if users_raw.csv changed."""
+    if not index_is_fresh(users_file, index_dir) and Path(users_file).exists():
+        build_dimension_index(users_file=users_file, index_dir=index_dir)
+    return DimensionIndex(index_dir)
+
+
+if __name__ == "__main__":
+    manifest = build_dimension_index()
+    print(f"Dimension index built at {INDEX_DIR}: {manifest['n_users']:,} users, "
+          f"{manifest['n_accounts']:,} accounts.")
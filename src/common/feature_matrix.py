@@ -0,0 +1,225 @@
+# =========================================
+# Shared Library: Published Feature Matrix
+# Purpose: features_user_level as one read-only mmap block for many readers
+# =========================================
+#
+# Feature engineering publishes the feature table next to its CSV; training,
+# scoring, evaluation and tuning attach to it instead of each parsing (and
+# holding) their own copy. Attached processes share the OS page cache, so
+# memory stays flat however many consumers run.
+#
+# Layout of data/features/matrix/ (all .npy files are opened memory-mapped):
+#   values.npy       float64 (rows x columns), column-major: every column and
+#                    every run of adjacent columns is a zero-copy view
+#   row_ids.npy      structured rows (user_id, account_id, intervention_id) int32 keys
+#                    + source_row (the row's position in the CSV)
+#   key_to_row.npy   dense int32 table: user_key -> row (-1 = not in the table)
+#   manifest.json    column order + original dtypes, source CSV signature,
+#                    shape + sha256 of each array (written last)
+# Each file is replaced atomically, but a reader can still pair one publish's
+# manifest with another's arrays; FeatureMatrix checks what it mapped against
+# the manifest and re-attaches until both come from the same publish.
+# Rows flagged by `leading` (outcome observed) are stored first, so the rows
+# the models train on are one contiguous range too. ID keys follow common/keys.py.
+
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from common.keys import KEY_DTYPE, encode_key, read_encoded_csv
+
+FEAT_DIR = Path("data/features")
+FEATURE_FILE = FEAT_DIR / "features_user_level.csv"
+MATRIX_DIR = FEAT_DIR / "matrix"
+
+ID_COLS = ["user_id", "account_id", "intervention_id"]
+ROW_IDS_DTYPE = np.dtype([(c, KEY_DTYPE) for c in ID_COLS] + [("source_row", np.int32)])
+MATRIX_FILES = ["values.npy", "row_ids.npy", "key_to_row.npy", "manifest.json"]
+ARRAYS = {"values": "values.npy", "row_ids": "row_ids.npy", "key_to_row": "key_to_row.npy"}
+ATTACH_RETRIES = 5
+
+
+def _atomic_save(path, arr):
+    """np.save via rename, so a concurrent reader never maps a half-written file."""
+    tmp = path.with_name(path.stem + ".tmp.npy")
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+
+def _array_signature(arr):
+    """Shape + sha256 of the data bytes in storage order (no copy for mapped arrays)."""
+    data = np.ravel(arr, order="K").view(np.uint8)
+    return {"shape": list(arr.shape), "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def _source_signature(path):
+    stat = Path(path).stat()
+    return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+# -----------------------------
+# Publish
+# -----------------------------
+def publish_feature_matrix(features, feature_file=FEATURE_FILE, matrix_dir=MATRIX_DIR,
+                           trailing=(), leading=None):
+    """
+    Write the feature table (ID columns + numeric / bool columns) as a
+    memory-mappable block. `trailing` columns are stored last so the rest
+    form one contiguous run (see FeatureMatrix.block); rows where the
+    `leading` flag is 1 are stored first, in table order (see rows_where).
+    """
+    matrix_dir = Path(matrix_dir)
+    matrix_dir.mkdir(parents=True, exist_ok=True)
+
+    value_cols = [c for c in features.columns if c not in ID_COLS and c not in trailing] + list(trailing)
+
+    order = np.arange(len(features))
+    if leading is not None:
+        lead = features[leading].to_numpy() == 1
+        order = np.concatenate([np.flatnonzero(lead), np.flatnonzero(~lead)])
+
+    values = np.empty((len(features), len(value_cols)), dtype=np.float64, order="F")
+    for j, c in enumerate(value_cols):
+        values[:, j] = features[c].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+    _atomic_save(matrix_dir / "values.npy", values)
+
+    row_ids = np.empty(len(features), dtype=ROW_IDS_DTYPE)
+    for c in ID_COLS:
+        row_ids[c] = encode_key(features[c], c)[order]
+    row_ids["source_row"] = order
+    _atomic_save(matrix_dir / "row_ids.npy", row_ids)
+
+    user_key = row_ids["user_id"]
+    key_to_row = np.full(int(user_key.max()) + 1 if len(user_key) else 0, -1, dtype=np.int32)
+    key_to_row[user_key[user_key >= 0]] = np.flatnonzero(user_key >= 0).astype(np.int32)
+    _atomic_save(matrix_dir / "key_to_row.npy", key_to_row)
+
+    arrays = {"values": values, "row_ids": row_ids, "key_to_row": key_to_row}
+    manifest = {
+        "source": _source_signature(feature_file) if Path(feature_file).exists() else None,
+        "n_rows": int(len(features)),
+        "columns": [{"name": c, "dtype": str(features[c].dtype)} for c in value_cols],
+        "id_columns": [c for c in features.columns if c in ID_COLS],
+        "column_order": list(features.columns),
+        "leading": None if leading is None else {"column": leading, "n_rows": int(lead.sum())},
+        "arrays": {name: _array_signature(arr) for name, arr in arrays.items()},
+    }
+    tmp = matrix_dir / "manifest.json.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, matrix_dir / "manifest.json")
+    return manifest
+
+
+def matrix_is_fresh(feature_file=FEATURE_FILE, matrix_dir=MATRIX_DIR):
+    """True when every matrix file exists and was written (with array signatures) from the current feature CSV."""
+    manifest_path = Path(matrix_dir) / "manifest.json"
+    if not all((Path(matrix_dir) / name).exists() for name in MATRIX_FILES) or not Path(feature_file).exists():
+        return False
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    return "arrays" in manifest and manifest["source"] == _source_signature(feature_file)
+
+
+# -----------------------------
+# Attach / Query
+# -----------------------------
+class FeatureMatrix:
+    """Read-only, memory-mapped view of the published feature table."""
+
+    def __init__(self, matrix_dir=MATRIX_DIR):
+        matrix_dir = Path(matrix_dir)
+        for attempt in range(ATTACH_RETRIES):
+            with open(matrix_dir / "manifest.json") as f:
+                self.manifest = json.load(f)
+            arrays = {name: np.load(matrix_dir / file, mmap_mode="r") for name, file in ARRAYS.items()}
+            # A publish that lands between the manifest read and the loads shows up here
+            if all(_array_signature(arr) == self.manifest["arrays"][name] for name, arr in arrays.items()):
+                break
+            time.sleep(0.05 * (attempt + 1))
+        else:
+            raise RuntimeError(f"{matrix_dir} kept changing while attaching; is it being republished?")
+
+        self.values = arrays["values"]
+        self.row_ids = arrays["row_ids"]
+        self.key_to_row = arrays["key_to_row"]
+        self.columns = [c["name"] for c in self.manifest["columns"]]
+        self.dtypes = {c["name"]: c["dtype"] for c in self.manifest["columns"]}
+        self._position = {c: j for j, c in enumerate(self.columns)}
+        # Storage -> CSV row order (identity unless rows were partitioned at publish)
+        self._source_order = (
+            slice(None) if self.manifest.get("leading") is None
+            else np.argsort(self.row_ids["source_row"])
+        )
+
+    def __len__(self):
+        return len(self.values)
+
+    def column(self, name):
+        """One column as a zero-copy float64 view."""
+        return self.values[:, self._position[name]]
+
+    def block(self, columns):
+        """
+        2-D float64 array of `columns` (in that order): a zero-copy view when
+        they are adjacent in storage, a gathered copy otherwise.
+        """
+        idx = [self._position[c] for c in columns]
+        if idx and idx == list(range(idx[0], idx[0] + len(idx))):
+            return self.values[:, idx[0]:idx[0] + len(idx)]
+        return self.values[:, idx]
+
+    def rows(self, user_ids):
+        """Row of each user (string IDs or integer keys; -1 for users not in the table)."""
+        keys = encode_key(user_ids, "user_id")
+        in_range = (keys >= 0) & (keys < len(self.key_to_row))
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        rows[in_range] = self.key_to_row[keys[in_range]]
+        return rows
+
+    def rows_where(self, flag):
+        """
+        Rows with `flag` == 1: a slice when the matrix was published with
+        leading=flag (blocks of them stay zero-copy views), else an index array.
+        """
+        leading = self.manifest.get("leading")
+        if leading and leading["column"] == flag:
+            return slice(0, leading["n_rows"])
+        return np.flatnonzero(self.column(flag) == 1)
+
+    def frame(self, columns=None, rows=None):
+        """
+        The feature table as read_encoded_csv would return it (int32 ID keys,
+        original dtypes, CSV row order), or only `rows` of it in storage order.
+        Float columns stay views of the mapping when rows is a slice; int /
+        bool columns are cast back (small copies).
+        """
+        columns = columns or self.manifest["column_order"]
+        rows = self._source_order if rows is None else rows
+        data = {}
+        for c in columns:
+            if c in ID_COLS:
+                data[c] = np.asarray(self.row_ids[c][rows])
+            elif self.dtypes[c] == "float64":
+                data[c] = self.column(c)[rows]
+            else:
+                data[c] = self.column(c)[rows].astype(self.dtypes[c])
+        return pd.DataFrame(data, copy=False)
+
+
+def open_feature_matrix(matrix_dir=MATRIX_DIR):
+    return FeatureMatrix(matrix_dir)
+
+
+def load_features(feature_file=FEATURE_FILE, matrix_dir=MATRIX_DIR):
+    """
+    The published FeatureMatrix when fresh, else the DataFrame parsed from the
+    CSV. Model code accepts either (see feature_cache.observed_inputs).
+    """
+    if matrix_is_fresh(feature_file, matrix_dir):
+        return open_feature_matrix(matrix_dir)
+    return read_encoded_csv(feature_file)
@@ -0,0 +1,202 @@
+# =========================================
+# Shared Library: Stage Instrumentation
+# Purpose: Timers, Memory Watermarks & Row Counts -> JSON Run Report
+# =========================================
+#
+# Key operations are wrapped in `step(...)` blocks:
+#
+#     with step("cleaning.activity_window", rows_in=len(activity)) as s:
+#         window = ...
+#         s.rows_out = len(window)
+#
+# Recording is always on and cheap (a clock read and /proc/self/statm per
+# block). tracemalloc watermarks are opt-in (UPLIFT_TRACEMALLOC=1) since
+# tracing slows every allocation. When UPLIFT_PROFILE_DIR is set (the
+# pipeline runner sets it), the process writes <dir>/<stage>.json at exit.
+
+import atexit
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROFILE_DIR_ENV = "UPLIFT_PROFILE_DIR"
+STAGE_ENV = "UPLIFT_STAGE"
+TRACEMALLOC_ENV = "UPLIFT_TRACEMALLOC"
+
+MB = 1024 * 1024
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# -----------------------------
+# Memory Probes
+# -----------------------------
+def current_rss_mb():
+    """Resident set size right now (Linux /proc; peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / MB
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    """Process high-water mark (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+
+# -----------------------------
+# Step Records
+# -----------------------------
+class Step:
+    """One timed block; set rows_out (and rows_in) from inside the block."""
+
+    __slots__ = ("name", "depth", "rows_in", "rows_out", "seconds",
+                 "rss_start_mb", "rss_end_mb", "peak_rss_mb", "traced_peak_mb", "_traced_peak")
+
+    def __init__(self, name, depth, rows_in=None):
+        self.name = name
+        self.depth = depth
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.seconds = None
+        self.rss_start_mb = None
+        self.rss_end_mb = None
+        self.peak_rss_mb = None
+        self.traced_peak_mb = None
+        self._traced_peak = 0
+
+    def as_dict(self):
+        record = {
+            "step": self.name,
+            "depth": self.depth,
+            "seconds": round(self.seconds, 4),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rss_mb": round(self.rss_end_mb, 1),
+            "rss_delta_mb": round(self.rss_end_mb - self.rss_start_mb, 1),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+        }
+        if self.traced_peak_mb is not None:
+            record["traced_peak_mb"] = round(self.traced_peak_mb, 1)
+        return record
+
+
+class Recorder:
+    """Collects Step records for one process (one stage run)."""
+
+    def __init__(self, trace_memory=False):
+        self.steps = []
+        self._stack = []
+        self.started = time.perf_counter()
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def step(self, name, rows_in=None):
+        record = Step(name, len(self._stack), rows_in)
+        self.steps.append(record)
+
+        if self.trace_memory:
+            # The parent's peak so far survives the reset below
+            traced_start, traced_peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                parent = self._stack[-1]
+                parent._traced_peak = max(parent._traced_peak, traced_peak)
+            tracemalloc.reset_peak()
+            record._traced_peak = traced_start
+
+        self._stack.append(record)
+        record.rss_start_mb = current_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            record.rss_end_mb = current_rss_mb()
+            record.peak_rss_mb = max(peak_rss_mb(), record.rss_end_mb)
+            self._stack.pop()
+
+            if self.trace_memory:
+                _, traced_peak = tracemalloc.get_traced_memory()
+                record._traced_peak = max(record._traced_peak, traced_peak)
+                record.traced_peak_mb = (record._traced_peak - traced_start) / MB
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent._traced_peak = max(parent._traced_peak, record._traced_peak)
+                tracemalloc.reset_peak()
+
+    def report(self, stage=None):
+        return {
+            "stage": stage or os.environ.get(STAGE_ENV) or Path(sys.argv[0]).stem,
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "wall_s": round(time.perf_counter() - self.started, 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "tracemalloc": self.trace_memory,
+            "steps": [s.as_dict() for s in self.steps if s.seconds is not None],
+        }
+
+    def write(self, path, stage=None):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(stage), f, indent=2)
+        return path
+
+
+RECORDER = Recorder(trace_memory=os.environ.get(TRACEMALLOC_ENV) == "1")
+
+
+def step(name, rows_in=None):
+    """Time a block in the process-wide recorder (see module header)."""
+    return RECORDER.step(name, rows_in)
+
+
+def _write_stage_report():
+    profile_dir = os.environ.get(PROFILE_DIR_ENV)
+    if profile_dir and RECORDER.steps:
+        stage = os.environ.get(STAGE_ENV) or Path(sys.argv[0]).stem
+        RECORDER.write(Path(profile_dir) / f"{stage}.json", stage)
+
+
+atexit.register(_write_stage_report)
+
+
+# -----------------------------
+# Run Comparison (Regression Check)
+# -----------------------------
+def compare_runs(baseline, current, min_ratio=1.25, min_seconds=0.5):
+    """
+    Stages / steps of two pipeline run reports that got slower by more than
+    `min_ratio` (ignoring anything under `min_seconds` in both runs).
+    Returns rows of (name, baseline_s, current_s, ratio).
+    """
+    def timings(run):
+        out = {}
+        for stage in run["stages"]:
+            if stage.get("status") != "ran":
+                continue
+            out[stage["stage"]] = stage["duration_s"]
+            for s in stage.get("steps", []):
+                # Repeated step names (e.g. several CSV reads) are summed
+                key = f"{stage['stage']}/{s['step']}"
+                out[key] = out.get(key, 0.0) + s["seconds"]
+        return out
+
+    base, cur = timings(baseline), timings(current)
+    regressions = []
+    for name in base.keys() & cur.keys():
+        before, after = base[name], cur[name]
+        if max(before, after) < min_seconds:
+            continue
+        ratio = after / before if before > 0 else float("inf")
+        if ratio >= min_ratio:
+            regressions.append((name, before, after, ratio))
+    return sorted(regressions, key=lambda r: -r[3])
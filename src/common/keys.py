@@ -0,0 +1,97 @@
+# =========================================
+# Shared Library: Surrogate Key Encoding
+# Purpose: Prefixed string IDs <-> integer keys (decode only at export)
+# =========================================
+#
+# Every ID is generated as <prefix><zero-padded counter> (see
+# src/01_data_generation), so the counter already IS a stable surrogate key:
+# encoding is a vectorized slice, decoding a zero-pad, and no vocabulary has
+# to be shared between stages. Joins / groupbys then hash int32 instead of
+# Python strings, and low-cardinality labels travel as categoricals.
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from common.instrumentation import step
+
+NULL_KEY = -1
+KEY_DTYPE = np.int32
+
+# id column -> (prefix, zero-pad width) as written by the generators
+KEY_SPECS = {
+    "user_id": ("user_", 7),
+    "account_id": ("acct_", 5),
+    "intervention_id": ("intv_", 7),
+}
+
+# Low-cardinality string labels carried as pandas categoricals
+CATEGORY_COLS = [
+    "role_type", "plan_tier", "industry", "geo_region",
+    "delivery_channel", "account_size_bucket", "latent_uplift_group",
+]
+
+
+# -----------------------------
+# Single Columns
+# -----------------------------
+def encode_key(ids, column):
+    """'user_0000123' -> 123 for an ID column; missing IDs -> NULL_KEY."""
+    prefix, _ = KEY_SPECS[column]
+    ids = pd.Series(ids, copy=False)
+    if pd.api.types.is_integer_dtype(ids.dtype):  # already encoded
+        return ids.to_numpy(dtype=KEY_DTYPE)
+    if ids.isna().all():
+        return np.full(len(ids), NULL_KEY, dtype=KEY_DTYPE)
+    keys = pd.to_numeric(ids.str.slice(len(prefix)))
+    return keys.fillna(NULL_KEY).to_numpy(dtype=KEY_DTYPE)
+
+
+def decode_key(keys, column):
+    """123 -> 'user_0000123' (export boundary only); NULL_KEY -> NaN."""
+    prefix, width = KEY_SPECS[column]
+    keys = np.asarray(keys)
+    ids = (prefix + pd.Series(keys).astype(str).str.zfill(width)).to_numpy(dtype=object)
+    ids[keys == NULL_KEY] = np.nan
+    return ids
+
+
+# -----------------------------
+# Whole Frames
+# -----------------------------
+def encode_frame(df):
+    """Encode every known ID column to integer keys and labels to categoricals."""
+    encoded = {c: encode_key(df[c], c) for c in df.columns if c in KEY_SPECS}
+    encoded.update({
+        c: df[c].astype("category")
+        for c in df.columns
+        if c in CATEGORY_COLS and not isinstance(df[c].dtype, pd.CategoricalDtype)
+    })
+    return df.assign(**encoded)
+
+
+def decode_frame(df):
+    """Decode integer key columns back to their string IDs."""
+    decoded = {
+        c: decode_key(df[c], c)
+        for c in df.columns
+        if c in KEY_SPECS and pd.api.types.is_integer_dtype(df[c].dtype)
+    }
+    return df.assign(**decoded)
+
+
+def read_encoded_csv(path, **kwargs):
+    """read_csv that parses labels straight into categoricals and encodes IDs."""
+    dtype = {c: "category" for c in CATEGORY_COLS}
+    dtype.update(kwargs.pop("dtype", {}))
+    with step(f"read_csv:{Path(path).name}") as s:
+        df = encode_frame(pd.read_csv(path, dtype=dtype, **kwargs))
+        s.rows_out = len(df)
+    return df
+
+
+def to_decoded_csv(df, path, **kwargs):
+    """Export boundary: write df with string IDs restored."""
+    kwargs.setdefault("index", False)
+    with step(f"to_csv:{Path(path).name}", rows_in=len(df)):
+        decode_frame(df).to_csv(path, **kwargs)
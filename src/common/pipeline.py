@@ -0,0 +1,323 @@
+# =========================================
+# Shared Library: DAG Pipeline Runner
+# Purpose: Stage Graph -> Content-Addressed Output Cache -> Parallel Execution
+# =========================================
+#
+# A stage is a script with declared input / output files. Its cache key is
+# the SHA-256 of its code (script + the sibling / common modules it
+# imports), its arguments and the content of its inputs. Outputs are kept
+# in a content-addressed object store, so a stage whose key was seen
+# before is either already fresh or restored from the store (no rerun).
+# Stages run as subprocesses; per-stage wall time and peak RSS come from
+# os.wait4 on the child, and the step timings each stage records through
+# common.instrumentation are folded into its record in the run report.
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+from pathlib import Path
+
+from common.instrumentation import PROFILE_DIR_ENV, STAGE_ENV
+
+CACHE_DIR = Path("data/pipeline_cache")
+OBJECTS_DIR = CACHE_DIR / "objects"
+LOG_DIR = CACHE_DIR / "logs"
+LEDGER_FILE = CACHE_DIR / "ledger.json"
+PROFILE_DIR = CACHE_DIR / "profiles"
+
+HASH_CHUNK = 1 << 20
+WORKERS_ENV = "UPLIFT_WORKERS"  # per-stage CPU budget set by run_pipeline
+IMPORT_RE = re.compile(r"^\s*(?:from|import)\s+([A-Za-z_]\w*)", re.MULTILINE)
+
+
+class Stage:
+    """
+    One pipeline step: `python script *args`, reading inputs, writing outputs.
+    logs are append-only side files (run histories) the stage also writes;
+    they are not hashed, cached or restored like outputs.
+    """
+
+    def __init__(self, name, script, inputs=(), outputs=(), args=(), logs=()):
+        self.name = name
+        self.script = Path(script)
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.args = [str(a) for a in args]
+        self.logs = [Path(p) for p in logs]
+
+    def code_files(self):
+        """The script plus every sibling / src/common module it imports (transitively)."""
+        src_dir = Path(__file__).resolve().parents[1]
+        seen, todo = [], [self.script]
+        while todo:
+            path = todo.pop()
+            if path in seen or not path.exists():
+                continue
+            seen.append(path)
+            for mod in IMPORT_RE.findall(path.read_text(encoding="utf-8")):
+                if mod == "common":
+                    todo.extend(sorted((src_dir / "common").glob("*.py")))
+                else:
+                    todo.append(path.parent / f"{mod}.py")
+        return sorted(seen)
+
+
+# -----------------------------
+# Hashing (memoized on size + mtime)
+# -----------------------------
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Ledger:
+    """Persistent record of file hashes, stage keys and cached outputs."""
+
+    def __init__(self, path=LEDGER_FILE):
+        self.path = Path(path)
+        data = json.loads(self.path.read_text()) if self.path.exists() else {}
+        self.files = data.get("files", {})
+        self.stages = data.get("stages", {})
+        self.cache = data.get("cache", {})
+
+    def file_hash(self, path):
+        path = Path(path)
+        if not path.exists():
+            return None
+        stat = path.stat()
+        memo = self.files.get(str(path))
+        if memo and memo["size"] == stat.st_size and memo["mtime_ns"] == stat.st_mtime_ns:
+            return memo["sha256"]
+        digest = _sha256(path)
+        self.files[str(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        return digest
+
+    def stage_key(self, stage):
+        h = hashlib.sha256()
+        h.update(json.dumps([str(stage.script), stage.args, [str(p) for p in stage.outputs]]).encode())
+        for path in stage.code_files():
+            h.update(f"code:{path.name}:{self.file_hash(path)}".encode())
+        for path in stage.inputs:
+            h.update(f"input:{path}:{self.file_hash(path)}".encode())
+        return h.hexdigest()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"files": self.files, "stages": self.stages, "cache": self.cache}, indent=1))
+        os.replace(tmp, self.path)
+
+
+def _object_path(digest):
+    return OBJECTS_DIR / digest[:2] / digest
+
+
+def store_outputs(ledger, stage, key):
+    """Copy fresh outputs into the object store and record them under the key."""
+    outputs = {}
+    for path in stage.outputs:
+        digest = ledger.file_hash(path)
+        obj = _object_path(digest)
+        if not obj.exists():
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, obj)
+        outputs[str(path)] = digest
+    ledger.cache[key] = outputs
+    ledger.stages[stage.name] = key
+
+
+def cache_status(ledger, stage, key):
+    """'fresh' (outputs on disk match the key), 'restorable', or None (must run)."""
+    outputs = ledger.cache.get(key)
+    if outputs is None or set(outputs) != {str(p) for p in stage.outputs}:
+        return None
+    if all(ledger.file_hash(p) == digest for p, digest in outputs.items()):
+        return "fresh"
+    if all(_object_path(digest).exists() for digest in outputs.values()):
+        return "restorable"
+    return None
+
+
+def restore_outputs(ledger, stage, key):
+    for path, digest in ledger.cache[key].items():
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(_object_path(digest), path)
+        ledger.file_hash(path)
+    ledger.stages[stage.name] = key
+
+
+# -----------------------------
+# Execution
+# -----------------------------
+def stage_workers():
+    """
+    Worker processes a stage script may start: its share of the cores when
+    run_pipeline runs several stages at once, else every core.
+    """
+    return int(os.environ.get(WORKERS_ENV) or os.cpu_count() or 1)
+
+
+def run_stage(stage, profile=False, workers=None):
+    """
+    Run one stage as a child process; returns (exit code, seconds, peak RSS
+    in MB). profile=True runs it under cProfile (PROFILE_DIR/<stage>.prof);
+    workers is passed on as the stage's stage_workers() budget.
+    """
+    for path in [*stage.outputs, *stage.logs]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    (PROFILE_DIR / f"{stage.name}.json").unlink(missing_ok=True)
+
+    cmd = [sys.executable, str(stage.script), *stage.args]
+    if profile:
+        cmd[1:1] = ["-m", "cProfile", "-o", str(PROFILE_DIR / f"{stage.name}.prof")]
+    env = {**os.environ, "PYTHONUNBUFFERED": "1",
+           PROFILE_DIR_ENV: str(PROFILE_DIR), STAGE_ENV: stage.name}
+    if workers:
+        env[WORKERS_ENV] = str(workers)
+
+    start = time.perf_counter()
+    with open(LOG_DIR / f"{stage.name}.log", "w", encoding="utf-8") as log:
+        proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, env=env)
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    return proc.returncode, elapsed, rusage.ru_maxrss / 1024
+
+
+def select_stages(stages, targets=None):
+    """Targets plus everything upstream of them, in declaration order."""
+    producer = {str(out): s for s in stages for out in s.outputs}
+    if not targets:
+        return list(stages)
+
+    by_name = {s.name: s for s in stages}
+    unknown = [t for t in targets if t not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)}")
+
+    keep, todo = set(), [by_name[t] for t in targets]
+    while todo:
+        stage = todo.pop()
+        if stage.name in keep:
+            continue
+        keep.add(stage.name)
+        todo.extend(producer[str(p)] for p in stage.inputs if str(p) in producer)
+    return [s for s in stages if s.name in keep]
+
+
+def stage_steps(stage):
+    """Step records the stage's last run wrote through common.instrumentation."""
+    path = PROFILE_DIR / f"{stage.name}.json"
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return json.load(f)["steps"]
+
+
+def run_pipeline(stages, targets=None, force=(), jobs=1, dry_run=False, report_file=None, profile=False):
+    """
+    Run the selected stages in dependency order, `jobs` at a time. A stage
+    starts as soon as every upstream stage has finished; stages whose key
+    is cached are skipped (or restored). Returns the list of stage records.
+    """
+    stages = select_stages(stages, targets)
+    producer = {str(out): s.name for s in stages for out in s.outputs}
+    upstream = {s.name: {producer[str(p)] for p in s.inputs if str(p) in producer} for s in stages}
+
+    ledger = Ledger()
+    records, done, failed = {}, set(), set()
+    pending = list(stages)
+    running = {}
+    started = time.perf_counter()
+    # Stages running side by side split the cores instead of each taking all of them
+    workers = max(1, (os.cpu_count() or 1) // max(1, jobs))
+
+    def finish(stage, status, key, elapsed=0.0, peak_rss_mb=None, exit_code=None):
+        records[stage.name] = {
+            "stage": stage.name, "status": status, "duration_s": round(elapsed, 3),
+            "peak_rss_mb": None if peak_rss_mb is None else round(peak_rss_mb, 1),
+            "exit_code": exit_code, "key": key,
+            "steps": stage_steps(stage) if status in ("ran", "failed") and exit_code is not None else [],
+        }
+        (failed if status in ("failed", "blocked") else done).add(stage.name)
+        print(f"  [{status:>10}] {stage.name:<22} {elapsed:8.2f}s"
+              + ("" if peak_rss_mb is None else f"  peak {peak_rss_mb:8.1f} MB"))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            # Launch (or skip) every stage whose upstream is settled
+            n_pending = len(pending)
+            for stage in list(pending):
+                deps = upstream[stage.name]
+                if deps & failed:
+                    pending.remove(stage)
+                    finish(stage, "blocked", None)
+                    continue
+                if not deps <= done or len(running) >= max(1, jobs):
+                    continue
+                pending.remove(stage)
+
+                missing = [str(p) for p in stage.inputs if not p.exists() and not dry_run]
+                if missing:
+                    print(f"⚠️ {stage.name}: missing inputs {missing}")
+                    finish(stage, "failed", None)
+                    continue
+
+                key = ledger.stage_key(stage)
+                status = None if stage.name in force else cache_status(ledger, stage, key)
+                if status == "fresh":
+                    finish(stage, "fresh", key)
+                elif status == "restorable":
+                    restore_outputs(ledger, stage, key)
+                    finish(stage, "restored", key)
+                elif dry_run:
+                    finish(stage, "would run", key)
+                else:
+                    running[pool.submit(run_stage, stage, profile, workers)] = (stage, key)
+
+            if not running:
+                if pending and len(pending) == n_pending:
+                    raise RuntimeError(f"Dependency cycle among: {[s.name for s in pending]}")
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, key = running.pop(future)
+                exit_code, elapsed, peak = future.result()
+                missing = [str(p) for p in stage.outputs if not p.exists()]
+                if exit_code == 0 and not missing:
+                    store_outputs(ledger, stage, key)
+                    finish(stage, "ran", key, elapsed, peak, exit_code)
+                else:
+                    if missing:
+                        print(f"⚠️ {stage.name}: outputs not written {missing}")
+                    finish(stage, "failed", key, elapsed, peak, exit_code)
+                    print(f"   log: {LOG_DIR / (stage.name + '.log')}")
+            ledger.save()
+
+    ledger.save()
+    ordered = [records[s.name] for s in stages]
+    if report_file is not None:
+        Path(report_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(report_file, "w") as f:
+            json.dump({
+                "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "jobs": jobs,
+                "profile": profile,
+                "wall_s": round(time.perf_counter() - started, 3),
+                "stages": ordered,
+            }, f, indent=2)
+    return ordered
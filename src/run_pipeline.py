@@ -0,0 +1,217 @@
+# =========================================
+# Pipeline Runner: Data Generation -> Visualization
+# Purpose: Run Only Stale Stages, Independent Stages in Parallel
+# =========================================
+#
+# Run from the repository root:
+#   python src/run_pipeline.py                 # everything that is stale
+#   python src/run_pipeline.py policy -j 3     # policy + its upstream, 3 workers
+#   python src/run_pipeline.py --dry-run       # show what would run
+#   python src/run_pipeline.py --force model   # rerun model (and what it invalidates)
+#   python src/run_pipeline.py --in-memory     # raw -> cleaning -> features -> model -> policy
+#                                              # in one process, no intermediate CSVs
+#   python src/run_pipeline.py --profile       # + cProfile dump per stage (data/pipeline_cache/profiles)
+#   python src/run_pipeline.py --compare results/pipeline_run_baseline.json
+#                                              # flag stages / steps that got slower
+#
+# The run report (results/pipeline_run.json) holds, per stage, wall time,
+# peak RSS and the timed steps (rows in/out, RSS, optional tracemalloc
+# peak with UPLIFT_TRACEMALLOC=1) recorded through common.instrumentation.
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SRC_DIR))  # src/ (shared helpers)
+from common.pipeline import Stage, run_pipeline, select_stages
+from common.instrumentation import RECORDER, step, compare_runs
+from common.feature_matrix import MATRIX_FILES
+from common.dimension_index import INDEX_DIR, INDEX_FILES
+
+SRC = Path("src")
+RAW = Path("data/raw")
+PROC = Path("data/processed")
+FEAT = Path("data/features")
+RESULTS = Path("results")
+IMAGES = Path("images")
+
+ACCOUNTS = RAW / "accounts_raw.csv"
+USERS = RAW / "users_raw.csv"
+ACTIVITY = RAW / "user_activity_daily_raw.csv"
+LATENT = RAW / "latent_uplift_groups_hidden.csv"
+INTERVENTIONS = RAW / "interventions_raw.csv"
+OUTCOMES = RAW / "outcomes_raw.csv"
+RAW_FILES = [ACCOUNTS, USERS, ACTIVITY, INTERVENTIONS, OUTCOMES, LATENT]
+# user -> account / role index written with users_raw.csv (common/dimension_index.py)
+DIM_INDEX = [INDEX_DIR / name for name in INDEX_FILES]
+
+MODELING_BASE = PROC / "modeling_base_user_level.csv"
+FEATURES = FEAT / "features_user_level.csv"
+SCORES = RESULTS / "user_uplift_scores.csv"
+POLICY_DEBUG = RESULTS / "account_policy_debug.csv"
+
+# -----------------------------
+# Stage Graph (edges follow from inputs / outputs)
+# -----------------------------
+STAGES = [
+    # Phase 4: Synthetic data generation
+    Stage("accounts_users", SRC / "01_data_generation/01_accounts_users.py",
+          outputs=[ACCOUNTS, USERS, *DIM_INDEX]),
+    Stage("activity", SRC / "01_data_generation/02_generate_user_activity_daily_raw.py",
+          inputs=[USERS], outputs=[ACTIVITY]),
+    Stage("latent_groups", SRC / "01_data_generation/03_assign_latent_uplift_groups.py",
+          inputs=[*DIM_INDEX, ACTIVITY], outputs=[LATENT]),
+    Stage("interventions", SRC / "01_data_generation/04_assign_interventions_raw.py",
+          inputs=[*DIM_INDEX, ACCOUNTS, ACTIVITY], outputs=[INTERVENTIONS]),
+    Stage("outcomes", SRC / "01_data_generation/05_generate_outcomes_raw.py",
+          inputs=[INTERVENTIONS, LATENT], outputs=[OUTCOMES]),
+
+    # Raw data audits (independent of cleaning -> run alongside it)
+    Stage("validate_data", SRC / "01_data_generation/validation/01_validate_data.py",
+          inputs=RAW_FILES, outputs=[RAW / "validation/generation_report.md"]),
+    Stage("record_schema", SRC / "01_data_generation/validation/02_record_schema.py",
+          inputs=RAW_FILES, outputs=[RAW / "validation/schema_manifest.txt", RAW / "validation/schema_manifest.json"]),
+
+    # Phase 4F -> 6
+    Stage("cleaning", SRC / "02_data_cleaning/data_cleaning.py",
+          inputs=[USERS, ACCOUNTS, ACTIVITY, INTERVENTIONS, OUTCOMES],
+          outputs=[MODELING_BASE, Path("data/validation/data_quality_summary.md"),
+                   Path("data/validation/cleaning_decisions.md"),
+                   Path("data/validation/data_readiness_report.md")]),
+    Stage("features", SRC / "03_feature_engineering/feature_engineering.py",
+          inputs=[MODELING_BASE, ACCOUNTS], outputs=[FEATURES, *(FEAT / "matrix" / name for name in MATRIX_FILES)]),
+    Stage("model", SRC / "04_modeling/train_uplift_model.py",
+          inputs=[FEATURES, LATENT], outputs=[SCORES]),
+
+    # Phase 7: policy + what-if tools (independent of each other)
+    Stage("policy", SRC / "05_policy/account_policy.py",
+          inputs=[SCORES, *DIM_INDEX], outputs=[POLICY_DEBUG, RESULTS / "final_target_accounts.csv"]),
+    Stage("policy_sweep", SRC / "05_policy/policy_sweep.py",
+          inputs=[SCORES, *DIM_INDEX], outputs=[RESULTS / "policy_sweep.csv"]),
+    Stage("campaigns", SRC / "05_policy/campaign_policy.py",
+          inputs=[SCORES, *DIM_INDEX], outputs=[RESULTS / "campaign_assignments.csv"]),
+
+    # Phase 8
+    Stage("visualize", SRC / "06_visualization/visualize_impact.py",
+          inputs=[POLICY_DEBUG, LATENT, *DIM_INDEX],
+          outputs=[IMAGES / "01_policy_funnel.png", IMAGES / "02_risk_vs_reward.png",
+                   IMAGES / "03_budget_efficiency.png", IMAGES / "04_uplift_distribution.png",
+                   IMAGES / "05_failure_matrix.png", RESULTS / "failure_mode_analysis.txt",
+                   RESULTS / "safety_audit.csv"],
+          logs=[RESULTS / "safety_audit_history.csv"]),
+    Stage("report", SRC / "06_visualization/report_builder.py",
+          inputs=[POLICY_DEBUG, LATENT, *DIM_INDEX],
+          outputs=[RESULTS / "report/summaries/manifest.json", RESULTS / "report/dashboard.html"]),
+]
+
+
+
+# -----------------------------
+# In-Memory End-to-End Run
+# -----------------------------
+def run_in_memory(params=None):
+    """
+    Raw tables -> modeling base -> features -> scores -> account decisions
+    as DataFrames handed from stage function to stage function. Only the
+    final results (and the cleaning reports) are written.
+    """
+    for stage_dir in ("02_data_cleaning", "03_feature_engineering", "04_modeling", "05_policy"):
+        sys.path.insert(0, str(SRC_DIR / stage_dir))
+    from common.keys import read_encoded_csv, to_decoded_csv
+    from cleaning_logic import load_raw_tables, build_modeling_base, write_cleaning_reports
+    from feature_logic import build_features
+    from uplift_scoring import score_users, sanity_checks, output_columns
+    from policy_logic import build_account_policy
+
+    print("Loading raw tables...")
+    with step("load_raw"):
+        raw = load_raw_tables(RAW)
+
+    print("Cleaning...")
+    with step("cleaning"):
+        modeling_base, base = build_modeling_base(**raw)
+        write_cleaning_reports(modeling_base, base, raw_rows=len(raw["interventions"]),
+                               val_dir=Path("data/validation"))
+
+    print("Engineering features...")
+    with step("features"):
+        features = build_features(modeling_base, raw["accounts"])
+
+    with step("model"):
+        scored, eval_weight = score_users(features, params=params)
+        sanity_checks(scored, latent=read_encoded_csv(LATENT) if LATENT.exists() else None,
+                      eval_weight=eval_weight)
+        RESULTS.mkdir(parents=True, exist_ok=True)
+        to_decoded_csv(scored[output_columns()], SCORES)
+
+    print("\nDeciding accounts...")
+    with step("policy"):
+        roles = raw["users"][["user_id", "role_type"]]
+        accounts = build_account_policy(scored.merge(roles, on="user_id", how="left"))
+        treatable = accounts[accounts["decision"] == "treat_account"]
+        to_decoded_csv(treatable[["account_id", "net_account_value", "n_users"]], RESULTS / "final_target_accounts.csv")
+        to_decoded_csv(accounts, POLICY_DEBUG)
+
+    print(accounts["decision"].value_counts().to_string())
+    print(f"Treatable Accounts: {len(treatable)} of {len(accounts)}; "
+          f"Projected Net Value: ${treatable['net_account_value'].sum():,.2f}")
+    return accounts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the uplift pipeline, skipping stages whose outputs are fresh.")
+    parser.add_argument("targets", nargs="*", help="Stages to bring up to date (default: all).")
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="Stages to run in parallel.")
+    parser.add_argument("--force", nargs="*", default=None, metavar="STAGE",
+                        help="Rerun these stages even if cached (no names = every selected stage).")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would run.")
+    parser.add_argument("--list", action="store_true", help="List stages and their upstream dependencies.")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="Run cleaning -> policy in one process from the raw tables (no intermediate files).")
+    parser.add_argument("--profile", action="store_true",
+                        help="Also write a cProfile dump per stage that runs.")
+    parser.add_argument("--compare", type=Path, default=None, metavar="BASELINE_REPORT",
+                        help="After the run, list stages / steps >25%% slower than this earlier report.")
+    parser.add_argument("--report", type=Path, default=RESULTS / "pipeline_run.json")
+    args = parser.parse_args()
+
+    if args.list:
+        producer = {str(out): s.name for s in STAGES for out in s.outputs}
+        for stage in STAGES:
+            deps = sorted({producer[str(p)] for p in stage.inputs if str(p) in producer})
+            print(f"{stage.name:<16} <- {', '.join(deps) or '(source)'}")
+        sys.exit(0)
+
+    if args.in_memory:
+        run_in_memory()
+        RECORDER.write(args.report, stage="in_memory")
+        print(f"Run report saved to: {args.report}")
+        sys.exit(0)
+
+    selected = select_stages(STAGES, args.targets)
+    force = {s.name for s in selected} if args.force == [] else set(args.force or [])
+
+    print(f"Running {len(selected)} stage(s) with {args.jobs} worker(s)...")
+    records = run_pipeline(STAGES, targets=args.targets, force=force, jobs=args.jobs,
+                           dry_run=args.dry_run, report_file=None if args.dry_run else args.report,
+                           profile=args.profile)
+
+    ran = [r for r in records if r["status"] == "ran"]
+    failed = [r for r in records if r["status"] in ("failed", "blocked")]
+    print(f"\nRan {len(ran)}, skipped {len(records) - len(ran) - len(failed)}, failed {len(failed)}.")
+    if ran:
+        slowest = max(ran, key=lambda r: r["duration_s"])
+        print(f"Slowest stage: {slowest['stage']} ({slowest['duration_s']:.2f}s, "
+              f"peak {slowest['peak_rss_mb']:.0f} MB)")
+    if not args.dry_run:
+        print(f"Run report saved to: {args.report}")
+
+    if args.compare and not args.dry_run:
+        with open(args.compare) as f, open(args.report) as g:
+            regressions = compare_runs(json.load(f), json.load(g))
+        print(f"\nSlower than {args.compare}: {len(regressions)}")
+        for name, before, after, ratio in regressions:
+            print(f"  {name:<48} {before:8.2f}s -> {after:8.2f}s  (x{ratio:.2f})")
+    sys.exit(1 if failed else 0)